@@ -0,0 +1,57 @@
+"""
+Abercrombie adapter for the ingestion pipeline (Dataset_final/pipeline.py).
+
+Exposes the brand's discovery, description and file-naming steps as plain
+functions so the pipeline can run each of them on its own worker pool.
+Discovery needs a real browser, so every discovery worker thread keeps its
+own listing driver; descriptions share one DriverPool for their fallbacks.
+"""
+
+import threading
+
+from scraper import find_product_links, scrape_product
+from driver_pool import DriverPool, new_driver
+from img_downloader import image_filename
+
+_local = threading.local()
+_listing_drivers = []
+_pool = None
+_lock = threading.Lock()
+
+def _listing_driver():
+    if not hasattr(_local, "driver"):
+        _local.driver = new_driver()
+        with _lock:
+            _listing_drivers.append(_local.driver)
+    return _local.driver
+
+def _driver_pool():
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = DriverPool()
+    return _pool
+
+def discover(target):
+    """
+    Load one category page and collect its product links.
+
+    Returns:
+        list: Product stubs with 'url', in page order
+    """
+    hrefs = find_product_links(_listing_driver(), target["url"], target["limit"],
+                               f"{target['gender']}/{target['category']}")
+    return [{"url": href} for href in hrefs]
+
+def describe(stub):
+    """Complete a stub into a metadata.json record (og tags over HTTP, browser as fallback)"""
+    return scrape_product(_driver_pool(), stub["url"])
+
+def close():
+    for driver in _listing_drivers:
+        try:
+            driver.quit()
+        except Exception as e:
+            print(f"⚠️ Error closing browser: {e}")
+    if _pool is not None:
+        _pool.close()
@@ -0,0 +1,106 @@
+"""
+Pool of long-lived headless Chrome drivers for Abercrombie product pages.
+
+Launching Chrome is the most expensive part of scraping one product, so the
+pool keeps N browsers alive and hands them out to product jobs. Each browser
+is quit and replaced after max_pages page loads to keep memory growth in check.
+
+Usage:
+    with DriverPool(size=4) as pool:
+        with pool.driver() as driver:
+            driver.get(url)
+"""
+
+import os
+import queue
+from contextlib import contextmanager
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.common.exceptions import WebDriverException
+
+DEFAULT_POOL_SIZE = min(os.cpu_count() or 1, 8)
+DEFAULT_MAX_PAGES = 50
+
+def chrome_options():
+    """Headless Chrome options shared by every ANF driver"""
+    options = Options()
+    options.add_argument("--headless")  # Run in background
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--log-level=3")
+    return options
+
+def new_driver():
+    return webdriver.Chrome(options=chrome_options())
+
+class PooledDriver:
+    """A Chrome driver plus the number of pages it has loaded"""
+
+    def __init__(self):
+        self.driver = new_driver()
+        self.pages = 0
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except Exception as e:
+            print(f"⚠️ Error closing browser: {e}")
+
+class DriverPool:
+    def __init__(self, size=DEFAULT_POOL_SIZE, max_pages=DEFAULT_MAX_PAGES):
+        self.size = size
+        self.max_pages = max_pages
+        self._closed = False
+        # Holds idle PooledDrivers and one None token per browser not started yet;
+        # browsers are started lazily so a short run doesn't pay for the whole pool
+        self._idle = queue.Queue()
+        for _ in range(size):
+            self._idle.put(None)
+
+    def _acquire(self):
+        pooled = self._idle.get()
+        if pooled is not None:
+            return pooled
+        try:
+            return PooledDriver()
+        except Exception:
+            self._idle.put(None)
+            raise
+
+    def _release(self, pooled, broken=False):
+        pooled.pages += 1
+        if broken or self._closed or pooled.pages >= self.max_pages:
+            pooled.quit()
+            self._idle.put(None)
+        else:
+            self._idle.put(pooled)
+
+    @contextmanager
+    def driver(self):
+        """Borrow a driver for one page; it is recycled or returned to the pool afterwards"""
+        pooled = self._acquire()
+        broken = False
+        try:
+            yield pooled.driver
+        except WebDriverException:
+            broken = True
+            raise
+        finally:
+            self._release(pooled, broken)
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if pooled is not None:
+                pooled.quit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,14 +1,21 @@
 import os
+import sys
 import json
-import requests
+import argparse
 from urllib.parse import urlparse
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from image_download import download_all, DEFAULT_WORKERS
+from metadata_store import iter_records, jsonl_path_for
+import brands
+import metrics
+import ratelimit
+
 # Path to metadata.json
-METADATA_PATH = r"C:\Users\prerk\OneDrive\Desktop\Prerana\Projects\Alaiy-Skill-Test\Dataset_final\ANF\images\metadata.json"
+METADATA_PATH = brands.metadata_path("anf")
 
 # Output directory for downloaded images
-OUTPUT_DIR = os.path.join(os.path.dirname(METADATA_PATH), r"C:\Users\prerk\OneDrive\Desktop\Prerana\Projects\Alaiy-Skill-Test\Dataset_final\ANF\images\downloaded_images")
-os.makedirs(OUTPUT_DIR, exist_ok=True)
+OUTPUT_DIR = brands.downloads_dir("anf")
 
 def extract_product_slug(url):
     """
@@ -21,10 +28,13 @@ def extract_product_slug(url):
     except Exception:
         return "unknown"
 
-def download_images(metadata_path, output_dir):
-    with open(metadata_path, "r", encoding="utf-8") as f:
-        products = json.load(f)
+def image_filename(idx, product):
+    """Numbered filename for the product at 1-based position idx"""
+    product_name = extract_product_slug(product["url"])
+    return f"{idx}-{product_name}.jpg"
 
+def build_jobs(products, output_dir):
+    """Pair every image URL with its numbered target path, lazily so products can be a stream"""
     for idx, product in enumerate(products, start=1):
         image_url = product.get("image")
         product_url = product.get("url")
@@ -32,18 +42,33 @@ def download_images(metadata_path, output_dir):
             print(f"Skipping item {idx} due to missing data.")
             continue
 
-        product_name = extract_product_slug(product_url)
-        filename = f"{idx}-{product_name}.jpg"
-        filepath = os.path.join(output_dir, filename)
+        yield image_url, os.path.join(output_dir, image_filename(idx, product))
+
+def download_images(metadata_path, output_dir, workers=DEFAULT_WORKERS, verify_size=False, follow=False):
+    """
+    Download every image in metadata_path. A .jsonl path is streamed, and with
+    follow=True images download while the scraper is still appending to it.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    if metadata_path.endswith(".jsonl"):
+        products = iter_records(metadata_path, follow=follow)
+    else:
+        with open(metadata_path, "r", encoding="utf-8") as f:
+            products = json.load(f)
 
-        try:
-            response = requests.get(image_url, timeout=10)
-            response.raise_for_status()
-            with open(filepath, "wb") as img_file:
-                img_file.write(response.content)
-            print(f"✅ Saved: {filename}")
-        except Exception as e:
-            print(f"❌ Failed to download {filename}: {e}")
+    return download_all(build_jobs(products, output_dir), workers=workers, verify_size=verify_size)
 
 if __name__ == "__main__":
-    download_images(METADATA_PATH, OUTPUT_DIR)
+    parser = argparse.ArgumentParser(description="Download Abercrombie product images listed in metadata.json")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Concurrent downloads")
+    parser.add_argument("--verify-size", action="store_true",
+                        help="Re-check existing files against the server's Content-Length")
+    parser.add_argument("--follow", action="store_true",
+                        help="Stream images/metadata.jsonl while the scraper is still writing it")
+    ratelimit.add_arguments(parser)
+    args = parser.parse_args()
+    ratelimit.configure_from_args(args)
+    metadata_path = jsonl_path_for(METADATA_PATH) if args.follow else METADATA_PATH
+    download_images(metadata_path, OUTPUT_DIR, args.workers, args.verify_size, args.follow)
+    metrics.export("anf_downloader")
@@ -1,26 +1,183 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
-from selenium.common.exceptions import NoSuchElementException
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import NoSuchElementException, TimeoutException, WebDriverException
+from driver_pool import new_driver
+from html.parser import HTMLParser
+import codecs
 import json
+import os
+import sys
 import time
 
-def scrape_description_selenium(url):
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import http_client
+import metrics
+import ratelimit
+
+# Upper bound on waiting for the og meta tags; most pages have them as soon as the head is parsed
+META_TIMEOUT = 10
+
+# Stop reading a product page over HTTP after this much without seeing </head>
+MAX_HEAD_BYTES = 512 * 1024
+
+# Markers of the bot-protection interstitials served instead of a product page
+CHALLENGE_MARKERS = (
+    "access denied",
+    "pardon our interruption",
+    "captcha",
+    "verify you are human",
+    "_incapsula_",
+    "px-captcha",
+)
+
+class OgMetaParser(HTMLParser):
+    """Collects og:* meta tags and notes when the document head has ended"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.og = {}
+        self.title = ""
+        self.head_done = False
+        self._in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "meta":
+            attrs = dict(attrs)
+            prop = attrs.get("property") or ""
+            if prop.startswith("og:") and prop not in self.og:
+                self.og[prop] = attrs.get("content")
+        elif tag == "title":
+            self._in_title = True
+        elif tag == "body":
+            self.head_done = True
+
+    def handle_endtag(self, tag):
+        if tag == "head":
+            self.head_done = True
+        elif tag == "title":
+            self._in_title = False
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+
+def looks_like_challenge(status_code, text):
+    if status_code in (403, 429, 503):
+        return True
+    lowered = text.lower()
+    return any(marker in lowered for marker in CHALLENGE_MARKERS)
+
+def declared_charset(content_type):
+    """
+    Charset a Content-Type header declares, or "utf-8" when it declares none (or an unknown one).
+    requests' response.encoding falls back to ISO-8859-1 for any text/* type, which mangles UTF-8 pages.
+    """
+    for param in content_type.split(";")[1:]:
+        key, _, value = param.partition("=")
+        if key.strip().lower() == "charset":
+            try:
+                return codecs.lookup(value.strip().strip("'\"")).name
+            except LookupError:
+                break
+    return "utf-8"
+
+def scrape_description_http(url):
+    """
+    Fetch a product page over plain HTTP and read its og:description / og:image
+    with a streaming parser that stops at the end of <head>.
+
+    Returns:
+        dict: url, description and image, or None when the page has no usable
+        og tags, e.g. because a bot challenge was served (so the caller can fall back to Selenium)
+    """
+    parser = OgMetaParser()
+    head_text = ""
+    parse_seconds = 0.0
+    try:
+        with http_client.get_html(url, stream=True) as response:
+            decoder = codecs.getincrementaldecoder(declared_charset(response.headers.get("Content-Type", "")))(errors="replace")
+            read = 0
+            for chunk in response.iter_content(chunk_size=16 * 1024):
+                text = decoder.decode(chunk)
+                head_text += text
+                parse_started = time.perf_counter()
+                parser.feed(text)
+                parse_seconds += time.perf_counter() - parse_started
+                read += len(chunk)
+                if parser.head_done or read >= MAX_HEAD_BYTES:
+                    break
+            status_code = response.status_code
+    except requests.RequestException as e:
+        print(f"HTTP fetch failed for {url}: {e}")
+        return None
+
+    metrics.observe("stage", parse_seconds, stage="parse", host=metrics.host_of(url))
+
+    description = parser.og.get("og:description")
+    image_url = parser.og.get("og:image")
+    if status_code == 200 and description and image_url:
+        return {
+            "url": url,
+            "description": description,
+            "image": image_url
+        }
+
+    if looks_like_challenge(status_code, head_text):
+        reason = "bot challenge"
+    elif status_code != 200:
+        reason = f"HTTP {status_code}"
+    else:
+        reason = "og tags missing"
+    print(f"↪️ Falling back to browser for {url} ({reason})")
+    metrics.count("fallbacks", reason=reason)
+    return None
+
+def scrape_description(url, pool=None):
+    """
+    Extract a product's og description and image, over HTTP when possible and
+    through Selenium (on a pooled browser if pool is given) otherwise.
+
+    Returns:
+        dict: url, description, image and source ("http" or "selenium")
+    """
+    product_data = scrape_description_http(url)
+    if product_data:
+        product_data["source"] = "http"
+        return product_data
+
+    with metrics.timer("browser", metrics.host_of(url)):
+        if pool is None:
+            product_data = scrape_description_selenium(url)
+        else:
+            with pool.driver() as driver:
+                product_data = scrape_description_selenium(url, driver)
+    product_data["source"] = "selenium"
+    return product_data
+
+def scrape_description_selenium(url, driver=None):
     """
     Use Selenium to extract product description and image URL from og meta tags.
     Returns a dictionary with url, description, and image.
-    """
-    options = Options()
-    options.add_argument("--headless")  # Run in background
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--log-level=3")
 
-    driver = webdriver.Chrome(options=options)
+    Pass a driver borrowed from a DriverPool to reuse a running browser; without
+    one a browser is started for this call and quit afterwards.
+    """
+    owns_driver = driver is None
+    if owns_driver:
+        driver = new_driver()
 
     try:
+        ratelimit.acquire(url)
         driver.get(url)
-        time.sleep(3)  # Allow the page to fully load
+        try:
+            WebDriverWait(driver, META_TIMEOUT).until(
+                EC.presence_of_element_located((By.XPATH, "//meta[@property='og:description']"))
+            )
+        except TimeoutException:
+            pass  # Reported below as a missing tag
 
         # Extract og:description
         try:
@@ -46,13 +203,16 @@ def scrape_description_selenium(url):
 
     except Exception as e:
         print(f"Error scraping {url}: {e}")
+        if not owns_driver and isinstance(e, WebDriverException):
+            raise  # Let the pool replace the browser
         return {
             "url": url,
             "description": None,
             "image": None
         }
     finally:
-        driver.quit()
+        if owns_driver:
+            driver.quit()
 
 # # Usage
 # url = "https://www.abercrombie.com/shop/wd/p/dipped-waist-bubble-hem-midi-dress-59928323?cate"
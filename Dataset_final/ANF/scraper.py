@@ -1,119 +1,207 @@
 import time
-import requests
 import os
-import json
-import re
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
+import sys
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
 from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from scrape_description import scrape_description_selenium
-
-# Define scraping targets
-SCRAPE_TARGETS = [
-    {"url": "https://www.abercrombie.com/shop/wd/womens-dresses-and-jumpsuits", "gender": "womens", "category": "dresses-and-jumpsuits", "limit": 5},
-    {"url": "https://www.abercrombie.com/shop/wd/womens-tops--1", "gender": "womens", "category": "tops", "limit": 15},
-    {"url": "https://www.abercrombie.com/shop/wd/womens-bottoms--1", "gender": "womens", "category": "bottoms", "limit": 10},
-    {"url": "https://www.abercrombie.com/shop/wd/womens-coats-and-jackets", "gender": "womens", "category": "coats-and-jackets", "limit": 5},
-    {"url": "https://www.abercrombie.com/shop/wd/womens-sleep-and-intimates", "gender": "womens", "category": "sleep-and-intimates", "limit": 5},
-    {"url": "https://www.abercrombie.com/shop/wd/womens-shoes", "gender": "womens", "category": "shoes", "limit": 5},
-    {"url": "https://www.abercrombie.com/shop/wd/womens-activewear", "gender": "womens", "category": "activewear", "limit": 5},
-    {"url": "https://www.abercrombie.com/shop/wd/mens-tops--1", "gender": "mens", "category": "tops", "limit": 15},
-    {"url": "https://www.abercrombie.com/shop/wd/mens-bottoms--1", "gender": "mens", "category": "bottoms", "limit": 10},
-    {"url": "https://www.abercrombie.com/shop/wd/mens-coats-and-jackets", "gender": "mens", "category": "coats-and-jackets", "limit": 5},
-    {"url": "https://www.abercrombie.com/shop/wd/mens-suits", "gender": "mens", "category": "suits", "limit": 5},
-    {"url": "https://www.abercrombie.com/shop/wd/mens-activewear", "gender": "mens", "category": "activewear", "limit": 5},
-    {"url": "https://www.abercrombie.com/shop/wd/mens-underwear", "gender": "mens", "category": "underwear", "limit": 2},
-    {"url": "https://www.abercrombie.com/shop/wd/mens-swim", "gender": "mens", "category": "swim", "limit": 3}
-]
-
-def scrape_abercrombie_images():
-    metadata = []
-    BASE_URL = "https://www.abercrombie.com"
-
-    options = Options()
-    options.add_argument("--headless")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--log-level=3")
-    driver = webdriver.Chrome(options=options)
+from selenium.common.exceptions import TimeoutException
+from scrape_description import scrape_description
+from driver_pool import DriverPool, new_driver, DEFAULT_POOL_SIZE, DEFAULT_MAX_PAGES
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from metadata_store import MetadataStore, OrderedWriter, export_json
+from brands import BRANDS
+import metrics
+import ratelimit
+
+# Product pages fetched over plain HTTP at the same time, on top of the browser pool
+DEFAULT_HTTP_WORKERS = 8
+
+# Define scraping targets (see Dataset_final/brands.py)
+SCRAPE_TARGETS = BRANDS["anf"]["targets"]
+
+BASE_URL = "https://www.abercrombie.com"
+
+# Product card images; their enclosing links are the product pages
+PRODUCT_IMAGE_SELECTOR = "img.catalog-productCard-module__productCardImage_1"
+
+# Upper bound on waiting for the first product cards after a page load
+READY_TIMEOUT = 20
+# How long a scroll may take to load more cards before the page counts as fully grown
+GROWTH_TIMEOUT = 5
+MAX_SCROLLS = 30
+POLL_INTERVAL = 0.25
+
+# One round trip for every card link instead of one find_element per image
+PRODUCT_HREFS_SCRIPT = """
+return Array.from(document.querySelectorAll(arguments[0]), function (img) {
+    var link = img.closest('a');
+    return link ? link.href : null;
+});
+"""
+
+def product_hrefs(driver):
+    """Hrefs of the product cards currently in the page, in page order"""
+    hrefs = []
+    for href in driver.execute_script(PRODUCT_HREFS_SCRIPT, PRODUCT_IMAGE_SELECTOR) or []:
+        if not href:
+            continue
+        if href.startswith("/"):
+            href = BASE_URL + href
+        hrefs.append(href)
+    return hrefs
+
+class LinkCollector:
+    """
+    Accumulates unique product hrefs across scrolls.
+
+    Calling it with a driver (as WebDriverWait does) picks up newly rendered
+    cards and is truthy only when at least one new href appeared, so a wait
+    on it ends as soon as the page grows.
+    """
+
+    def __init__(self):
+        self.hrefs = []
+        self.seen = set()
+
+    def __call__(self, driver):
+        grown = False
+        for href in product_hrefs(driver):
+            if href not in self.seen:
+                self.seen.add(href)
+                self.hrefs.append(href)
+                grown = True
+        return grown
+
+def wait_for_growth(driver, collector, timeout):
+    """Wait until new product cards render; False when none did within timeout"""
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=POLL_INTERVAL).until(collector)
+        return True
+    except TimeoutException:
+        return False
+
+def find_product_links(driver, url, limit, category=None):
+    """
+    Load a category page on driver and return up to limit unique product hrefs, in page order.
+
+    Waits for the first product cards instead of a fixed delay, then scrolls
+    only while fewer than limit links are loaded and each scroll still adds
+    cards. Time-to-ready is recorded per category.
+    """
+    category = category or urlparse(url).path.rstrip("/").rsplit("/", 1)[-1]
+    host = metrics.host_of(url)
+    started = time.perf_counter()
+
+    ratelimit.acquire(url)
+    with metrics.timer("page_load", host):
+        driver.get(url)
+
+    collector = LinkCollector()
+    if not wait_for_growth(driver, collector, READY_TIMEOUT):
+        print(f"⚠️ No product cards on {url} after {READY_TIMEOUT}s")
+        metrics.count("errors", stage="ready", host=host)
+        return []
+    metrics.observe("first_card", time.perf_counter() - started, category=category)
+
+    scrolls = 0
+    while len(collector.hrefs) < limit and scrolls < MAX_SCROLLS:
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        scrolls += 1
+        if not wait_for_growth(driver, collector, GROWTH_TIMEOUT):
+            print(f"📜 Page stopped growing after {scrolls} scroll(s) with {len(collector.hrefs)} links")
+            break
+
+    elapsed = time.perf_counter() - started
+    metrics.observe("category_ready", elapsed, category=category)
+    metrics.count("scrolls", scrolls, category=category)
+
+    hrefs = collector.hrefs[:limit]
+    for href in hrefs:
+        print(f"🔗 Found: {href}")
+    print(f"⏱️ {category}: {len(hrefs)}/{limit} links ready in {elapsed:.1f}s ({scrolls} scroll(s))")
+    return hrefs
+
+def scrape_product(pool, href):
+    """Scrape one product page over HTTP or on a pooled browser, falling back to a URL-only record"""
+    try:
+        product_data = scrape_description(href, pool)
+        if product_data and isinstance(product_data, dict):
+            print(f"✅ Scraped and saved ({product_data['source']}): {href}")
+            return product_data
+        # Fallback if description scraping fails
+        print(f"⚠️ Scraped URL only: {href}")
+    except Exception as e:
+        print(f"❌ Error scraping description for {href}: {e}")
+    return {"url": href, "description": None}
+
+def scrape_abercrombie_images(pool_size=DEFAULT_POOL_SIZE, max_pages=DEFAULT_MAX_PAGES, http_workers=DEFAULT_HTTP_WORKERS):
+    # The listing driver walks the category pages while product pages are
+    # fetched in the background, so descriptions load while later categories are found.
+    # Most products are served over plain HTTP; only fallbacks wait for a pooled browser.
+    driver = new_driver()
+    pool = DriverPool(size=pool_size, max_pages=max_pages)
+    executor = ThreadPoolExecutor(max_workers=pool_size + http_workers)
+    futures = []
+
+    # Each product is appended to images/metadata.jsonl as soon as it and every
+    # product discovered before it are done, so a crash keeps the finished work
+    store = MetadataStore(os.path.join("images", "metadata.jsonl"))
+    writer = OrderedWriter(store, len(SCRAPE_TARGETS))
 
     try:
-        for item in SCRAPE_TARGETS:
+        for group, item in enumerate(SCRAPE_TARGETS):
             url = item["url"]
             gender = item["gender"]
             category = item["category"]
             limit = item["limit"]
 
             print(f"\n🔍 Finding {gender}/{category} ({limit} links)")
-            driver.get(url)
-            time.sleep(10)
-
-            for _ in range(3):
-                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                time.sleep(3)
-
-            images = driver.find_elements(By.CSS_SELECTOR, "img.catalog-productCard-module__productCardImage_1")
-
-            count = 0
-            seen = set()
-
-            for img in images:
-                if count >= limit:
-                    break
-
-                try:
-                    parent_a = img.find_element(By.XPATH, "ancestor::a")
-                    href = parent_a.get_attribute("href")
-
-                    if not href:
-                        continue
-                    if href.startswith("/"):
-                        href = BASE_URL + href
-                    if href in seen:
-                        continue
-                    seen.add(href)
-
-                    count += 1
-                    print(f"🔗 Found: {href}")
-                    
-                    # Scrape product description
-                    try:
-                        product_data = scrape_description_selenium(href)
-                        if product_data and isinstance(product_data, dict):
-                            metadata.append(product_data)
-                            print(f"✅ Scraped and saved: {href}")
-                        else:
-                            # Fallback if description scraping fails
-                            metadata.append({"url": href, "description": None})
-                            print(f"⚠️ Scraped URL only: {href}")
-                    except Exception as e:
-                        print(f"❌ Error scraping description for {href}: {e}")
-                        metadata.append({"url": href, "description": None})
-
-                    time.sleep(1)
-
-                except Exception as e:
-                    print(f"Error processing image: {e}")
-                    time.sleep(1)
+            hrefs = find_product_links(driver, url, limit, f"{gender}/{category}")
+
+            for index, href in enumerate(hrefs):
+                # Scrape product description on the pool
+                future = executor.submit(scrape_product, pool, href)
+                future.add_done_callback(
+                    lambda done, group=group, index=index: writer.put(group, index, done.result())
+                )
+                futures.append(future)
+
+            writer.set_group_size(group, len(hrefs))
+
+        # Keep metadata in discovery order regardless of which page finished first
+        metadata = [future.result() for future in futures]
 
     finally:
         driver.quit()
+        executor.shutdown(wait=True)
+        pool.close()
+        store.close()
+        metrics.export("anf_scraper")
 
-    os.makedirs("images", exist_ok=True)
-    metadata_path = os.path.join("images", "metadata.json")
-    with open(metadata_path, "w", encoding="utf-8") as f:
-        json.dump(metadata, f, indent=4, ensure_ascii=False)
+    export_json(store.path, os.path.join("images", "metadata.json"), indent=4)
 
     # Print summary
     total_products = len(metadata)
     products_with_descriptions = sum(1 for item in metadata if item.get("description"))
     
     print(f"\n🎉 Link scraping complete. Metadata saved to images/metadata.json.")
+    served_by_http = sum(1 for item in metadata if item.get("source") == "http")
     print(f"📊 Summary: {total_products} products found, {products_with_descriptions} with descriptions")
+    print(f"🌐 {served_by_http} served over plain HTTP, {total_products - served_by_http} needed a browser")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape Abercrombie categories into images/metadata.json")
+    parser.add_argument("--browsers", type=int, default=DEFAULT_POOL_SIZE,
+                        help="Headless browsers used in parallel for product pages")
+    parser.add_argument("--pages-per-browser", type=int, default=DEFAULT_MAX_PAGES,
+                        help="Page loads before a browser is recycled")
+    parser.add_argument("--http-workers", type=int, default=DEFAULT_HTTP_WORKERS,
+                        help="Product pages fetched over plain HTTP in parallel")
+    ratelimit.add_arguments(parser)
+    args = parser.parse_args()
+    ratelimit.configure_from_args(args)
+
     # Run either step depending on what you've already done:
-    scrape_abercrombie_images()       # Step 1: Collect URLs
\ No newline at end of file
+    scrape_abercrombie_images(args.browsers, args.pages_per_browser, args.http_workers)       # Step 1: Collect URLs
\ No newline at end of file
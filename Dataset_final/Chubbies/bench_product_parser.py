@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Benchmark the single-pass product parser against the original BeautifulSoup extraction.
+
+Runs both extractors over saved product-page HTML fixtures and reports CPU
+time per page, peak traced memory and whether both produce the same
+description. fixtures/ ships trimmed pages covering each extraction path
+(accordion panel, fallback selector, keyword paragraphs, nothing found), so
+it runs offline; --fetch adds real pages next to them.
+
+    python bench_product_parser.py                # benchmark everything in fixtures/
+    python bench_product_parser.py --fetch 20     # first save 20 product pages from images/metadata.json
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+from bs4 import BeautifulSoup
+
+from product_parser import extract_description
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import http_client
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+METADATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "images", "metadata.json")
+
+def extract_description_soup(html):
+    """The original three-pass BeautifulSoup extraction, kept as the benchmark baseline"""
+    soup = BeautifulSoup(html, 'html.parser')
+
+    # Extract description from product accordion panel
+    description = ""
+
+    # Look for the specific product accordion panel div
+    accordion_panels = soup.find_all('div', class_=lambda x: x and 'product-accordion__panel' in x)
+
+    for panel in accordion_panels:
+        # Get all paragraph tags within this panel
+        paragraphs = panel.find_all('p')
+        panel_text = []
+
+        for p in paragraphs:
+            text = p.get_text().strip()
+            if text and len(text) > 10:  # Only include substantial text
+                panel_text.append(text)
+
+        if panel_text:
+            description = " ".join(panel_text)
+            break  # Use the first panel with content
+
+    # Fallback: Look for other common description containers
+    if not description:
+        description_selectors = [
+            '.product-description p',
+            '.product__description p',
+            '[class*="description"] p',
+            '[class*="panel"] p',
+            '.product-content p'
+        ]
+
+        for selector in description_selectors:
+            elements = soup.select(selector)
+            if elements:
+                desc_parts = []
+                for elem in elements:
+                    text = elem.get_text().strip()
+                    if text and len(text) > 10:
+                        desc_parts.append(text)
+                if desc_parts:
+                    description = " ".join(desc_parts)
+                    break
+
+    # If still no description, look for any substantial paragraph text
+    if not description:
+        all_paragraphs = soup.find_all('p')
+        substantial_paragraphs = []
+
+        for p in all_paragraphs:
+            text = p.get_text().strip()
+            # Look for product-related content (longer paragraphs with product keywords)
+            if (len(text) > 50 and
+                any(keyword in text.lower() for keyword in ['short', 'fabric', 'stretch', 'comfort', 'fit', 'feature', 'elastic', 'pocket'])):
+                substantial_paragraphs.append(text)
+
+        if substantial_paragraphs:
+            description = " ".join(substantial_paragraphs[:3])  # Take first 3 relevant paragraphs
+
+    if not description:
+        description = "No product description found"
+
+    return description
+
+def fetch_fixtures(count, fixtures_dir=FIXTURES_DIR, metadata_path=METADATA_PATH):
+    """Save up to count distinct product pages listed in metadata.json as fixtures"""
+    os.makedirs(fixtures_dir, exist_ok=True)
+    with open(metadata_path, "r", encoding="utf-8") as f:
+        urls = list(dict.fromkeys(item["url"] for item in json.load(f)))
+
+    for url in urls[:count]:
+        slug = url.split("/products/")[-1]
+        try:
+            response = http_client.get_html(url)
+            response.raise_for_status()
+        except Exception as e:
+            print(f"❌ Failed to fetch {url}: {e}")
+            continue
+        with open(os.path.join(fixtures_dir, f"{slug}.html"), "w", encoding="utf-8") as f:
+            f.write(response.text)
+        print(f"💾 Saved fixture: {slug}.html")
+
+def measure(extract, pages, repeats):
+    """Return (cpu seconds per page, peak traced bytes, results) for one extractor"""
+    results = [extract(html) for html in pages]  # warm-up, and the outputs to compare
+
+    started = time.process_time()
+    for _ in range(repeats):
+        for html in pages:
+            extract(html)
+    cpu_per_page = (time.process_time() - started) / (repeats * len(pages))
+
+    peak = 0
+    for html in pages:
+        tracemalloc.start()
+        extract(html)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    return cpu_per_page, peak, results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", default=FIXTURES_DIR, help="Directory of saved product pages (*.html)")
+    parser.add_argument("--fetch", type=int, default=0, help="Save this many product pages as fixtures first")
+    parser.add_argument("--repeats", type=int, default=5, help="Timed passes over the fixtures")
+    args = parser.parse_args()
+
+    if args.fetch:
+        fetch_fixtures(args.fetch, args.fixtures)
+
+    paths = sorted(glob.glob(os.path.join(args.fixtures, "*.html")))
+    if not paths:
+        print(f"No fixtures in {args.fixtures}; run with --fetch N first.")
+        return
+
+    pages = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            pages.append(f.read())
+
+    soup_cpu, soup_peak, soup_results = measure(extract_description_soup, pages, args.repeats)
+    fast_cpu, fast_peak, fast_results = measure(extract_description, pages, args.repeats)
+
+    mismatches = [path for path, a, b in zip(paths, soup_results, fast_results) if a != b]
+
+    print(f"📄 {len(pages)} fixtures, {args.repeats} timed passes")
+    print(f"{'extractor':<14}{'CPU ms/page':>14}{'peak MiB':>12}")
+    print(f"{'beautifulsoup':<14}{soup_cpu * 1000:>14.2f}{soup_peak / 2**20:>12.2f}")
+    print(f"{'single-pass':<14}{fast_cpu * 1000:>14.2f}{fast_peak / 2**20:>12.2f}")
+    if fast_cpu:
+        print(f"⚡ {soup_cpu / fast_cpu:.1f}x less CPU, {soup_peak / max(fast_peak, 1):.1f}x less peak memory")
+    if mismatches:
+        print(f"⚠️ {len(mismatches)} fixtures extract differently:")
+        for path in mismatches:
+            print(f"  {os.path.basename(path)}")
+    else:
+        print("✅ Both extractors agree on every fixture")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Chubbies adapter for the ingestion pipeline (Dataset_final/pipeline.py).
+
+Exposes the brand's discovery, description and file-naming steps as plain
+functions so the pipeline can run each of them on its own worker pool.
+"""
+
+from bs4 import BeautifulSoup
+
+from scraper import find_product_cards, pick_products, save_debug_page, scrape_catalog, report_selector_plan
+from scrape_description import scrape_chubbies_product
+from image_downloader import image_filename
+import http_cache
+import metrics
+
+def discover(target):
+    """
+    Fetch one collection page and apply the skip/limit rules.
+
+    Returns:
+        list: Product stubs with 'url' and 'image', in page order; complete
+        records when the collection's products.json answered
+    """
+    records = scrape_catalog(target["url"], target["limit"])
+    if records is not None:
+        return records
+
+    response = http_cache.get_html(target["url"], timeout=30)
+    response.raise_for_status()
+
+    with metrics.timer("parse", metrics.host_of(target["url"])):
+        soup = BeautifulSoup(response.text, 'html.parser')
+        product_cards, _ = find_product_cards(soup, target["url"])
+    if not product_cards:
+        save_debug_page(soup, response.text)
+        return []
+
+    return [
+        {"url": product_url, "image": image_url}
+        for product_url, image_url in pick_products(product_cards, target["limit"], target["url"])
+    ]
+
+def describe(stub):
+    """Complete a stub into a metadata.json record"""
+    if "description" in stub:
+        return stub
+    result = scrape_chubbies_product(stub["url"])
+    return {"url": stub["url"], "image": stub["image"], "description": result["description"]}
+
+def close():
+    report_selector_plan()
@@ -1,42 +1,59 @@
 import os
+import sys
 import json
-import requests
+import argparse
 
-# === CONFIG ===
-METADATA_PATH = r"C:\Users\prerk\OneDrive\Desktop\Prerana\Projects\Alaiy-Skill-Test\Dataset_final\Chubbies\images\metadata.json"
-SAVE_DIR = r"C:\Users\prerk\OneDrive\Desktop\Prerana\Projects\Alaiy-Skill-Test\Dataset_final\Chubbies\images\downloaded_images"
-
-# Ensure the save directory exists
-os.makedirs(SAVE_DIR, exist_ok=True)
-
-# Load metadata
-with open(METADATA_PATH, "r", encoding="utf-8") as f:
-    metadata = json.load(f)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from image_download import download_all, DEFAULT_WORKERS
+from metadata_store import iter_records, jsonl_path_for
+import brands
+import metrics
+import ratelimit
 
-# Simple sequential counter for all products
-product_counter = 1
-
-# Download loop
-for item in metadata:
-    url = item["url"]
-    image_url = item["image"]
+# === CONFIG ===
+METADATA_PATH = brands.metadata_path("chubbies")
+SAVE_DIR = brands.downloads_dir("chubbies")
 
+def image_filename(product_counter, item):
+    """Numbered filename for the product at 1-based position product_counter"""
     # Extract slug from product URL
-    slug = url.split("/products/")[-1]
-
-    filename = f"{product_counter}-{slug}.webp"
-    filepath = os.path.join(SAVE_DIR, filename)
-
-    try:
-        response = requests.get(image_url, timeout=10)
-        response.raise_for_status()
-
-        with open(filepath, "wb") as img_file:
-            img_file.write(response.content)
-
-        print(f"[✓] Saved: {filename}")
-        product_counter += 1
-    except Exception as e:
-        print(f"[✗] Failed to download {image_url} — {e}")
-        # Still increment counter even if download fails to maintain sequence
-        product_counter += 1
+    slug = item["url"].split("/products/")[-1]
+    return f"{product_counter}-{slug}.webp"
+
+def build_jobs(metadata, save_dir):
+    """Pair every image URL with its numbered target path, lazily so metadata can be a stream"""
+    # Simple sequential counter for all products; it advances for every item,
+    # even ones that fail to download, to keep filenames stable between runs
+    for product_counter, item in enumerate(metadata, start=1):
+        yield item["image"], os.path.join(save_dir, image_filename(product_counter, item))
+
+def download_images(metadata_path, save_dir, workers=DEFAULT_WORKERS, verify_size=False, follow=False):
+    """
+    Download every image in metadata_path. A .jsonl path is streamed, and with
+    follow=True images download while the scraper is still appending to it.
+    """
+    # Ensure the save directory exists
+    os.makedirs(save_dir, exist_ok=True)
+
+    # Load metadata
+    if metadata_path.endswith(".jsonl"):
+        metadata = iter_records(metadata_path, follow=follow)
+    else:
+        with open(metadata_path, "r", encoding="utf-8") as f:
+            metadata = json.load(f)
+
+    return download_all(build_jobs(metadata, save_dir), workers=workers, verify_size=verify_size)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Download Chubbies product images listed in metadata.json")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Concurrent downloads")
+    parser.add_argument("--verify-size", action="store_true",
+                        help="Re-check existing files against the server's Content-Length")
+    parser.add_argument("--follow", action="store_true",
+                        help="Stream images/metadata.jsonl while the scraper is still writing it")
+    ratelimit.add_arguments(parser)
+    args = parser.parse_args()
+    ratelimit.configure_from_args(args)
+    metadata_path = jsonl_path_for(METADATA_PATH) if args.follow else METADATA_PATH
+    download_images(metadata_path, SAVE_DIR, args.workers, args.verify_size, args.follow)
+    metrics.export("chubbies_downloader")
@@ -0,0 +1,177 @@
+"""
+Single-pass description extractor for Chubbies product pages.
+
+Evaluates every strategy that scrape_chubbies_product used to run one after
+another against a BeautifulSoup tree, in one walk over the tokenizer events:
+
+    1. <p> text of the first product-accordion__panel that has any
+    2. <p> text under the first matching fallback selector (DESCRIPTION_SELECTORS)
+    3. up to 3 long <p> paragraphs mentioning product keywords
+
+Parsing stops as soon as strategy 1 is settled, because nothing later in the
+page can change the result.
+"""
+
+from html.parser import HTMLParser
+
+NO_DESCRIPTION = "No product description found"
+
+ACCORDION_CLASS = "product-accordion__panel"
+
+# Same order as the old CSS fallbacks; each predicate is tested on an ancestor's
+# (class tokens, raw class attribute) to emulate "<selector> p"
+DESCRIPTION_SELECTORS = [
+    ('.product-description p', lambda tokens, raw: 'product-description' in tokens),
+    ('.product__description p', lambda tokens, raw: 'product__description' in tokens),
+    ('[class*="description"] p', lambda tokens, raw: 'description' in raw),
+    ('[class*="panel"] p', lambda tokens, raw: 'panel' in raw),
+    ('.product-content p', lambda tokens, raw: 'product-content' in tokens),
+]
+
+KEYWORDS = ['short', 'fabric', 'stretch', 'comfort', 'fit', 'feature', 'elastic', 'pocket']
+
+VOID_TAGS = {
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link',
+    'meta', 'param', 'source', 'track', 'wbr',
+}
+
+# Text inside these never counts towards a paragraph's get_text()
+SKIPPED_TEXT_TAGS = {'script', 'style', 'template'}
+
+class _Done(Exception):
+    pass
+
+class _Element:
+    __slots__ = ("tag", "selector_mask", "panel", "text", "seq")
+
+    def __init__(self, tag, selector_mask, panel, seq):
+        self.tag = tag
+        # Bit i set when this element or an ancestor matches DESCRIPTION_SELECTORS[i]
+        self.selector_mask = selector_mask
+        # seq of the outermost accordion panel containing this element, or None
+        self.panel = panel
+        self.text = None
+        self.seq = seq
+
+class ProductPageParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self._stack = []
+        self._seq = 0
+        self._open_paragraphs = []
+        self._skip_depth = 0
+
+        self.accordion_panel = None
+        self.accordion_parts = []
+        self.selector_parts = [[] for _ in DESCRIPTION_SELECTORS]
+        self.keyword_parts = []
+        self.stopped_early = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIPPED_TEXT_TAGS:
+            self._skip_depth += 1
+        if tag in VOID_TAGS:
+            return
+
+        parent = self._stack[-1] if self._stack else None
+        mask = parent.selector_mask if parent else 0
+        panel = parent.panel if parent else None
+
+        raw_class = ""
+        for name, value in attrs:
+            if name == "class" and value:
+                raw_class = value
+                break
+        if raw_class:
+            tokens = raw_class.split()
+            for i, (_, matches) in enumerate(DESCRIPTION_SELECTORS):
+                if not mask & (1 << i) and matches(tokens, raw_class):
+                    mask |= 1 << i
+            if panel is None and tag == 'div' and ACCORDION_CLASS in raw_class:
+                panel = self._seq
+
+        element = _Element(tag, mask, panel, self._seq)
+        self._seq += 1
+        if tag == 'p':
+            element.text = []
+            self._open_paragraphs.append(element)
+        self._stack.append(element)
+
+    def handle_endtag(self, tag):
+        if tag in SKIPPED_TEXT_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+        if tag in VOID_TAGS:
+            return
+        # Unbalanced end tags close everything up to the matching open element, like html.parser trees do
+        for depth in range(len(self._stack) - 1, -1, -1):
+            if self._stack[depth].tag == tag:
+                break
+        else:
+            return
+        while len(self._stack) > depth:
+            self._close(self._stack.pop())
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        for paragraph in self._open_paragraphs:
+            paragraph.text.append(data)
+
+    def _close(self, element):
+        if element.tag == 'p':
+            self._open_paragraphs.remove(element)
+            self._paragraph(element, "".join(element.text).strip())
+
+        # The winning accordion panel just ended: strategy 1 has its answer
+        if self.accordion_panel is not None and element.seq == self.accordion_panel:
+            self.stopped_early = True
+            raise _Done()
+
+    def _paragraph(self, element, text):
+        # The selectors are "<ancestor> p", so the paragraph's own class doesn't count
+        parent = self._stack[-1] if self._stack else None
+        parent_mask = parent.selector_mask if parent else 0
+        parent_panel = parent.panel if parent else None
+
+        if len(text) > 10:
+            if parent_panel is not None and self.accordion_panel in (None, parent_panel):
+                self.accordion_panel = parent_panel
+                self.accordion_parts.append((element.seq, text))
+            for i in range(len(DESCRIPTION_SELECTORS)):
+                if parent_mask & (1 << i):
+                    self.selector_parts[i].append((element.seq, text))
+
+        if len(self.keyword_parts) < 3 and len(text) > 50:
+            lowered = text.lower()
+            if any(keyword in lowered for keyword in KEYWORDS):
+                self.keyword_parts.append((element.seq, text))
+
+    def parse(self, html):
+        try:
+            self.feed(html)
+            self.close()
+            # Elements still open at the end of the document close there
+            while self._stack:
+                self._close(self._stack.pop())
+        except _Done:
+            pass
+        return self
+
+    def description(self):
+        """Pick the highest-priority strategy that produced text"""
+        if self.accordion_parts:
+            return _join(self.accordion_parts)
+        for parts in self.selector_parts:
+            if parts:
+                return _join(parts)
+        if self.keyword_parts:
+            return _join(self.keyword_parts)
+        return NO_DESCRIPTION
+
+def _join(parts):
+    # Paragraphs are recorded as they close; document order is by opening tag
+    return " ".join(text for _, text in sorted(parts))
+
+def extract_description(html):
+    """Return the product description from a Chubbies product page's HTML"""
+    return ProductPageParser().parse(html).description()
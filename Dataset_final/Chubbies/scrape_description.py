@@ -1,8 +1,15 @@
+import os
+import sys
 import requests
 from bs4 import BeautifulSoup
 import re
 import json
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import http_cache
+import metrics
+from product_parser import extract_description
+
 def scrape_chubbies_product(url):
     """
     Scrape Chubbies Shorts product page for features
@@ -14,75 +21,12 @@ def scrape_chubbies_product(url):
         dict: Contains description with features
     """
     
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
-    
     try:
-        response = requests.get(url, headers=headers)
+        response = http_cache.get_html(url)
         response.raise_for_status()
         
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Extract description from product accordion panel
-        description = ""
-        
-        # Look for the specific product accordion panel div
-        accordion_panels = soup.find_all('div', class_=lambda x: x and 'product-accordion__panel' in x)
-        
-        for panel in accordion_panels:
-            # Get all paragraph tags within this panel
-            paragraphs = panel.find_all('p')
-            panel_text = []
-            
-            for p in paragraphs:
-                text = p.get_text().strip()
-                if text and len(text) > 10:  # Only include substantial text
-                    panel_text.append(text)
-            
-            if panel_text:
-                description = " ".join(panel_text)
-                break  # Use the first panel with content
-        
-        # Fallback: Look for other common description containers
-        if not description:
-            description_selectors = [
-                '.product-description p',
-                '.product__description p',
-                '[class*="description"] p',
-                '[class*="panel"] p',
-                '.product-content p'
-            ]
-            
-            for selector in description_selectors:
-                elements = soup.select(selector)
-                if elements:
-                    desc_parts = []
-                    for elem in elements:
-                        text = elem.get_text().strip()
-                        if text and len(text) > 10:
-                            desc_parts.append(text)
-                    if desc_parts:
-                        description = " ".join(desc_parts)
-                        break
-        
-        # If still no description, look for any substantial paragraph text
-        if not description:
-            all_paragraphs = soup.find_all('p')
-            substantial_paragraphs = []
-            
-            for p in all_paragraphs:
-                text = p.get_text().strip()
-                # Look for product-related content (longer paragraphs with product keywords)
-                if (len(text) > 50 and 
-                    any(keyword in text.lower() for keyword in ['short', 'fabric', 'stretch', 'comfort', 'fit', 'feature', 'elastic', 'pocket'])):
-                    substantial_paragraphs.append(text)
-            
-            if substantial_paragraphs:
-                description = " ".join(substantial_paragraphs[:3])  # Take first 3 relevant paragraphs
-        
-        if not description:
-            description = "No product description found"
+        with metrics.timer("parse", metrics.host_of(url)):
+            description = extract_description(response.text)
         
         return {
             'description': description,
@@ -104,11 +48,7 @@ def debug_description_search(url):
     """
     Debug function to show description extraction process
     """
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
-    
-    response = requests.get(url, headers=headers)
+    response = http_cache.get_html(url)
     soup = BeautifulSoup(response.content, 'html.parser')
     
     print("Product accordion panels found:")
@@ -6,230 +6,451 @@ Scrapes product URLs and image URLs from multiple collection pages
 
 import requests
 from bs4 import BeautifulSoup
+import argparse
+import asyncio
 import json
 import csv
 import time
+import sys
+from urllib.parse import urlparse
 from scrape_description import scrape_chubbies_product
+from shopify_catalog import scrape_collection_catalog, CatalogUnavailable
 import os
 
-def scrape_chubbies_collection(url, target_count):
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import http_client
+import http_cache
+import metrics
+import ratelimit
+import selector_plan
+from metadata_store import MetadataStore, OrderedWriter, export_json
+from brands import BRANDS
+
+BASE_URL = "https://www.chubbiesshorts.com"
+
+# Collection URLs and their target product counts (see Dataset_final/brands.py)
+URL_TARGETS = [(target["url"], target["limit"]) for target in BRANDS["chubbies"]["targets"]]
+
+# Number of leading product cards on every collection page that are not saved
+SKIP_FIRST = 6
+
+# Products are appended to JSON_PATH's .jsonl sibling as they are scraped and exported at the end
+JSON_PATH = "images/metadata.json"
+JSONL_PATH = "images/metadata.jsonl"
+
+# Default number of in-flight requests allowed per host in async crawl mode
+DEFAULT_MAX_PER_HOST = 8
+
+def find_product_cards(soup, url=""):
+    """
+    Try multiple selectors to find product cards on a collection page.
+    The selector that last worked for this site and page template is tried first.
+
+    Returns:
+        tuple: (list of card elements, selector that matched or None)
+    """
+    selectors_to_try = [
+        'div._header_k20bi_1',
+        'div[class*="product"]',
+        'div[class*="card"]',
+        'a[href*="/products/"]',
+        'div[class*="item"]'
+    ]
+
+    product_cards, selector = selector_plan.get_plan().run(
+        selector_plan.plan_key(url, "cards"),
+        [(selector, lambda selector=selector: soup.select(selector)) for selector in selectors_to_try],
+    )
+    return product_cards or [], selector
+
+def absolute_url(href):
+    """Make a product or image href from a collection page absolute"""
+    if href.startswith('//'):
+        return f"https:{href}"
+    if href.startswith('/'):
+        return f"{BASE_URL}{href}"
+    if href.startswith('http'):
+        return href
+    return f"{BASE_URL}/{href}"
+
+def extract_card_link(card, url=""):
+    """
+    Extract the product URL and image URL from a single product card.
+
+    Returns:
+        tuple: (product_url, image_url, problem) where problem is a short
+        message describing why the card was unusable, or None on success
+    """
+    # Try to find anchor tag with different approaches, the one that worked last time first:
+    # the image wrapper's class, any anchor with href containing /products/
+    anchor_tag, _ = selector_plan.get_plan().run(selector_plan.plan_key(url, "anchor"), [
+        ("image_wrapper", lambda: card.find('a', class_="_imageWrapper_k20bi_22")),
+        ("product_href", lambda: card.find('a', href=lambda x: x and '/products/' in x)),
+    ])
+    if not anchor_tag:
+        # Last resort, never learned as the plan: the first anchor may be a swatch or review link
+        anchor_tag = card.find('a')
+
+    if not anchor_tag:
+        return None, None, "No anchor tag found"
+
+    # Get the product URL
+    product_href = anchor_tag.get('href')
+    if not product_href:
+        return None, None, "No href found"
+    product_url = absolute_url(product_href)
+
+    # Get the image URL
+    img_tag = anchor_tag.find('img')
+    image_url = None
+    if img_tag:
+        image_url = img_tag.get('src') or img_tag.get('data-src')
+        # Handle relative image URLs
+        if image_url:
+            image_url = absolute_url(image_url)
+
+    if not (product_url and image_url):
+        return None, None, "Missing URL or image"
+
+    image_url = image_url.replace("width=100&height=133", "width=800&height=1067")
+    return product_url, image_url, None
+
+def pick_products(product_cards, target_count, url=""):
+    """
+    Apply the "skip first 6" and target_count rules to a page's cards.
+
+    Returns:
+        list: (product_url, image_url) pairs, in page order
+    """
+    picks = []
+    product_counter = 0
+    for card in product_cards:
+        if len(picks) >= target_count:
+            break
+        try:
+            product_url, image_url, problem = extract_card_link(card, url)
+        except Exception as e:
+            print(f"Error processing product card on {url}: {e}")
+            continue
+        if problem:
+            continue
+        product_counter += 1
+        if product_counter > SKIP_FIRST:
+            picks.append((product_url, image_url))
+    return picks
+
+def save_debug_page(soup, html):
+    """Report a page with no recognisable product cards and dump it for inspection"""
+    print("No product cards found with any selector. Page structure might have changed.")
+    # Let's see what's actually on the page
+    print(f"Page title: {soup.title.string if soup.title else 'No title'}")
+    # Save the HTML for debugging
+    with open('debug_page.html', 'w', encoding='utf-8') as f:
+        f.write(html)
+    print("Saved page HTML to debug_page.html for inspection")
+
+def report_selector_plan():
+    """Persist the selector plan and print how often its winners held up"""
+    plan = selector_plan.get_plan()
+    plan.save()
+    report = plan.report()
+    if report:
+        print(report)
+
+def scrape_catalog(url, target_count):
+    """
+    Products for a collection from the Shopify products.json listing.
+
+    Returns:
+        list: Records like the HTML path's, or None if the HTML path must be used
+    """
+    try:
+        records = scrape_collection_catalog(url, target_count, SKIP_FIRST)
+    except CatalogUnavailable as e:
+        print(f"↪️ Catalog unavailable, scraping HTML instead ({e})")
+        return None
+    print(f"🛍️ {len(records)}/{target_count} products from the catalog for {url}")
+    return records
+
+def scrape_chubbies_collection(url, target_count, store=None, use_catalog=True):
     """
     Scrapes product URLs and image URLs from the given Chubbie Shorts collection URL.
 
     Args:
         url (str): The URL of the Chubbie Shorts collection page.
         target_count (int): Number of products to scrape (after skipping first 6)
+        store (MetadataStore): If given, each product is appended as soon as it is scraped
+        use_catalog (bool): Try the Shopify products.json listing before the HTML page
 
     Returns:
         list: A list of dictionaries, where each dictionary contains 'url' and 'image' for a product.
     """
-    # Set up headers to mimic a real browser
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-        'Accept-Language': 'en-US,en;q=0.5',
-        'Accept-Encoding': 'gzip, deflate',
-        'Connection': 'keep-alive',
-        'Upgrade-Insecure-Requests': '1',
-    }
-    
+    if use_catalog:
+        records = scrape_catalog(url, target_count)
+        if records is not None:
+            if store is not None:
+                for record in records:
+                    store.append(record)
+            return records
+
     try:
         print(f"Fetching URL: {url}")
-        response = requests.get(url, headers=headers, timeout=30)
+        response = http_cache.get_html(url, timeout=30)
         response.raise_for_status()  # Raise an exception for bad status codes (4xx or 5xx)
         print(f"Successfully fetched page (Status: {response.status_code})")
     except requests.exceptions.RequestException as e:
         print(f"Error fetching the URL: {e}")
         return []
 
-    soup = BeautifulSoup(response.text, 'html.parser')
-    
-    # Try multiple selectors to find product cards
-    product_cards = []
-    selectors_to_try = [
-        'div._header_k20bi_1',
-        'div[class*="product"]',
-        'div[class*="card"]',
-        'a[href*="/products/"]',
-        'div[class*="item"]'
-    ]
-    
-    for selector in selectors_to_try:
-        product_cards = soup.select(selector)
-        if product_cards:
-            print(f"Found {len(product_cards)} product cards using selector: {selector}")
-            break
-    
+    with metrics.timer("parse", urlparse(url).netloc):
+        soup = BeautifulSoup(response.text, 'html.parser')
+        product_cards, selector = find_product_cards(soup, url)
     if not product_cards:
-        print("No product cards found with any selector. Page structure might have changed.")
-        # Let's see what's actually on the page
-        print(f"Page title: {soup.title.string if soup.title else 'No title'}")
-        # Save the HTML for debugging
-        with open('debug_page.html', 'w', encoding='utf-8') as f:
-            f.write(response.text)
-        print("Saved page HTML to debug_page.html for inspection")
+        save_debug_page(soup, response.text)
         return []
-    
+    print(f"Found {len(product_cards)} product cards using selector: {selector}")
+
     scraped_data = []
     product_counter = 0  # Counter to track processed products
     saved_count = 0  # Counter for products actually saved
-    
+
     for i, card in enumerate(product_cards, 1):
         # Stop if we've reached our target count
         if saved_count >= target_count:
             break
-            
+
         try:
-            # Try to find anchor tag with different approaches
-            anchor_tag = None
-            
-            # Method 1: Look for specific class
-            anchor_tag = card.find('a', class_="_imageWrapper_k20bi_22")
-            
-            # Method 2: If not found, look for any anchor with href containing /products/
-            if not anchor_tag:
-                anchor_tag = card.find('a', href=lambda x: x and '/products/' in x)
-            
-            # Method 3: If still not found, look for any anchor tag
-            if not anchor_tag:
-                anchor_tag = card.find('a')
-            
-            if anchor_tag:
-                # Get the product URL
-                product_href = anchor_tag.get('href')
-                if product_href:
-                    # Ensure the product URL is absolute
-                    if product_href.startswith('/'):
-                        product_url = f"https://www.chubbiesshorts.com{product_href}"
-                    elif product_href.startswith('http'):
-                        product_url = product_href
-                    else:
-                        product_url = f"https://www.chubbiesshorts.com/{product_href}"
-
-                    # Get the image URL
-                    img_tag = anchor_tag.find('img')
-                    image_url = None
-                    if img_tag:
-                        image_url = img_tag.get('src') or img_tag.get('data-src')
-                        # Handle relative image URLs
-                        if image_url:
-                            if image_url.startswith('//'):
-                                image_url = f"https:{image_url}"
-                            elif image_url.startswith('/'):
-                                image_url = f"https://www.chubbiesshorts.com{image_url}"
-                            elif not image_url.startswith('http'):
-                                image_url = f"https://www.chubbiesshorts.com/{image_url}"
-
-                    if product_url and image_url:
-                        description = scrape_chubbies_product(product_url)["description"]
-                        image_url = image_url.replace("width=100&height=133", "width=800&height=1067")
-                        
-                        product_counter += 1
-                        
-                        # Skip saving the first 6 products
-                        if product_counter > 6:
-                            scraped_data.append({
-                                "url": product_url,
-                                "image": image_url,
-                                "description": description
-                            })
-                            saved_count += 1
-                            print(f"Product {i} (saved #{saved_count}/{target_count}): {product_url}")
-                        else:
-                            print(f"Product {i} (skipped #{product_counter}): {product_url}")
-                    else:
-                        print(f"Product {i}: Missing URL or image")
-                else:
-                    print(f"Product {i}: No href found")
+            product_url, image_url, problem = extract_card_link(card, url)
+            if problem:
+                print(f"Product {i}: {problem}")
+                continue
+
+            description = scrape_chubbies_product(product_url)["description"]
+
+            product_counter += 1
+
+            # Skip saving the first 6 products
+            if product_counter > SKIP_FIRST:
+                record = {
+                    "url": product_url,
+                    "image": image_url,
+                    "description": description
+                }
+                scraped_data.append(record)
+                if store is not None:
+                    store.append(record)
+                saved_count += 1
+                print(f"Product {i} (saved #{saved_count}/{target_count}): {product_url}")
             else:
-                print(f"Product {i}: No anchor tag found")
-                
+                print(f"Product {i} (skipped #{product_counter}): {product_url}")
+
         except Exception as e:
             print(f"Error processing product {i}: {e}")
             continue
 
     return scraped_data
 
-def save_to_json(data, filename="images/metadata.json"):
-    """Save scraped data to JSON file"""
+class HostLimiter:
+    """Bounds the number of in-flight requests per host for the async crawl"""
+
+    def __init__(self, max_per_host=DEFAULT_MAX_PER_HOST):
+        self.max_per_host = max_per_host
+        self._semaphores = {}
+
+    def for_url(self, url):
+        host = urlparse(url).netloc
+        if host not in self._semaphores:
+            self._semaphores[host] = asyncio.Semaphore(self.max_per_host)
+        return self._semaphores[host]
+
+    async def run(self, url, func, *args):
+        """Run a blocking fetch for url in a worker thread once its host has a free slot"""
+        async with self.for_url(url):
+            return await asyncio.to_thread(func, *args)
+
+def fetch_collection_page(url):
+    response = http_cache.get_html(url, timeout=30)
+    response.raise_for_status()
+    return response.text
+
+async def scrape_chubbies_collection_async(url, target_count, limiter, writer=None, group=None, use_catalog=True):
+    """
+    Async counterpart of scrape_chubbies_collection.
+
+    The collection page is parsed first so the "skip first 6" and target_count
+    rules pick exactly the same products as the sequential scraper; the product
+    detail pages for those picks are then fetched in parallel.
+
+    Args:
+        url (str): The URL of the Chubbie Shorts collection page.
+        target_count (int): Number of products to scrape (after skipping first 6)
+        limiter (HostLimiter): Shared per-host concurrency limit
+        writer (OrderedWriter): If given, each product is appended as soon as it
+            and every product before it (across collections) has been scraped
+        group (int): This collection's position in the writer
+        use_catalog (bool): Try the Shopify products.json listing before the HTML page
+
+    Returns:
+        list: Same records as scrape_chubbies_collection, in page order.
+    """
+    if use_catalog:
+        records = await limiter.run(url, scrape_catalog, url, target_count)
+        if records is not None:
+            if writer is not None:
+                writer.set_group_size(group, len(records))
+                for index, record in enumerate(records):
+                    writer.put(group, index, record)
+            return records
+
     try:
-        # Create images directory if it doesn't exist
-        os.makedirs("images", exist_ok=True)
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
-        print(f"Data saved to {filename}")
+        html = await limiter.run(url, fetch_collection_page, url)
+        print(f"Fetched collection: {url}")
+    except requests.exceptions.RequestException as e:
+        print(f"Error fetching the URL {url}: {e}")
+        if writer is not None:
+            writer.set_group_size(group, 0)
+        return []
+
+    with metrics.timer("parse", urlparse(url).netloc):
+        soup = BeautifulSoup(html, 'html.parser')
+        product_cards, selector = find_product_cards(soup, url)
+    if not product_cards:
+        save_debug_page(soup, html)
+        if writer is not None:
+            writer.set_group_size(group, 0)
+        return []
+
+    picks = pick_products(product_cards, target_count, url)
+
+    print(f"Found {len(product_cards)} product cards using selector: {selector} "
+          f"({len(picks)}/{target_count} picked) on {url}")
+
+    if writer is not None:
+        writer.set_group_size(group, len(picks))
+
+    async def scrape_pick(index, product_url, image_url):
+        result = await limiter.run(product_url, scrape_chubbies_product, product_url)
+        record = {"url": product_url, "image": image_url, "description": result["description"]}
+        if writer is not None:
+            writer.put(group, index, record)
+        return record
+
+    return list(await asyncio.gather(*(
+        scrape_pick(index, product_url, image_url)
+        for index, (product_url, image_url) in enumerate(picks)
+    )))
+
+async def crawl_collections_async(url_targets, max_per_host=DEFAULT_MAX_PER_HOST, store=None, use_catalog=True):
+    """
+    Crawl every collection concurrently.
+
+    Records are appended to store (if given) in the same order the sequential
+    scraper would write them.
+
+    Returns:
+        list: One list of product records per entry in url_targets, in the same order.
+    """
+    limiter = HostLimiter(max_per_host)
+    writer = OrderedWriter(store, len(url_targets)) if store is not None else None
+    return await asyncio.gather(*(
+        scrape_chubbies_collection_async(url, target_count, limiter, writer, group, use_catalog)
+        for group, (url, target_count) in enumerate(url_targets)
+    ))
+
+def save_to_json(jsonl_path=JSONL_PATH, filename=JSON_PATH):
+    """Export the JSONL record store to the metadata.json array"""
+    try:
+        count = export_json(jsonl_path, filename, indent=2)
+        print(f"Data saved to {filename} ({count} records)")
     except Exception as e:
         print(f"Error saving to JSON: {e}")
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Scrape Chubbies collection pages into images/metadata.json")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="Fetch collection and product pages concurrently")
+    parser.add_argument("--max-per-host", type=int, default=DEFAULT_MAX_PER_HOST,
+                        help="Maximum in-flight requests per host in async mode")
+    parser.add_argument("--html-only", action="store_true",
+                        help="Skip the Shopify products.json fast path and scrape the HTML pages")
+    ratelimit.add_arguments(parser)
+    return parser.parse_args()
+
 def main():
     """Main function to run the scraper"""
-    
-    # Define the URLs and their target product counts
-    url_targets = [
-        ("https://www.chubbiesshorts.com/collections/the-casual-shorts", 10),
-        ("https://www.chubbiesshorts.com/collections/the-sport-shorts", 10),
-        ("https://www.chubbiesshorts.com/collections/the-swim-trunks", 10),
-        ("https://www.chubbiesshorts.com/collections/the-sweat-shorts-loungers", 10),
-        ("https://www.chubbiesshorts.com/collections/youth-swim-trunks", 5),
-        ("https://www.chubbiesshorts.com/collections/kids-swim", 3),
-        ("https://www.chubbiesshorts.com/collections/casual-pants", 6),
-        ("https://www.chubbiesshorts.com/collections/the-polos", 5),
-        ("https://www.chubbiesshorts.com/collections/button-ups", 5),
-        ("https://www.chubbiesshorts.com/collections/t-shirts", 4),
-        ("https://www.chubbiesshorts.com/collections/the-outerwear", 3),
-        ("https://www.chubbiesshorts.com/collections/boys-short-sleeve-shirts", 3),
-    ]
-    
+    args = parse_args()
+    # Politeness is a per-host request rate (see ratelimit.py) rather than fixed pauses
+    ratelimit.configure_from_args(args)
+
+    url_targets = URL_TARGETS
+
     print("🚀 Starting Chubbies Multi-Collection Scraper...")
     print("=" * 60)
-    
+
     all_data = []
     total_products = 0
-    
-    for i, (url, target_count) in enumerate(url_targets, 1):
-        print(f"\n📄 Processing Collection {i}/{len(url_targets)}: {url}")
-        print(f"🎯 Target: {target_count} products (after skipping first 6)")
-        print("-" * 60)
-        
-        data = scrape_chubbies_collection(url, target_count)
-        
-        if data:
-            all_data.extend(data)
-            total_products += len(data)
-            print(f"✅ Successfully scraped {len(data)} products from this collection")
+
+    # Every product lands in images/metadata.jsonl as soon as it is scraped, so
+    # a crash keeps the work done so far and downloaders can follow along
+    store = MetadataStore(JSONL_PATH)
+    print(f"📝 Streaming records to {JSONL_PATH}")
+
+    try:
+        if args.use_async:
+            print(f"⚡ Async crawl mode: up to {args.max_per_host} requests in flight per host")
+            http_client.configure(pool_size=max(http_client.DEFAULT_POOL_SIZE, args.max_per_host))
+            started = time.perf_counter()
+            per_collection = asyncio.run(crawl_collections_async(url_targets, args.max_per_host, store, not args.html_only))
+            for (url, target_count), data in zip(url_targets, per_collection):
+                all_data.extend(data)
+                total_products += len(data)
+                print(f"{'✅' if data else '❌'} {len(data)}/{target_count} products from {url}")
+            print(f"⏱️ Crawled {len(url_targets)} collections in {time.perf_counter() - started:.1f}s")
         else:
-            print("❌ No data scraped from this collection")
-        
-        # Add a small delay between requests to be respectful
-        if i < len(url_targets):
-            print("⏳ Waiting 2 seconds before next collection...")
-            time.sleep(2)
+            for i, (url, target_count) in enumerate(url_targets, 1):
+                print(f"\n📄 Processing Collection {i}/{len(url_targets)}: {url}")
+                print(f"🎯 Target: {target_count} products (after skipping first 6)")
+                print("-" * 60)
+
+                data = scrape_chubbies_collection(url, target_count, store, not args.html_only)
+
+                if data:
+                    all_data.extend(data)
+                    total_products += len(data)
+                    print(f"✅ Successfully scraped {len(data)} products from this collection")
+                else:
+                    print("❌ No data scraped from this collection")
+    finally:
+        store.close()
+        report_selector_plan()
+        metrics.export("chubbies_scraper")
 
     if all_data:
         print(f"\n🎉 Successfully scraped {total_products} products total from all collections!")
         print("=" * 60)
-        
+
         # Save data to files
-        save_to_json(all_data)
-        
+        save_to_json()
+        print(f"🗄️ HTTP cache: {http_cache.get_cache().stats()}")
+
         # Print summary
         print("\n📋 Summary of scraped data:")
         for i, (url, target_count) in enumerate(url_targets, 1):
             actual_count = len([item for item in all_data if any(url_part in item['url'] for url_part in url.split('/')[-2:])])
             print(f"Collection {i}: {actual_count}/{target_count} products")
-        
+
         # Print first few results as preview
         print("\n📋 Preview of scraped data:")
         for i, item in enumerate(all_data[:5], 1):
             print(f"\nProduct {i}:")
             print(f"  URL: {item['url']}")
             print(f"  Image: {item['image']}")
-        
+
         if len(all_data) > 5:
             print(f"\n... and {len(all_data) - 5} more products")
-            
+
     else:
         print("❌ No data scraped from any collection. Check the debug_page.html file for page structure.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
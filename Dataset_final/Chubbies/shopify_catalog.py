@@ -0,0 +1,136 @@
+"""
+Shopify catalog fast path for Chubbies collections.
+
+chubbiesshorts.com is a Shopify storefront, so every collection also serves
+its products as JSON at /collections/<handle>/products.json. One request
+returns up to 250 products with their description HTML and every product
+image, instead of one collection page plus one page per product.
+
+Records match the HTML scraper's ('url', 'image', 'description'), with the
+image at the same 800x1067 crop, plus 'images': every product image at that
+size.
+"""
+
+import os
+import re
+import sys
+from html.parser import HTMLParser
+from urllib.parse import urlparse, urlencode, urlsplit, urlunsplit, parse_qsl
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import http_cache
+
+# Shopify's maximum page size for products.json
+PAGE_LIMIT = 250
+
+IMAGE_WIDTH = 800
+IMAGE_HEIGHT = 1067
+
+CATALOG_HEADERS = {
+    'Accept': 'application/json',
+}
+
+class CatalogUnavailable(Exception):
+    """The collection has no usable products.json (not Shopify, blocked, or changed)"""
+
+class _TextParser(HTMLParser):
+    """Paragraph text of a body_html fragment"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+
+    def handle_data(self, data):
+        self.parts.append(data)
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ('p', 'br', 'li', 'div'):
+            self.parts.append(" ")
+
+def html_to_text(body_html):
+    parser = _TextParser()
+    parser.feed(body_html or "")
+    parser.close()
+    return re.sub(r"\s+", " ", "".join(parser.parts)).strip()
+
+def catalog_url(collection_url, page, limit=PAGE_LIMIT):
+    """https://host/collections/<handle> -> https://host/collections/<handle>/products.json?limit=..&page=.."""
+    parts = urlsplit(collection_url)
+    path = parts.path.rstrip("/") + "/products.json"
+    return urlunsplit((parts.scheme, parts.netloc, path, urlencode({"limit": limit, "page": page}), ""))
+
+def sized_image_url(src, width=IMAGE_WIDTH, height=IMAGE_HEIGHT):
+    """Ask the Shopify CDN for the same center crop the HTML path rewrote thumbnails to"""
+    if src.startswith("//"):
+        src = f"https:{src}"
+    parts = urlsplit(src)
+    query = [(k, v) for k, v in parse_qsl(parts.query) if k not in ("width", "height", "crop")]
+    query += [("width", width), ("height", height), ("crop", "center")]
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ""))
+
+def product_record(product, base_url):
+    """Record for one products.json entry, or None if it lacks a handle"""
+    if not isinstance(product, dict) or not product.get("handle"):
+        return None
+    images = [
+        sized_image_url(image["src"])
+        for image in sorted((image for image in product.get("images") or [] if isinstance(image, dict) and image.get("src")),
+                            key=lambda i: i.get("position") or 0)
+    ]
+    description = html_to_text(product.get("body_html"))
+    return {
+        "url": f"{base_url}/products/{product['handle']}",
+        "image": images[0] if images else None,
+        "description": description or "No product description found",
+        "images": images,
+    }
+
+def iter_products(collection_url, limit=PAGE_LIMIT):
+    """Yield the collection's raw products in listing order, a page at a time"""
+    page = 1
+    while True:
+        url = catalog_url(collection_url, page, limit)
+        try:
+            response = http_cache.get(url, headers=CATALOG_HEADERS, timeout=30)
+        except requests.RequestException as e:
+            raise CatalogUnavailable(f"{url}: {e}") from e
+        if response.status_code != 200:
+            raise CatalogUnavailable(f"{url}: HTTP {response.status_code}")
+        try:
+            products = response.json()["products"]
+        except (ValueError, KeyError, TypeError) as e:
+            raise CatalogUnavailable(f"{url}: not a products.json response") from e
+        if not isinstance(products, list):
+            raise CatalogUnavailable(f"{url}: not a products.json response")
+
+        yield from products
+        if len(products) < limit:
+            return
+        page += 1
+
+def scrape_collection_catalog(collection_url, target_count, skip_first=0):
+    """
+    Product records for a collection from products.json, applying the same
+    skip_first / target_count rules as the HTML scraper.
+
+    Raises:
+        CatalogUnavailable: when the HTML path should be used instead
+    """
+    parsed = urlparse(collection_url)
+    base_url = f"{parsed.scheme}://{parsed.netloc}"
+    wanted = skip_first + target_count
+    records = []
+    seen = 0
+    for product in iter_products(collection_url, min(PAGE_LIMIT, max(wanted, 1))):
+        seen += 1
+        record = product_record(product, base_url)
+        # Like cards without an image link, incomplete products and products without images don't count
+        if record and record["image"]:
+            records.append(record)
+            if len(records) >= wanted:
+                break
+    if not seen:
+        raise CatalogUnavailable(f"{collection_url}: products.json is empty")
+    return records[skip_first:wanted]
@@ -0,0 +1,485 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark of the scrapers and downloaders against a local replay server.
+
+Starts an HTTP server on 127.0.0.1 that answers the URL shapes the scrapers
+use (Chubbies /collections/ and /products/ pages and the collection
+products.json catalog, ANF /p/ pages with og:* tags, and CDN images) from
+fixtures, with configurable latency, jitter and
+injected errors. Each scenario then runs the real scraping code end to end in
+a fresh process against that server and reports pages/sec, p50/p95/p99
+request latency, bytes transferred and peak RSS. Results are written as JSON
+so runs can be compared.
+
+Fixtures are synthesised unless --fixtures points at a directory of recorded
+pages (see --record): collection.html, catalog.json, product.html,
+anf_product.html and image.webp / image.jpg. Live hostnames in recorded pages are rewritten to the
+replay server.
+
+    python bench_scrapers.py --record                         # save live fixtures once
+    python bench_scrapers.py --latency 0.08 --jitter 0.03 --error-rate 0.02
+    python bench_scrapers.py --baseline bench_results/scrapers-20250101-120000.json
+"""
+
+import argparse
+import contextlib
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing import get_context
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import brands
+
+DATASET_ROOT = brands.DATASET_ROOT
+FIXTURES_DIR = os.path.join(DATASET_ROOT, "bench_fixtures")
+RESULTS_DIR = os.path.join(DATASET_ROOT, "bench_results")
+
+SCENARIOS = ("chubbies_sequential", "chubbies_async", "chubbies_catalog", "anf_http", "images")
+
+# Live origins in recorded fixtures that are pointed at the replay server instead
+LIVE_ORIGINS = (
+    "www.chubbiesshorts.com",
+    "cdn.shopify.com",
+    "www.abercrombie.com",
+    "img.abercrombie.com",
+)
+
+DEFAULT_COLLECTIONS = 12
+DEFAULT_CARDS = 40
+DEFAULT_LIMIT = 10
+DEFAULT_PRODUCTS = 100
+DEFAULT_IMAGES = 100
+DEFAULT_IMAGE_KB = 150
+DEFAULT_HTTP_WORKERS = 8
+
+# --- Fixtures ----------------------------------------------------------------
+
+def synthetic_collection(origin, cards):
+    items = "".join(
+        f'<div class="product-card"><a href="/products/item-{n}">'
+        f'<img src="{origin}/files/item-{n}.webp?v=1&width=100&height=133"></a>'
+        f'<span>Item {n}</span></div>'
+        for n in range(cards)
+    )
+    return f"<html><head><title>Collection</title></head><body><main>{items}</main></body></html>"
+
+def synthetic_catalog(origin, cards):
+    products = [
+        {
+            "handle": f"item-{n}",
+            "body_html": "<p>The original casual short, made from our stretchiest fabric.</p>"
+                         "<p>Machine wash cold with like colors, tumble dry low.</p>",
+            "images": [{"src": f"{origin}/files/item-{n}.webp?v=1", "position": 1}],
+        }
+        for n in range(cards)
+    ]
+    return json.dumps({"products": products})
+
+def synthetic_product():
+    filler = "<p>Free shipping on orders over $75.</p>" * 40
+    panel = (
+        '<div class="product-accordion__panel"><p>The original casual short, made from our '
+        'stretchiest fabric for a comfortable fit and an elastic waistband.</p>'
+        '<p>Machine wash cold with like colors, tumble dry low.</p></div>'
+    )
+    return f"<html><head><title>Product</title></head><body>{filler}{panel}{filler}</body></html>"
+
+def synthetic_anf_product(origin):
+    body = "<div>" + "<span>product grid filler</span>" * 2000 + "</div>"
+    return (
+        "<html><head><title>Product</title>"
+        '<meta property="og:description" content="Relaxed fit tee in our softest cotton-blend fabric.">'
+        f'<meta property="og:image" content="{origin}/is/image/anf/item_prod1?policy=product-medium">'
+        f"</head><body>{body}</body></html>"
+    )
+
+def load_fixtures(fixtures_dir, origin, cards, image_kb):
+    """Recorded fixtures where present (with live hosts rewritten), synthetic ones otherwise"""
+    def recorded(name, mode="r"):
+        path = os.path.join(fixtures_dir, name) if fixtures_dir else None
+        if not path or not os.path.exists(path):
+            return None
+        with open(path, mode, **({} if "b" in mode else {"encoding": "utf-8"})) as f:
+            return f.read()
+
+    def rewrite(html):
+        for host in LIVE_ORIGINS:
+            html = html.replace(f"https://{host}", origin).replace(f"//{host}", origin)
+        return html
+
+    collection = recorded("collection.html")
+    catalog = recorded("catalog.json")
+    product = recorded("product.html")
+    anf_product = recorded("anf_product.html")
+    image = recorded("image.webp", "rb") or recorded("image.jpg", "rb") or os.urandom(image_kb * 1024)
+
+    return {
+        "collection": (rewrite(collection) if collection else synthetic_collection(origin, cards)).encode("utf-8"),
+        "catalog": (rewrite(catalog) if catalog else synthetic_catalog(origin, cards)).encode("utf-8"),
+        "product": (rewrite(product) if product else synthetic_product()).encode("utf-8"),
+        "anf_product": (rewrite(anf_product) if anf_product else synthetic_anf_product(origin)).encode("utf-8"),
+        "image": image,
+    }
+
+def record_fixtures(fixtures_dir=FIXTURES_DIR):
+    """Save one live page of each shape (and one image) as replay fixtures"""
+    import http_client
+    from metadata_store import load_records
+
+    os.makedirs(fixtures_dir, exist_ok=True)
+    chubbies = load_records(brands.metadata_path("chubbies"))
+    anf = load_records(brands.metadata_path("anf"))
+    collection_url = brands.BRANDS["chubbies"]["targets"][0]["url"]
+    sources = [
+        ("collection.html", collection_url, http_client.get_html),
+        ("catalog.json", f"{collection_url}/products.json?limit=250&page=1", http_client.get),
+        ("product.html", chubbies[0]["url"], http_client.get_html),
+        ("anf_product.html", anf[0]["url"], http_client.get_html),
+        ("image.webp", chubbies[0]["image"], http_client.get_image),
+    ]
+    for name, url, fetch in sources:
+        try:
+            response = fetch(url)
+            response.raise_for_status()
+        except Exception as e:
+            print(f"❌ Failed to record {name} from {url}: {e}")
+            continue
+        with open(os.path.join(fixtures_dir, name), "wb") as f:
+            f.write(response.content)
+        print(f"💾 Recorded {name} ({len(response.content) / 1024:.0f} KiB) from {url}")
+
+# --- Replay server -----------------------------------------------------------
+
+class ReplayServer(ThreadingHTTPServer):
+    """Serves fixtures by URL shape with injected latency, jitter and errors"""
+
+    daemon_threads = True
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, error_status=503, seed=0,
+                 fixtures_dir=None, cards=DEFAULT_CARDS, image_kb=DEFAULT_IMAGE_KB):
+        super().__init__(("127.0.0.1", 0), ReplayHandler)
+        self.origin = f"http://127.0.0.1:{self.server_address[1]}"
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.fixtures = load_fixtures(fixtures_dir, self.origin, cards, image_kb)
+        self.bytes_sent = 0
+        self.requests = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def fixture_for(self, path):
+        if "/products.json" in path:
+            return "catalog", "application/json"
+        if "/collections/" in path:
+            return "collection", "text/html; charset=utf-8"
+        if "/products/" in path:
+            return "product", "text/html; charset=utf-8"
+        if "/is/image/" in path or "/files/" in path:
+            return "image", "image/webp"
+        if "/p/" in path:
+            return "anf_product", "text/html; charset=utf-8"
+        return None, None
+
+    def draw(self):
+        """(delay, fail) for one request"""
+        with self._lock:
+            delay = max(0.0, self._random.gauss(self.latency, self.jitter)) if self.jitter else self.latency
+            fail = self._random.random() < self.error_rate
+        return delay, fail
+
+    def count(self, sent, failed):
+        with self._lock:
+            self.requests += 1
+            self.bytes_sent += sent
+            self.errors += failed
+
+    def reset_counters(self):
+        with self._lock:
+            self.bytes_sent = self.requests = self.errors = 0
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def handle_error(self, request, client_address):
+        # Scenario processes exit with keep-alive connections still open
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out as separate writes; without this, delayed ACKs add ~40 ms per response
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        name, content_type = self.server.fixture_for(self.path)
+        delay, fail = self.server.draw()
+        time.sleep(delay)
+
+        if name is None or fail:
+            status = 404 if name is None else self.server.error_status
+            body = b"not found" if name is None else b"injected error"
+            self.send_response(status)
+            if status in (429, 503):
+                self.send_header("Retry-After", "1")
+            self.send_header("Content-Type", "text/plain")
+        else:
+            body = self.server.fixtures[name]
+            if name == "collection":
+                # Every collection links to its own products, as on the live site
+                handle = self.path.split("/collections/")[1].split("?")[0].strip("/")
+                body = body.replace(b'href="/products/', f'href="/products/{handle}--'.encode("utf-8"))
+            elif name == "catalog":
+                # One page holds the whole fixture; later pages are empty, as past the end of a live collection
+                path, _, query = self.path.partition("?")
+                handle = path.split("/collections/")[1].split("/")[0]
+                if "page=1" in query.split("&"):
+                    body = body.replace(b'"handle": "', f'"handle": "{handle}--'.encode("utf-8"))
+                else:
+                    body = b'{"products": []}'
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.count(len(body), name is not None and fail)
+
+    def log_message(self, format, *args):
+        pass
+
+# --- Scenarios (each runs in its own process) --------------------------------
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+def peak_rss_mib():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # KiB on Linux, bytes on macOS
+    return round(peak / (2**20 if sys.platform == "darwin" else 2**10), 1)
+
+def run_scenario(name, origin, params, verbose=False):
+    """Run one scenario against the replay server; called in a fresh process"""
+    import http_client
+    import ratelimit
+
+    ratelimit.configure(params["rate"], params["burst"], params["max_retries"])
+
+    latencies = []
+    statuses = {}
+    lock = threading.Lock()
+
+    # Every scraper and downloader fetches through http_client.get (configure()
+    # may swap the session, so wrap the function rather than hook the session)
+    untimed_get = http_client.get
+
+    def timed_get(url, headers=None, **kwargs):
+        response = untimed_get(url, headers=headers, **kwargs)
+        with lock:
+            latencies.append(response.elapsed.total_seconds())
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        return response
+
+    http_client.get = timed_get
+
+    with contextlib.ExitStack() as stack:
+        if not verbose:
+            stack.enter_context(contextlib.redirect_stdout(stack.enter_context(open(os.devnull, "w"))))
+        started = time.perf_counter()
+        items = SCENARIO_RUNNERS[name](origin, params)
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "items": items,
+        "requests": len(latencies),
+        "seconds": round(elapsed, 3),
+        "pages_per_sec": round(len(latencies) / elapsed, 2) if elapsed else None,
+        "latency_ms": {
+            f"p{p}": round(percentile(latencies, p) * 1000, 1) if latencies else None
+            for p in (50, 95, 99)
+        },
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+        "peak_rss_mib": peak_rss_mib(),
+    }
+
+def _chubbies_scraper(origin):
+    sys.path.insert(0, os.path.join(DATASET_ROOT, "Chubbies"))
+    import scraper
+    # Relative product links resolve against the replay server instead of the live site
+    scraper.BASE_URL = origin
+    return scraper
+
+def _collection_targets(origin, params):
+    return [(f"{origin}/collections/bench-{n}", params["limit"]) for n in range(params["collections"])]
+
+def scenario_chubbies_sequential(origin, params):
+    scraper = _chubbies_scraper(origin)
+    return sum(len(scraper.scrape_chubbies_collection(url, limit, use_catalog=False))
+               for url, limit in _collection_targets(origin, params))
+
+def scenario_chubbies_async(origin, params):
+    import asyncio
+    import http_client
+    scraper = _chubbies_scraper(origin)
+    http_client.configure(pool_size=max(http_client.DEFAULT_POOL_SIZE, params["max_per_host"]))
+    per_collection = asyncio.run(scraper.crawl_collections_async(
+        _collection_targets(origin, params), params["max_per_host"], use_catalog=False))
+    return sum(len(data) for data in per_collection)
+
+def scenario_chubbies_catalog(origin, params):
+    scraper = _chubbies_scraper(origin)
+    return sum(len(scraper.scrape_chubbies_collection(url, limit)) for url, limit in _collection_targets(origin, params))
+
+def scenario_anf_http(origin, params):
+    sys.path.insert(0, os.path.join(DATASET_ROOT, "ANF"))
+    from scrape_description import scrape_description_http
+    urls = [f"{origin}/shop/wd/p/bench-item-{n}" for n in range(params["products"])]
+    with ThreadPoolExecutor(max_workers=params["http_workers"]) as pool:
+        return sum(1 for result in pool.map(scrape_description_http, urls) if result)
+
+def scenario_images(origin, params):
+    from image_download import download_all
+    with tempfile.TemporaryDirectory(prefix="bench-images-") as save_dir:
+        jobs = ((f"{origin}/files/item-{n}.webp", os.path.join(save_dir, f"{n}-item.webp")) for n in range(params["images"]))
+        summary = download_all(jobs, workers=params["download_workers"])
+    return summary["downloaded"] + summary["resumed"]
+
+SCENARIO_RUNNERS = {
+    "chubbies_sequential": scenario_chubbies_sequential,
+    "chubbies_async": scenario_chubbies_async,
+    "chubbies_catalog": scenario_chubbies_catalog,
+    "anf_http": scenario_anf_http,
+    "images": scenario_images,
+}
+
+# --- Driver ------------------------------------------------------------------
+
+def run_benchmark(args):
+    server = ReplayServer(args.latency, args.jitter, args.error_rate, args.error_status, args.seed,
+                          args.fixtures, args.cards, args.image_kb).start()
+    params = {
+        "collections": args.collections,
+        "limit": args.limit,
+        "max_per_host": args.max_per_host,
+        "products": args.products,
+        "http_workers": args.http_workers,
+        "images": args.images,
+        "download_workers": args.download_workers,
+        "rate": args.rate,
+        "burst": args.burst,
+        "max_retries": args.max_retries,
+    }
+    results = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": dict(params, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                       error_status=args.error_status, seed=args.seed, fixtures=args.fixtures),
+        "scenarios": {},
+    }
+
+    context = get_context("spawn")
+    for name in args.scenarios:
+        server.reset_counters()
+        # Every scenario starts cold: fresh process, empty HTTP cache
+        with tempfile.TemporaryDirectory(prefix="bench-cache-") as cache_dir:
+            os.environ["HTTP_CACHE_DIR"] = cache_dir
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                result = pool.submit(run_scenario, name, server.origin, params, args.verbose).result()
+        result["bytes"] = server.bytes_sent
+        result["injected_errors"] = server.errors
+        results["scenarios"][name] = result
+        print(f"⏱️ {name:<20} {result['requests']:>5} req  {result['pages_per_sec']:>8} req/s  "
+              f"p50 {result['latency_ms']['p50']} ms  p95 {result['latency_ms']['p95']} ms  "
+              f"p99 {result['latency_ms']['p99']} ms  {result['bytes'] / 1e6:.1f} MB  "
+              f"RSS {result['peak_rss_mib']} MiB  ({result['items']} items)")
+
+    server.shutdown()
+    return results
+
+def compare(results, baseline):
+    """Print per-scenario throughput and tail-latency changes against an earlier run"""
+    print("\n📈 Against baseline:")
+    for name, result in results["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if not before:
+            continue
+        throughput = (result["pages_per_sec"] or 0) / (before["pages_per_sec"] or 1) - 1
+        p95_before = before["latency_ms"]["p95"] or 0
+        p95_after = result["latency_ms"]["p95"] or 0
+        flag = "⚠️" if throughput < -0.1 else "✅"
+        print(f"  {flag} {name:<20} throughput {throughput:+.1%}  p95 {p95_before} → {p95_after} ms")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("scenarios", nargs="*", help=f"Scenarios to run: {', '.join(SCENARIOS)} (default: all)")
+    parser.add_argument("--latency", type=float, default=0.05, help="Mean response delay in seconds")
+    parser.add_argument("--jitter", type=float, default=0.02, help="Standard deviation of the delay in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with --error-status")
+    parser.add_argument("--error-status", type=int, default=503, help="Status code of injected errors")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for latency and error injection")
+    parser.add_argument("--fixtures", default=FIXTURES_DIR if os.path.isdir(FIXTURES_DIR) else None,
+                        help="Directory of recorded fixtures (default: bench_fixtures if present)")
+    parser.add_argument("--record", action="store_true", help="Record live fixtures into bench_fixtures and exit")
+    parser.add_argument("--collections", type=int, default=DEFAULT_COLLECTIONS, help="Chubbies collections to crawl")
+    parser.add_argument("--cards", type=int, default=DEFAULT_CARDS, help="Cards per synthetic collection page")
+    parser.add_argument("--limit", type=int, default=DEFAULT_LIMIT, help="Products taken per collection")
+    parser.add_argument("--max-per-host", type=int, default=8, help="Async Chubbies in-flight limit per host")
+    parser.add_argument("--products", type=int, default=DEFAULT_PRODUCTS, help="ANF product pages to fetch")
+    parser.add_argument("--http-workers", type=int, default=DEFAULT_HTTP_WORKERS, help="Concurrent ANF page fetches")
+    parser.add_argument("--images", type=int, default=DEFAULT_IMAGES, help="Images to download")
+    parser.add_argument("--image-kb", type=int, default=DEFAULT_IMAGE_KB, help="Size of the synthetic image")
+    parser.add_argument("--download-workers", type=int, default=8, help="Concurrent image downloads")
+    # The replay server is one host; keep the per-host limiter out of the way unless asked
+    parser.add_argument("--rate", type=float, default=1000.0, help="Per-host request rate for the scrapers")
+    parser.add_argument("--burst", type=int, default=1000, help="Per-host token bucket size")
+    parser.add_argument("--max-retries", type=int, default=4, help="Retries for injected errors")
+    parser.add_argument("--output", help="Where to write the JSON results (default: bench_results/scrapers-<time>.json)")
+    parser.add_argument("--baseline", help="Earlier results JSON to compare against")
+    parser.add_argument("--verbose", action="store_true", help="Show the scrapers' own output")
+    args = parser.parse_args()
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+    args.scenarios = args.scenarios or list(SCENARIOS)
+    return args
+
+def main():
+    args = parse_args()
+    if args.record:
+        record_fixtures()
+        return
+
+    results = run_benchmark(args)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"scrapers-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"💾 Results saved to {output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            compare(results, json.load(f))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Brand registry for the ingestion pipeline.
+
+Each entry names the brand folder under Dataset_final (which holds the brand's
+scraper modules and its images/ output), the indent its metadata.json has
+always been written with, the LoRA trigger word its captions start with
+(class_tokens in the brand's dataset.toml), the LoRA (and FluxGym dataset)
+name it trains, the listing pages to crawl with how many products to take
+from each, and default worker counts per pipeline stage.
+Adding a brand means adding an entry here plus a brand.py adapter in its folder.
+"""
+
+import os
+
+DATASET_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+BRANDS = {
+    "chubbies": {
+        "folder": "Chubbies",
+        "json_indent": 2,
+        "trigger_word": "chubbies_style",
+        "lora": "chubbiesstylelora",
+        "targets": [
+            {"url": "https://www.chubbiesshorts.com/collections/the-casual-shorts", "limit": 10},
+            {"url": "https://www.chubbiesshorts.com/collections/the-sport-shorts", "limit": 10},
+            {"url": "https://www.chubbiesshorts.com/collections/the-swim-trunks", "limit": 10},
+            {"url": "https://www.chubbiesshorts.com/collections/the-sweat-shorts-loungers", "limit": 10},
+            {"url": "https://www.chubbiesshorts.com/collections/youth-swim-trunks", "limit": 5},
+            {"url": "https://www.chubbiesshorts.com/collections/kids-swim", "limit": 3},
+            {"url": "https://www.chubbiesshorts.com/collections/casual-pants", "limit": 6},
+            {"url": "https://www.chubbiesshorts.com/collections/the-polos", "limit": 5},
+            {"url": "https://www.chubbiesshorts.com/collections/button-ups", "limit": 5},
+            {"url": "https://www.chubbiesshorts.com/collections/t-shirts", "limit": 4},
+            {"url": "https://www.chubbiesshorts.com/collections/the-outerwear", "limit": 3},
+            {"url": "https://www.chubbiesshorts.com/collections/boys-short-sleeve-shirts", "limit": 3},
+        ],
+        "workers": {"discover": 4, "describe": 8, "download": 8},
+    },
+    "anf": {
+        "folder": "ANF",
+        "json_indent": 4,
+        "trigger_word": "abercrombie_style",
+        "lora": "abercrombiestylelora",
+        "targets": [
+            {"url": "https://www.abercrombie.com/shop/wd/womens-dresses-and-jumpsuits", "gender": "womens", "category": "dresses-and-jumpsuits", "limit": 5},
+            {"url": "https://www.abercrombie.com/shop/wd/womens-tops--1", "gender": "womens", "category": "tops", "limit": 15},
+            {"url": "https://www.abercrombie.com/shop/wd/womens-bottoms--1", "gender": "womens", "category": "bottoms", "limit": 10},
+            {"url": "https://www.abercrombie.com/shop/wd/womens-coats-and-jackets", "gender": "womens", "category": "coats-and-jackets", "limit": 5},
+            {"url": "https://www.abercrombie.com/shop/wd/womens-sleep-and-intimates", "gender": "womens", "category": "sleep-and-intimates", "limit": 5},
+            {"url": "https://www.abercrombie.com/shop/wd/womens-shoes", "gender": "womens", "category": "shoes", "limit": 5},
+            {"url": "https://www.abercrombie.com/shop/wd/womens-activewear", "gender": "womens", "category": "activewear", "limit": 5},
+            {"url": "https://www.abercrombie.com/shop/wd/mens-tops--1", "gender": "mens", "category": "tops", "limit": 15},
+            {"url": "https://www.abercrombie.com/shop/wd/mens-bottoms--1", "gender": "mens", "category": "bottoms", "limit": 10},
+            {"url": "https://www.abercrombie.com/shop/wd/mens-coats-and-jackets", "gender": "mens", "category": "coats-and-jackets", "limit": 5},
+            {"url": "https://www.abercrombie.com/shop/wd/mens-suits", "gender": "mens", "category": "suits", "limit": 5},
+            {"url": "https://www.abercrombie.com/shop/wd/mens-activewear", "gender": "mens", "category": "activewear", "limit": 5},
+            {"url": "https://www.abercrombie.com/shop/wd/mens-underwear", "gender": "mens", "category": "underwear", "limit": 2},
+            {"url": "https://www.abercrombie.com/shop/wd/mens-swim", "gender": "mens", "category": "swim", "limit": 3},
+        ],
+        # Discovery drives a real browser per worker, so keep it small
+        "workers": {"discover": 2, "describe": 8, "download": 8},
+    },
+}
+
+def brand_dir(name):
+    return os.path.join(DATASET_ROOT, BRANDS[name]["folder"])
+
+def images_dir(name):
+    return os.path.join(brand_dir(name), "images")
+
+def metadata_path(name):
+    return os.path.join(images_dir(name), "metadata.json")
+
+def downloads_dir(name):
+    return os.path.join(images_dir(name), "downloaded_images")
+
+def training_dir(name):
+    return os.path.join(images_dir(name), "training")
+
+def frontier_path(name):
+    return os.path.join(images_dir(name), "frontier.sqlite3")
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Resumable, sharded crawl of a brand through the SQLite frontier (frontier.py).
+
+Every collection, product and image is a job in images/frontier.sqlite3.
+Worker processes lease jobs from it, run the brand's discover / describe
+steps or download the image, and record the result (and a content hash) with
+the jobs it discovered in the same transaction. Stopping the crawl at any
+point loses at most the jobs in flight; running it again picks up the rest.
+
+Each process runs threads like the pipeline's stages (the brand's discover /
+describe / download worker counts), and --processes spreads one brand over
+several processes, each taking an equal share of the per-host rate limits.
+When nothing is left, metadata.jsonl and metadata.json are written in target
+and page order, and images keep the same numbered filenames as the other
+scripts.
+
+    python crawl.py chubbies --processes 4
+    python crawl.py anf --status
+    python crawl.py chubbies --reset          # forget the frontier and start over
+"""
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+import time
+
+import brands
+import metrics
+import ratelimit
+from frontier import Frontier, owner_id
+from image_download import download_file
+from metadata_store import MetadataStore, export_json, jsonl_path_for
+
+# Seconds an idle worker waits before asking again while other workers still hold jobs
+IDLE_POLL = 0.5
+
+# Which worker count of brands.BRANDS[...]["workers"] bounds each job kind;
+# downstream kinds first so finished work leaves the frontier as early as possible
+KIND_STAGES = (("image", "download"), ("product", "describe"), ("collection", "discover"))
+
+def content_hash(value):
+    return hashlib.sha256(json.dumps(value, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+def file_hash(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def image_jobs(job, record):
+    """The image job for a finished product, numbered by the product's place"""
+    if not record.get("url") or not record.get("image"):
+        return []
+    return [("image", record["image"], job["grp"], job["position"], record)]
+
+def run_collection(name, brand, frontier, job, save_dir):
+    target = job["payload"]
+    try:
+        stubs = brand.discover(target)
+    except Exception as e:
+        status = frontier.fail(job["id"], e)
+        print(f"❌ [{name}] Discovery failed for {job['url']} (attempt {job['attempts']}, now {status}): {e}")
+        return
+    children = [("product", stub["url"], job["grp"], position, stub) for position, stub in enumerate(stubs)]
+    frontier.complete(job["id"], {"products": len(stubs)}, content_hash([stub["url"] for stub in stubs]), children)
+    print(f"🔍 [{name}] {len(stubs)} products from {job['url']}")
+
+def run_product(name, brand, frontier, job, save_dir):
+    stub = job["payload"]
+    try:
+        record = brand.describe(stub)
+    except Exception as e:
+        # Once out of attempts the product is kept without a description, as the pipeline does
+        fallback = dict(stub, description=None)
+        status = frontier.fail(job["id"], e, fallback, image_jobs(job, fallback))
+        print(f"❌ [{name}] Description failed for {job['url']} (attempt {job['attempts']}, now {status}): {e}")
+        return
+    frontier.complete(job["id"], record, content_hash(record), image_jobs(job, record))
+
+def run_image(name, brand, frontier, job, save_dir):
+    record = job["payload"]
+    filename = brand.image_filename(frontier.product_index(job["grp"], job["position"]), record)
+    filepath = os.path.join(save_dir, filename)
+    try:
+        status, written = download_file(job["url"], filepath)
+    except Exception as e:
+        status = frontier.fail(job["id"], e)
+        print(f"❌ [{name}] Failed to download {filename} (attempt {job['attempts']}, now {status}): {e}")
+        return
+    frontier.complete(job["id"], {"file": filename, "status": status, "bytes": written}, file_hash(filepath))
+    if status != "skipped":
+        print(f"✅ [{name}] Saved: {filename} ({written / 1024:.0f} KiB)")
+
+RUNNERS = {"collection": run_collection, "product": run_product, "image": run_image}
+
+def crawl_process(name, shard, workers, limits, share):
+    """One worker process: lease and run jobs on threads until the frontier is empty"""
+    import pipeline
+
+    brand = pipeline.load_brand(name)
+    ratelimit.configure(**limits, share=share)
+    frontier = Frontier(brands.frontier_path(name))
+    save_dir = brands.downloads_dir(name)
+    os.makedirs(save_dir, exist_ok=True)
+
+    def worker(index):
+        owner = owner_id(index)
+        kinds = [kind for kind, stage in KIND_STAGES if index < workers[stage]]
+        try:
+            while True:
+                job = None
+                for kind in kinds:
+                    job = frontier.lease(kind, owner)
+                    if job is not None:
+                        break
+                if job is None:
+                    if not frontier.unfinished():
+                        return
+                    time.sleep(IDLE_POLL)
+                    continue
+                started = time.perf_counter()
+                RUNNERS[job["kind"]](name, brand, frontier, job, save_dir)
+                metrics.observe("crawl_job", time.perf_counter() - started, kind=job["kind"])
+        finally:
+            frontier.close()
+
+    threads = [threading.Thread(target=worker, args=(index,), daemon=True) for index in range(max(workers.values()))]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        brand.close()
+        metrics.export(f"crawl_{name}_{shard}")
+
+def export_metadata(name, frontier):
+    """Write metadata.jsonl / metadata.json from the frontier, in target and page order"""
+    json_path = brands.metadata_path(name)
+    with MetadataStore(jsonl_path_for(json_path)) as store:
+        for record in frontier.records():
+            store.append(record)
+    return export_json(store.path, json_path, indent=brands.BRANDS[name]["json_indent"])
+
+def print_status(name, frontier):
+    print(f"📋 [{name}] {frontier.path}")
+    for kind, counts in frontier.stats().items():
+        summary = ", ".join(f"{count} {status}" for status, count in sorted(counts.items())) or "none"
+        print(f"  {kind:<10} {summary}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("brands", nargs="*", help=f"Brands to crawl: {', '.join(brands.BRANDS)} (default: all)")
+    parser.add_argument("--processes", type=int, default=1,
+                        help="Worker processes per brand (0 = one per CPU core)")
+    for stage in ("discover", "describe", "download"):
+        parser.add_argument(f"--{stage}-workers", type=int, default=None,
+                            help=f"Override the brand's {stage} thread count in each process")
+    parser.add_argument("--status", action="store_true", help="Print the frontier's job counts and exit")
+    parser.add_argument("--reset", action="store_true", help="Forget all crawl state and start from the first target")
+    ratelimit.add_arguments(parser)
+    args = parser.parse_args()
+    unknown = [name for name in args.brands if name not in brands.BRANDS]
+    if unknown:
+        parser.error(f"unknown brand(s): {', '.join(unknown)}")
+    return args
+
+def main():
+    args = parse_args()
+    names = args.brands or list(brands.BRANDS)
+    processes = args.processes or os.cpu_count() or 1
+    limits = {"rate": args.rate, "burst": args.burst, "max_retries": args.max_retries}
+    overrides = {
+        "discover": args.discover_workers,
+        "describe": args.describe_workers,
+        "download": args.download_workers,
+    }
+
+    frontiers = {name: Frontier(brands.frontier_path(name)) for name in names}
+    if args.status:
+        for name, frontier in frontiers.items():
+            print_status(name, frontier)
+        return
+
+    for name, frontier in frontiers.items():
+        if args.reset:
+            frontier.reset()
+        frontier.seed(brands.BRANDS[name]["targets"])
+        released = frontier.reclaim_dead_leases()
+        if released:
+            print(f"♻️ [{name}] Released {released} jobs leased by stopped processes")
+
+    # Brand folders reuse module names, so brand code only runs in spawned processes
+    context = multiprocessing.get_context("spawn")
+    started = time.perf_counter()
+    children = []
+    for name in names:
+        workers = dict(brands.BRANDS[name]["workers"], **{k: v for k, v in overrides.items() if v})
+        print(f"🚀 [{name}] Crawling with {processes} process(es), threads {workers}")
+        for shard in range(processes):
+            process = context.Process(target=crawl_process, args=(name, shard, workers, limits, 1 / processes),
+                                      name=f"{name}-{shard}")
+            process.start()
+            children.append(process)
+    for process in children:
+        process.join()
+        if process.exitcode:
+            print(f"❌ {process.name} exited with code {process.exitcode}")
+
+    for name, frontier in frontiers.items():
+        print_status(name, frontier)
+        unfinished = frontier.unfinished()
+        if unfinished:
+            print(f"⏸️ [{name}] {unfinished} jobs unfinished; run again to resume")
+            continue
+        count = export_metadata(name, frontier)
+        print(f"📊 [{name}] {count} records → {brands.metadata_path(name)}")
+    print(f"⏱️ Crawl took {time.perf_counter() - started:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Perceptual-hash near-duplicate detection for downloaded product images.
+
+Collection pages often show the same garment several times (colourways,
+faceouts), and every extra copy costs training steps. Each image gets a
+64-bit DCT perceptual hash (computed for a whole batch at once with NumPy);
+images whose hashes differ in at most `threshold` bits are grouped into one
+cluster.
+
+Pairs are found with a multi-index hash rather than by comparing every image
+with every other: the 64 bits are split into threshold + 1 chunks, and two
+hashes within the threshold must agree exactly on at least one chunk, so only
+images sharing a chunk value are ever compared.
+
+Hashes are cached per brand in images/phashes.json and only recomputed for
+new or changed files.
+
+    python dedupe.py                   # report clusters across all brands
+    python dedupe.py anf --threshold 4
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import numpy as np
+    from PIL import Image
+except ImportError:  # main() and prepare_dataset report it
+    np = None
+
+import brands
+
+DEFAULT_THRESHOLD = 6
+
+HASH_SIZE = 8       # 8x8 low-frequency DCT coefficients -> 64 bits
+SAMPLE_SIZE = 32    # images are reduced to 32x32 greyscale before the DCT
+DEFAULT_WORKERS = 8
+
+CACHE_NAME = "phashes.json"
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+
+def dct_matrix(n):
+    """Orthonormal DCT-II matrix, so the 2-D transform of X is D @ X @ D.T"""
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    matrix = np.sqrt(2.0 / n) * np.cos(np.pi * (2 * i + 1) * k / (2 * n))
+    matrix[0] /= np.sqrt(2.0)
+    return matrix.astype(np.float32)
+
+def load_sample(path):
+    """Decode one image to a SAMPLE_SIZE x SAMPLE_SIZE greyscale array"""
+    with Image.open(path) as image:
+        image.draft("L", (SAMPLE_SIZE * 4, SAMPLE_SIZE * 4))
+        image = image.convert("L").resize((SAMPLE_SIZE, SAMPLE_SIZE), Image.BILINEAR)
+        return np.asarray(image, dtype=np.float32)
+
+def phash_batch(samples):
+    """
+    Perceptual hashes for a stack of samples.
+
+    Args:
+        samples (ndarray): (n, SAMPLE_SIZE, SAMPLE_SIZE) greyscale images
+
+    Returns:
+        ndarray: (n,) uint64 hashes
+    """
+    dct = dct_matrix(SAMPLE_SIZE)
+    coefficients = (dct @ samples @ dct.T)[:, :HASH_SIZE, :HASH_SIZE].reshape(len(samples), -1)
+    medians = np.median(coefficients[:, 1:], axis=1, keepdims=True)  # DC term would skew the median
+    bits = coefficients > medians
+    return np.packbits(bits, axis=1).view(">u8").ravel().astype(np.uint64)
+
+def phash_files(paths, workers=DEFAULT_WORKERS):
+    """Hash image files; decoding runs on threads since Pillow releases the GIL"""
+    if not paths:
+        return np.zeros(0, dtype=np.uint64)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        samples = np.stack(list(pool.map(load_sample, paths)))
+    return phash_batch(samples)
+
+def popcount(values):
+    """Number of set bits in each element of a uint64 array"""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(values)
+    table = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+    return table[values.view(np.uint8)].reshape(-1, 8).sum(axis=1)
+
+class HashIndex:
+    """Multi-index hash over a fixed array of 64-bit perceptual hashes"""
+
+    def __init__(self, hashes, threshold=DEFAULT_THRESHOLD):
+        self.hashes = np.asarray(hashes, dtype=np.uint64)
+        self.threshold = threshold
+        # threshold + 1 chunks: any pair within the threshold matches one exactly
+        count = threshold + 1
+        edges = np.linspace(0, 64, count + 1).astype(int)
+        self.chunks = [(int(lo), int(hi - lo)) for lo, hi in zip(edges[:-1], edges[1:])]
+
+    def pairs(self):
+        """Yield (i, j) index pairs, i < j, whose hashes differ in at most threshold bits"""
+        seen = set()
+        for shift, width in self.chunks:
+            keys = (self.hashes >> np.uint64(shift)) & np.uint64((1 << width) - 1)
+            order = np.argsort(keys, kind="stable")
+            boundaries = np.flatnonzero(np.diff(keys[order])) + 1
+            for bucket in np.split(order, boundaries):
+                if len(bucket) < 2:
+                    continue
+                bucket = np.sort(bucket)
+                for position in range(len(bucket) - 1):
+                    i = bucket[position]
+                    others = bucket[position + 1:]
+                    distances = popcount(self.hashes[others] ^ self.hashes[i])
+                    for j in others[distances <= self.threshold]:
+                        pair = (int(i), int(j))
+                        if pair not in seen:
+                            seen.add(pair)
+                            yield pair
+
+    def clusters(self):
+        """Groups of indices connected by near-duplicate pairs (singletons included)"""
+        parent = list(range(len(self.hashes)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for i, j in self.pairs():
+            root_i, root_j = find(i), find(j)
+            if root_i != root_j:
+                parent[max(root_i, root_j)] = min(root_i, root_j)
+
+        groups = {}
+        for i in range(len(parent)):
+            groups.setdefault(find(i), []).append(i)
+        return list(groups.values())
+
+def list_images(image_dir):
+    return sorted(
+        (entry for entry in os.scandir(image_dir)
+         if entry.is_file() and os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS),
+        key=lambda entry: entry.name,
+    )
+
+def load_hashes(image_dir, cache_path, workers=DEFAULT_WORKERS):
+    """
+    Hashes for every image in image_dir, reusing cached ones whose file is unchanged.
+
+    Returns:
+        tuple: (paths, uint64 hashes)
+    """
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        cache = {}
+
+    entries = list_images(image_dir)
+    fresh = {}
+    missing = []
+    for entry in entries:
+        stat = entry.stat()
+        cached = cache.get(entry.name)
+        if cached and cached["size"] == stat.st_size and cached["mtime_ns"] == stat.st_mtime_ns:
+            fresh[entry.name] = cached
+        else:
+            missing.append((entry, stat))
+
+    for (entry, stat), value in zip(missing, phash_files([entry.path for entry, _ in missing], workers)):
+        fresh[entry.name] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "phash": f"{int(value):016x}"}
+
+    if missing or len(fresh) != len(cache):
+        tmp_path = cache_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(fresh, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, cache_path)
+
+    paths = [entry.path for entry in entries]
+    hashes = np.array([int(fresh[entry.name]["phash"], 16) for entry in entries], dtype=np.uint64)
+    return paths, hashes
+
+def _sort_key(path):
+    # Largest image first, then earliest in discovery order
+    with Image.open(path) as image:
+        area = image.width * image.height
+    match = re.match(r"(\d+)-", os.path.basename(path))
+    return -area, int(match.group(1)) if match else float("inf"), os.path.basename(path)
+
+def pick_representatives(paths, clusters):
+    """
+    Choose one image per cluster: the largest, ties going to the earliest product.
+
+    Returns:
+        tuple: (kept paths, {dropped path: kept path})
+    """
+    kept = []
+    dropped = {}
+    for cluster in clusters:
+        members = sorted((paths[i] for i in cluster), key=_sort_key)
+        kept.append(members[0])
+        for path in members[1:]:
+            dropped[path] = members[0]
+    return sorted(kept), dropped
+
+def brand_duplicates(name, threshold=DEFAULT_THRESHOLD, workers=DEFAULT_WORKERS):
+    """Map each near-duplicate in a brand's downloaded_images to the image kept in its place"""
+    paths, hashes = load_hashes(brands.downloads_dir(name), os.path.join(brands.images_dir(name), CACHE_NAME), workers)
+    _, dropped = pick_representatives(paths, HashIndex(hashes, threshold).clusters())
+    return dropped
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("brands", nargs="*", help=f"Brands to index: {', '.join(brands.BRANDS)} (default: all)")
+    parser.add_argument("--threshold", type=int, default=DEFAULT_THRESHOLD,
+                        help="Maximum differing hash bits for two images to count as near-duplicates")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Image decoding threads")
+    args = parser.parse_args()
+    unknown = [name for name in args.brands if name not in brands.BRANDS]
+    if unknown:
+        parser.error(f"unknown brand(s): {', '.join(unknown)}")
+    return args
+
+def main():
+    args = parse_args()
+    if np is None:
+        raise SystemExit("❌ NumPy and Pillow are required for duplicate detection: pip install numpy Pillow")
+
+    started = time.perf_counter()
+    paths = []
+    hashes = []
+    for name in args.brands or list(brands.BRANDS):
+        brand_paths, brand_hashes = load_hashes(
+            brands.downloads_dir(name), os.path.join(brands.images_dir(name), CACHE_NAME), args.workers)
+        paths.extend(brand_paths)
+        hashes.append(brand_hashes)
+    hashes = np.concatenate(hashes) if hashes else np.zeros(0, dtype=np.uint64)
+    hashed = time.perf_counter()
+
+    clusters = [cluster for cluster in HashIndex(hashes, args.threshold).clusters() if len(cluster) > 1]
+    indexed = time.perf_counter()
+
+    root = brands.DATASET_ROOT
+    for cluster in sorted(clusters, key=len, reverse=True):
+        print(f"\n🧬 {len(cluster)} near-duplicates:")
+        for i in cluster:
+            print(f"  {os.path.relpath(paths[i], root)}  {int(hashes[i]):016x}")
+
+    duplicates = sum(len(cluster) - 1 for cluster in clusters)
+    print(f"\n📊 {len(paths)} images, {len(clusters)} clusters, {duplicates} removable duplicates "
+          f"(threshold {args.threshold}) — hashing {hashed - started:.2f}s, index {indexed - hashed:.3f}s")
+
+if __name__ == "__main__":
+    main()
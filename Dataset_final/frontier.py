@@ -0,0 +1,296 @@
+"""
+Persistent crawl frontier: every collection, product and image URL of a
+brand as a job in a SQLite database (WAL mode), with its status, attempts,
+timestamps, result and content hash.
+
+Workers in any number of processes lease jobs with a single UPDATE, so two
+workers never get the same job, and leases that outlive their worker (a
+crash, a killed process) expire and are handed out again, until the job
+has used its attempts and is marked failed. A failed attempt puts the job
+back with a not-before time that doubles with every attempt. Everything
+done stays done, so a stopped crawl resumes where it left off.
+
+Jobs are ordered the way the sequential scrapers worked: by target (grp),
+then by position on the listing page. A URL listed twice keeps both
+places, as it did in the sequential scrapers. Image jobs are only leased
+once every collection is discovered, because an image's file number is its
+product's place in that order.
+
+Usage:
+    frontier = Frontier(brands.frontier_path("chubbies"))
+    frontier.seed(brands.BRANDS["chubbies"]["targets"])
+    job = frontier.lease("collection", owner)
+    frontier.complete(job["id"], result, content_hash, children=[...])
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+KINDS = ("collection", "product", "image")
+
+# Seconds a worker may hold a job before another worker can take it over
+LEASE_SECONDS = 300
+MAX_ATTEMPTS = 3
+# A job failed n times waits RETRY_BACKOFF * 2**(n - 1) seconds, at most MAX_RETRY_BACKOFF, before its next lease
+RETRY_BACKOFF = 5
+MAX_RETRY_BACKOFF = 300
+BUSY_TIMEOUT_MS = 30000
+# PRAGMA user_version; 2 added position to the unique key and the not_before column
+SCHEMA_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    url TEXT NOT NULL,
+    grp INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    parent INTEGER REFERENCES jobs (id),
+    payload TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    owner TEXT,
+    lease_expires REAL,
+    not_before REAL,
+    result TEXT,
+    content_hash TEXT,
+    error TEXT,
+    created REAL NOT NULL,
+    updated REAL NOT NULL,
+    UNIQUE (kind, grp, position, url)
+);
+CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (kind, status, grp, position);
+"""
+
+# pending and past its retry backoff, or leased by a worker whose lease ran out
+LEASABLE = ("((status = 'pending' AND (not_before IS NULL OR not_before <= :now)) "
+            "OR (status = 'leased' AND lease_expires < :now))")
+
+# Columns of version 1 databases, copied over when migrating
+V1_COLUMNS = ("id, kind, url, grp, position, parent, payload, status, attempts, owner, lease_expires, "
+              "result, content_hash, error, created, updated")
+
+def owner_id(worker=0):
+    """host:pid:worker, so leases of dead local processes can be recognised"""
+    return f"{socket.gethostname()}:{os.getpid()}:{worker}"
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        return True
+    return True
+
+class Frontier:
+    """Job store for one brand; safe to share between threads and processes"""
+
+    def __init__(self, path, lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        self._migrate(conn)
+        conn.executescript(SCHEMA)
+        conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    def _migrate(self, conn):
+        """Rebuild a version 1 jobs table, whose unique key had no position, keeping every job"""
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'jobs'").fetchone()
+        if version >= SCHEMA_VERSION or not exists:
+            return
+        with self._transaction() as conn:
+            conn.execute("DROP INDEX IF EXISTS jobs_queue")
+            conn.execute("ALTER TABLE jobs RENAME TO jobs_v1")
+            for statement in SCHEMA.split(";"):
+                if statement.strip():
+                    conn.execute(statement)
+            conn.execute(f"INSERT INTO jobs ({V1_COLUMNS}) SELECT {V1_COLUMNS} FROM jobs_v1")
+            conn.execute("DROP TABLE jobs_v1")
+
+    def _conn(self):
+        # sqlite3 connections belong to the thread that opened them
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _insert(self, conn, kind, url, grp, position, payload=None, parent=None):
+        now = time.time()
+        conn.execute(
+            "INSERT OR IGNORE INTO jobs (kind, url, grp, position, parent, payload, created, updated) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (kind, url, grp, position, parent, json.dumps(payload, ensure_ascii=False), now, now),
+        )
+
+    def seed(self, targets):
+        """Add a collection job per target; targets already in the frontier are left alone"""
+        with self._transaction() as conn:
+            for grp, target in enumerate(targets):
+                self._insert(conn, "collection", target["url"], grp, 0, target)
+
+    def lease(self, kind, owner):
+        """
+        Atomically take the next job of a kind.
+
+        Returns:
+            dict: The job (payload decoded), or None if nothing is leasable right now
+        """
+        now = time.time()
+        gate = ""
+        if kind == "image":
+            gate = ("AND NOT EXISTS (SELECT 1 FROM jobs WHERE kind = 'collection' "
+                    "AND status NOT IN ('done', 'failed'))")
+        with self._transaction() as conn:
+            # A job whose every attempt hung or took its worker down is not handed out again
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', owner = NULL, lease_expires = NULL, "
+                "error = 'lease expired on the last attempt', updated = :now "
+                "WHERE status = 'leased' AND lease_expires < :now AND attempts >= :max_attempts",
+                {"now": now, "max_attempts": self.max_attempts},
+            )
+            rows = conn.execute(
+                f"""
+                UPDATE jobs SET status = 'leased', owner = :owner, lease_expires = :expires,
+                    attempts = attempts + 1, updated = :now
+                WHERE id = (
+                    SELECT id FROM jobs WHERE kind = :kind AND {LEASABLE} {gate}
+                    ORDER BY grp, position LIMIT 1
+                )
+                RETURNING id, kind, url, grp, position, parent, payload, attempts
+                """,
+                {"owner": owner, "expires": now + self.lease_seconds, "now": now, "kind": kind},
+            ).fetchall()
+        if not rows:
+            return None
+        job = dict(rows[0])
+        job["payload"] = json.loads(job["payload"]) if job["payload"] else None
+        return job
+
+    def complete(self, job_id, result=None, content_hash=None, children=()):
+        """
+        Mark a job done and add the jobs it discovered, in one transaction.
+
+        Args:
+            children (iterable): (kind, url, grp, position, payload) tuples
+        """
+        with self._transaction() as conn:
+            for kind, url, grp, position, payload in children:
+                self._insert(conn, kind, url, grp, position, payload, parent=job_id)
+            conn.execute(
+                "UPDATE jobs SET status = 'done', owner = NULL, lease_expires = NULL, result = ?, "
+                "content_hash = ?, error = NULL, updated = ? WHERE id = ?",
+                (json.dumps(result, ensure_ascii=False), content_hash, time.time(), job_id),
+            )
+
+    def fail(self, job_id, error, result=None, children=()):
+        """
+        Record a failed attempt. The job goes back to pending, leasable again
+        after its retry backoff, until it has used max_attempts; then it is
+        marked failed, keeping result and children as the fallback.
+
+        Returns:
+            str: The job's new status, 'pending' or 'failed'
+        """
+        with self._transaction() as conn:
+            attempts = conn.execute("SELECT attempts FROM jobs WHERE id = ?", (job_id,)).fetchone()[0]
+            now = time.time()
+            not_before = None
+            if attempts < self.max_attempts:
+                status, result, children = "pending", None, ()
+                not_before = now + min(MAX_RETRY_BACKOFF, RETRY_BACKOFF * 2 ** (attempts - 1))
+            else:
+                status = "failed"
+            for kind, url, grp, position, payload in children:
+                self._insert(conn, kind, url, grp, position, payload, parent=job_id)
+            conn.execute(
+                "UPDATE jobs SET status = ?, owner = NULL, lease_expires = NULL, not_before = ?, result = ?, "
+                "error = ?, updated = ? WHERE id = ?",
+                (status, not_before, json.dumps(result, ensure_ascii=False) if result is not None else None,
+                 str(error)[:500], now, job_id),
+            )
+        return status
+
+    def reclaim_dead_leases(self):
+        """
+        Release leases held by processes on this host that no longer exist; jobs
+        that have used max_attempts are marked failed instead.
+        """
+        host = socket.gethostname()
+        released = 0
+        with self._transaction() as conn:
+            for row in conn.execute("SELECT id, owner FROM jobs WHERE status = 'leased'").fetchall():
+                owner_host, _, rest = (row["owner"] or "").partition(":")
+                pid = rest.partition(":")[0]
+                if owner_host == host and pid.isdigit() and not _pid_alive(int(pid)):
+                    conn.execute(
+                        "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                        "error = CASE WHEN attempts >= ? THEN 'worker died on the last attempt' ELSE error END, "
+                        "owner = NULL, lease_expires = NULL WHERE id = ?",
+                        (self.max_attempts, self.max_attempts, row["id"]),
+                    )
+                    released += 1
+        return released
+
+    def unfinished(self):
+        """Jobs still pending or leased"""
+        return self._conn().execute(
+            "SELECT COUNT(*) FROM jobs WHERE status IN ('pending', 'leased')"
+        ).fetchone()[0]
+
+    def product_index(self, grp, position):
+        """1-based place of a product in target/page order (the image file number)"""
+        return self._conn().execute(
+            "SELECT COUNT(*) FROM jobs WHERE kind = 'product' AND (grp < ? OR (grp = ? AND position <= ?))",
+            (grp, grp, position),
+        ).fetchone()[0]
+
+    def records(self):
+        """Product results in target/page order, as metadata.json records"""
+        rows = self._conn().execute(
+            "SELECT result FROM jobs WHERE kind = 'product' AND result IS NOT NULL ORDER BY grp, position"
+        )
+        return [json.loads(row["result"]) for row in rows]
+
+    def stats(self):
+        """{kind: {status: count}}"""
+        counts = {kind: {} for kind in KINDS}
+        for row in self._conn().execute("SELECT kind, status, COUNT(*) AS n FROM jobs GROUP BY kind, status"):
+            counts.setdefault(row["kind"], {})[row["status"]] = row["n"]
+        return counts
+
+    def reset(self):
+        """Forget every job, e.g. to recrawl from scratch"""
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM jobs")
@@ -0,0 +1,273 @@
+"""
+Persistent conditional HTTP cache for the scrapers and downloaders.
+
+Response bodies are stored as files under CACHE_DIR and indexed in a small
+SQLite database. A cached response younger than the TTL for its URL class is
+served without touching the network; an older one is revalidated with
+If-None-Match / If-Modified-Since and reused on a 304. When the stored bodies
+grow past max_bytes the least recently used ones are evicted.
+
+Image bodies are not duplicated here: the downloaded file is the cache, and
+only the validators (ETag / Last-Modified) are recorded so expired images can
+be revalidated instead of re-downloaded.
+
+Usage:
+    import http_cache
+
+    response = http_cache.get_html(url)   # same interface as http_client.get_html
+    print(http_cache.get_cache().stats())
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+import http_client
+import metrics
+
+CACHE_DIR = os.environ.get(
+    "HTTP_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".http_cache"),
+)
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# Seconds a stored response is trusted before it must be revalidated
+DEFAULT_TTLS = {
+    "collection": 60 * 60,
+    "product": 24 * 60 * 60,
+    "image": 30 * 24 * 60 * 60,
+    "other": 60 * 60,
+}
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".gif", ".avif")
+
+def classify_url(url):
+    """Map a URL onto one of the DEFAULT_TTLS classes"""
+    parsed = urlparse(url)
+    path = parsed.path.lower()
+    if parsed.netloc.startswith(("cdn.", "img.")) or path.endswith(IMAGE_EXTENSIONS) or "/is/image/" in path:
+        return "image"
+    if "/products/" in path or "/p/" in path:
+        return "product"
+    if "/collections/" in path or "/shop/" in path:
+        return "collection"
+    return "other"
+
+def cache_key(url):
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+def build_response(url, status_code, headers, body):
+    """Rebuild a requests.Response from stored parts so callers can't tell the difference"""
+    response = requests.Response()
+    response.url = url
+    response.status_code = status_code
+    response.headers = CaseInsensitiveDict(headers)
+    response._content = body
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    response.reason = "OK"
+    return response
+
+class HTTPCache:
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, ttls=None):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.counters = {"hit": 0, "revalidated": 0, "miss": 0, "evicted": 0}
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.join(cache_dir, "bodies"), exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(cache_dir, "index.sqlite3"), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                url_class TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                headers TEXT NOT NULL,
+                stored_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+        """)
+        self._db.commit()
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def _body_path(self, key):
+        return os.path.join(self.cache_dir, "bodies", key)
+
+    def lookup(self, url):
+        """Return the index row for url as a dict, or None"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT url_class, etag, last_modified, headers, stored_at, size FROM entries WHERE key = ?",
+                (cache_key(url),),
+            ).fetchone()
+        if row is None:
+            return None
+        url_class, etag, last_modified, headers, stored_at, size = row
+        return {
+            "url": url,
+            "url_class": url_class,
+            "etag": etag,
+            "last_modified": last_modified,
+            "headers": json.loads(headers),
+            "stored_at": stored_at,
+            "size": size,
+        }
+
+    def is_fresh(self, entry):
+        return time.time() - entry["stored_at"] < self.ttls[entry["url_class"]]
+
+    def conditional_headers(self, entry):
+        headers = {}
+        if entry and entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def touch(self, url, refreshed=False):
+        """Mark url as used now; refreshed=True also restarts its TTL (after a 304)"""
+        now = time.time()
+        with self._lock:
+            if refreshed:
+                self._db.execute("UPDATE entries SET last_access = ?, stored_at = ? WHERE key = ?", (now, now, cache_key(url)))
+            else:
+                self._db.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, cache_key(url)))
+            self._db.commit()
+
+    def store(self, url, response, body=None):
+        """
+        Record a 200 response. With body=None only the validators are kept
+        (used for images, whose bodies live in downloaded_images).
+        """
+        if "no-store" in response.headers.get("Cache-Control", ""):
+            return
+        key = cache_key(url)
+        size = 0
+        tmp_path = None
+        if body is not None:
+            # A temp file of its own, so concurrent fetches of one URL can't write into each other's
+            fd, tmp_path = tempfile.mkstemp(prefix=key + ".", suffix=".tmp", dir=os.path.join(self.cache_dir, "bodies"))
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(body)
+            except OSError:
+                os.remove(tmp_path)
+                raise
+            size = len(body)
+
+        now = time.time()
+        with self._lock:
+            # Body and index row are published together, so the row's size always matches the file
+            if tmp_path:
+                os.replace(tmp_path, self._body_path(key))
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key, url, classify_url(url),
+                    response.headers.get("ETag"), response.headers.get("Last-Modified"),
+                    json.dumps({k: v for k, v in response.headers.items() if k.lower() == "content-type"}),
+                    now, now, size,
+                ),
+            )
+            self._db.commit()
+        if size:
+            self.evict()
+
+    def evict(self):
+        """Drop least recently used bodies until the stored total fits in max_bytes"""
+        with self._lock:
+            total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            rows = self._db.execute("SELECT key, size FROM entries WHERE size > 0 ORDER BY last_access").fetchall()
+            for key, size in rows:
+                if total <= self.max_bytes:
+                    break
+                self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                try:
+                    os.remove(self._body_path(key))
+                except FileNotFoundError:
+                    pass
+                total -= size
+                self.counters["evicted"] += 1
+            self._db.commit()
+
+    def get(self, url, headers=None, **kwargs):
+        """GET url through the cache; same call shape as http_client.get"""
+        entry = self.lookup(url)
+        if entry and entry["size"] and not os.path.exists(self._body_path(cache_key(url))):
+            entry = None
+
+        if entry and entry["size"] and self.is_fresh(entry):
+            self.touch(url)
+            self._count("hit")
+            metrics.count("cache", result="hit", host=metrics.host_of(url))
+            return self._cached_response(url, entry)
+
+        request_headers = dict(headers or {})
+        if entry and entry["size"]:
+            request_headers.update(self.conditional_headers(entry))
+        response = http_client.get(url, headers=request_headers, **kwargs)
+
+        if response.status_code == 304 and entry and entry["size"]:
+            self.touch(url, refreshed=True)
+            self._count("revalidated")
+            metrics.count("cache", result="revalidated", host=metrics.host_of(url))
+            return self._cached_response(url, entry)
+
+        self._count("miss")
+        metrics.count("cache", result="miss", host=metrics.host_of(url))
+        if response.status_code == 200:
+            self.store(url, response, response.content)
+        return response
+
+    def _cached_response(self, url, entry):
+        with open(self._body_path(cache_key(url)), "rb") as f:
+            body = f.read()
+        response = build_response(url, 200, entry["headers"], body)
+        response.from_cache = True
+        return response
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self.counters)
+            entries, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        total = sum(counters[k] for k in ("hit", "revalidated", "miss"))
+        served = counters["hit"] + counters["revalidated"]
+        return dict(counters, entries=entries, bytes=size,
+                    hit_rate=round(served / total, 3) if total else 0.0)
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_cache():
+    """Return the process-wide cache, creating it on first use"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = HTTPCache()
+    return _cache
+
+def get(url, headers=None, **kwargs):
+    return get_cache().get(url, headers=headers, **kwargs)
+
+def get_html(url, **kwargs):
+    """Cached counterpart of http_client.get_html"""
+    return get(url, headers=http_client.HTML_HEADERS, **kwargs)
@@ -0,0 +1,140 @@
+"""
+Shared HTTP client for the brand scrapers and image downloaders.
+
+Every script goes through one pooled requests.Session so connections (and
+their TCP/TLS handshakes) are reused across products instead of being
+rebuilt for every request.
+
+Usage from a brand folder:
+    import sys, os
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+    import http_client
+
+    response = http_client.get(url)
+"""
+
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+import ratelimit
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+# (connect, read) timeout applied when a caller does not pass one
+DEFAULT_TIMEOUT = (10, 30)
+
+# Connections kept alive per host unless overridden in HOST_POOL_SIZES
+DEFAULT_POOL_SIZE = 16
+
+# Image CDNs get a bigger pool because downloads fan out much wider than page fetches
+HOST_POOL_SIZES = {
+    "cdn.shopify.com": 32,
+    "img.abercrombie.com": 32,
+}
+
+try:
+    import brotli  # noqa: F401  (urllib3 decodes "br" bodies when this is installed)
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+
+HTML_HEADERS = {
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Upgrade-Insecure-Requests': '1',
+}
+
+IMAGE_HEADERS = {
+    'Accept': 'image/avif,image/webp,image/*,*/*;q=0.8',
+}
+
+class PooledSession(requests.Session):
+    """requests.Session that applies DEFAULT_TIMEOUT and sizes its pool per host"""
+
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE, host_pool_sizes=None):
+        super().__init__()
+        self.headers.update({
+            'User-Agent': USER_AGENT,
+            'Accept-Encoding': ACCEPT_ENCODING,
+            'Connection': 'keep-alive',
+        })
+        self.pool_size = pool_size
+        self.host_pool_sizes = dict(HOST_POOL_SIZES if host_pool_sizes is None else host_pool_sizes)
+        self._mounted_hosts = set()
+        self._mount_lock = threading.Lock()
+
+        default_adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.mount("https://", default_adapter)
+        self.mount("http://", default_adapter)
+
+    def _ensure_host_adapter(self, url):
+        host = urlparse(url).netloc
+        size = self.host_pool_sizes.get(host)
+        if size is None or host in self._mounted_hosts:
+            return
+        with self._mount_lock:
+            if host in self._mounted_hosts:
+                return
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=size)
+            self.mount(f"https://{host}/", adapter)
+            self.mount(f"http://{host}/", adapter)
+            self._mounted_hosts.add(host)
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+        self._ensure_host_adapter(url)
+        return super().request(method, url, **kwargs)
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_session():
+    """Return the process-wide pooled session, creating it on first use"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = PooledSession()
+    return _session
+
+def configure(pool_size=DEFAULT_POOL_SIZE, host_pool_sizes=None):
+    """Replace the shared session, e.g. to widen the pools for a big parallel run"""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = PooledSession(pool_size, host_pool_sizes)
+    return _session
+
+def get(url, headers=None, stage="fetch", **kwargs):
+    """
+    GET through the shared session; headers are merged over the session defaults.
+
+    The request waits for its host's rate limit, 429/5xx responses and
+    connection errors are retried with backoff (see ratelimit), and every
+    attempt is recorded in metrics under stage.
+    """
+    def attempt():
+        started = time.perf_counter()
+        try:
+            response = get_session().get(url, headers=headers, **kwargs)
+        except requests.RequestException:
+            metrics.count("errors", stage=stage, host=metrics.host_of(url))
+            raise
+        metrics.record_response(url, response, time.perf_counter() - started, stage)
+        return response
+
+    return ratelimit.call(url, attempt, (requests.ConnectionError, requests.Timeout))
+
+def get_html(url, **kwargs):
+    """GET a page with browser-like HTML Accept headers"""
+    return get(url, headers=HTML_HEADERS, **kwargs)
+
+def get_image(url, **kwargs):
+    """GET an image with image Accept headers"""
+    return get(url, headers=IMAGE_HEADERS, **kwargs)
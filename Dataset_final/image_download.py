@@ -0,0 +1,172 @@
+"""
+Parallel streaming image downloader shared by both brand downloaders.
+
+Each file is streamed to "<name>.part" in fixed-size chunks and renamed into
+place only once the body is complete, so a file that exists under its final
+name is always whole. Leftover .part files from an interrupted run are resumed
+with an HTTP Range request.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+import http_cache
+import http_client
+import metrics
+import ratelimit
+
+CHUNK_SIZE = 64 * 1024
+DEFAULT_WORKERS = 8
+
+def remote_size(url):
+    """Return the Content-Length the server reports for url, or None if unknown"""
+    try:
+        ratelimit.acquire(url)
+        response = http_client.get_session().head(url, headers=http_client.IMAGE_HEADERS, allow_redirects=True)
+        response.raise_for_status()
+        length = response.headers.get("Content-Length")
+        return int(length) if length is not None else None
+    except (requests.RequestException, ValueError):
+        return None
+
+def is_complete(url, filepath, verify_size=False):
+    """
+    A file already on disk is complete if it is non-empty; with verify_size its
+    size must also match the server's Content-Length.
+    """
+    if not os.path.exists(filepath):
+        return False
+    size = os.path.getsize(filepath)
+    if size == 0:
+        return False
+    if not verify_size:
+        return True
+    expected = remote_size(url)
+    return expected is None or expected == size
+
+def download_file(url, filepath, chunk_size=CHUNK_SIZE, verify_size=False):
+    """
+    Stream one image to filepath via a temp file, resuming a partial download.
+
+    A file already on disk is reused while its validators are within the image
+    TTL of the HTTP cache; after that it is revalidated with a conditional GET
+    and only re-downloaded if the server reports a change.
+
+    Returns:
+        tuple: (status, bytes_written) where status is "skipped", "resumed" or "downloaded"
+    """
+    cache = http_cache.get_cache()
+    entry = cache.lookup(url)
+
+    # Ranges refer to the encoded body, so ask for it unencoded to keep offsets on disk meaningful
+    headers = dict(http_client.IMAGE_HEADERS, **{"Accept-Encoding": "identity"})
+    part_path = filepath + ".part"
+    offset = 0
+
+    if is_complete(url, filepath, verify_size):
+        if entry is None or cache.is_fresh(entry):
+            return "skipped", 0
+        headers.update(cache.conditional_headers(entry))
+    elif os.path.exists(part_path):
+        offset = os.path.getsize(part_path)
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+            # Only append if the image is still the version the .part file came from
+            if entry and (entry["etag"] or entry["last_modified"]):
+                headers["If-Range"] = entry["etag"] or entry["last_modified"]
+
+    written = 0
+    disk_seconds = 0.0
+    with http_client.get(url, headers=headers, stream=True, stage="download") as response:
+        if response.status_code == 304:
+            cache.touch(url, refreshed=True)
+            return "skipped", 0
+        if response.status_code == 416 and offset:
+            # Nothing past offset: the .part file is the whole body only if it is exactly Content-Range's total
+            total = response.headers.get("Content-Range", "").rpartition("/")[2]
+            if total.isdigit() and int(total) == offset:
+                os.replace(part_path, filepath)
+                return "resumed", 0
+            print(f"⚠️ Discarding {os.path.basename(part_path)} ({offset} bytes, image is {total or 'unknown'}); "
+                  f"downloading it again")
+            os.remove(part_path)
+            response.close()
+            return download_file(url, filepath, chunk_size, verify_size)
+        response.raise_for_status()
+
+        # A 200 to a Range request means the server ignored it: start over
+        resumed = offset > 0 and response.status_code == 206
+        with open(part_path, "ab" if resumed else "wb") as f:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                if chunk:
+                    write_started = time.perf_counter()
+                    f.write(chunk)
+                    disk_seconds += time.perf_counter() - write_started
+                    written += len(chunk)
+        metrics.observe("stage", disk_seconds, stage="disk_write")
+
+        # A 206 passed If-Range, so its validators describe the completed file as well
+        cache.store(url, response)
+
+    os.replace(part_path, filepath)
+    return ("resumed" if resumed else "downloaded"), written
+
+def timed_download(url, filepath, verify_size=False):
+    with metrics.timer("download", metrics.host_of(url)):
+        return download_file(url, filepath, verify_size=verify_size)
+
+def download_all(jobs, workers=DEFAULT_WORKERS, verify_size=False):
+    """
+    Download many images in parallel.
+
+    Args:
+        jobs (iterable): (image_url, filepath) pairs; may be a generator that is
+            still producing jobs (e.g. following a metadata.jsonl being written)
+        workers (int): Number of concurrent downloads
+        verify_size (bool): Compare existing files against Content-Length before skipping
+
+    Returns:
+        dict: Summary with per-status counts, bytes, elapsed seconds and throughput
+    """
+    summary = {"downloaded": 0, "resumed": 0, "skipped": 0, "failed": 0, "bytes": 0}
+    lock = threading.Lock()
+    started = time.perf_counter()
+
+    def report(future, url, filepath):
+        filename = os.path.basename(filepath)
+        try:
+            status, written = future.result()
+        except Exception as e:
+            with lock:
+                summary["failed"] += 1
+            metrics.count("files", stage="download", status="failed")
+            print(f"❌ Failed to download {filename} ({url}): {e}")
+            return
+        with lock:
+            summary[status] += 1
+            summary["bytes"] += written
+        metrics.count("files", stage="download", status=status)
+        if status == "skipped":
+            print(f"⏭️ Already on disk: {filename}")
+        else:
+            print(f"✅ Saved: {filename} ({written / 1024:.0f} KiB{', resumed' if status == 'resumed' else ''})")
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for url, filepath in jobs:
+            future = pool.submit(timed_download, url, filepath, verify_size)
+            future.add_done_callback(lambda done, url=url, filepath=filepath: report(done, url, filepath))
+
+    elapsed = time.perf_counter() - started
+    summary["seconds"] = round(elapsed, 3)
+    summary["mb_per_sec"] = round(summary["bytes"] / 1e6 / elapsed, 3) if elapsed else 0.0
+    fetched = summary["downloaded"] + summary["resumed"]
+    summary["files_per_sec"] = round(fetched / elapsed, 3) if elapsed else 0.0
+
+    print(f"\n📊 {fetched} fetched, {summary['skipped']} skipped, {summary['failed']} failed — "
+          f"{summary['bytes'] / 1e6:.1f} MB in {elapsed:.1f}s "
+          f"({summary['mb_per_sec']} MB/s, {summary['files_per_sec']} files/s)")
+    return summary
@@ -0,0 +1,179 @@
+"""
+Append-only JSONL record store for scraped product metadata.
+
+Scrapers append each product to images/metadata.jsonl the moment it is
+scraped, so a crash keeps everything written so far, and downloaders can
+stream records out of the file while the scraper is still running. When the
+scraper finishes it writes a "<path>.done" marker; export_json() turns the
+JSONL file into the metadata.json array the rest of the tree expects.
+
+Usage:
+    store = MetadataStore("images/metadata.jsonl")
+    store.append({"url": ..., "image": ..., "description": ...})
+    store.close()
+    export_json("images/metadata.jsonl", "images/metadata.json")
+
+    for record in iter_records("images/metadata.jsonl", follow=True):
+        ...
+"""
+
+import json
+import os
+import threading
+import time
+
+import metrics
+
+POLL_INTERVAL = 0.5
+
+# A follower gives up when the file hasn't grown for this long and no .done marker appeared
+IDLE_TIMEOUT = 600
+
+def done_marker(path):
+    return path + ".done"
+
+def jsonl_path_for(json_path):
+    """images/metadata.json -> images/metadata.jsonl"""
+    return os.path.splitext(json_path)[0] + ".jsonl"
+
+class MetadataStore:
+    """Thread-safe appender; every record is flushed as soon as it is written"""
+
+    def __init__(self, path, truncate=True):
+        self.path = path
+        self.count = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        if os.path.exists(done_marker(path)):
+            os.remove(done_marker(path))
+        self._file = open(path, "w" if truncate else "a", encoding="utf-8")
+
+    def append(self, record):
+        with metrics.timer("write"):
+            line = json.dumps(record, ensure_ascii=False) + "\n"
+            with self._lock:
+                self._file.write(line)
+                self._file.flush()
+                self.count += 1
+        metrics.count("records", stage="write")
+
+    def close(self):
+        """Finish the file and mark it complete for streaming readers"""
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.close()
+        with open(done_marker(self.path), "w", encoding="utf-8") as f:
+            f.write(f"{self.count}\n")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class OrderedWriter:
+    """
+    Appends records to a store in a fixed order even when they finish out of order.
+
+    Records are addressed as (group, index), e.g. (collection, position on the
+    page). A group's size is announced once it is known; the longest complete
+    prefix is written as soon as it is available.
+    """
+
+    def __init__(self, store, group_count):
+        self.store = store
+        self._sizes = [None] * group_count
+        self._pending = [{} for _ in range(group_count)]
+        self._group = 0
+        self._index = 0
+        self._lock = threading.Lock()
+
+    def set_group_size(self, group, size):
+        with self._lock:
+            self._sizes[group] = size
+            self._flush()
+
+    def put(self, group, index, record):
+        with self._lock:
+            self._pending[group][index] = record
+            self._flush()
+
+    def _flush(self):
+        while self._group < len(self._sizes):
+            size = self._sizes[self._group]
+            if size is None:
+                return
+            if self._index >= size:
+                self._group += 1
+                self._index = 0
+                continue
+            record = self._pending[self._group].pop(self._index, None)
+            if record is None:
+                return
+            self.store.append(record)
+            self._index += 1
+
+def iter_records(path, follow=False, poll_interval=POLL_INTERVAL, idle_timeout=IDLE_TIMEOUT):
+    """
+    Yield records from a JSONL store.
+
+    With follow=True the reader keeps tailing the file until the writer's
+    .done marker appears (or nothing new arrives for idle_timeout seconds).
+    A torn last line from a crashed writer is skipped.
+    """
+    while follow and not os.path.exists(path):
+        time.sleep(poll_interval)
+
+    with open(path, "r", encoding="utf-8") as f:
+        buffer = ""
+        last_growth = time.monotonic()
+        done_seen = False
+        while True:
+            chunk = f.readline()
+            if chunk:
+                buffer += chunk
+                last_growth = time.monotonic()
+                if not buffer.endswith("\n"):
+                    continue  # Writer is mid-line
+                line, buffer = buffer.strip(), ""
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    print(f"⚠️ Skipping unreadable record in {path}")
+                continue
+
+            if not follow:
+                break
+            if done_seen:
+                break
+            if os.path.exists(done_marker(path)):
+                # The writer has finished; one more pass picks up anything
+                # appended between the last read and the marker check
+                done_seen = True
+                continue
+            if idle_timeout is not None and time.monotonic() - last_growth > idle_timeout:
+                print(f"⚠️ {path} stopped growing without a .done marker; assuming the writer died")
+                break
+            time.sleep(poll_interval)
+
+        if buffer.strip():
+            print(f"⚠️ Ignoring incomplete last record in {path}")
+
+def load_records(path):
+    """Read metadata from either a JSONL store or a metadata.json array"""
+    if path.endswith(".jsonl"):
+        return list(iter_records(path))
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def export_json(jsonl_path, json_path, indent=2):
+    """Compact a JSONL store into a metadata.json array, written atomically"""
+    records = list(iter_records(jsonl_path))
+    tmp_path = json_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(records, f, indent=indent, ensure_ascii=False)
+    os.replace(tmp_path, json_path)
+    return len(records)
@@ -0,0 +1,217 @@
+"""
+Lightweight run metrics for the scrapers and downloaders.
+
+Counters and timing histograms are kept in one process-wide registry,
+labelled by stage (fetch, parse, describe, browser, download, write, ...)
+and by host where there is one. Recording a value is a dict lookup and a
+bisect under a lock, so it stays on in normal runs. At the end of a run
+export() writes a Prometheus text file (for node_exporter's textfile
+collector or a quick diff) and a JSON summary with percentiles estimated
+from the histogram buckets.
+
+Usage:
+    import metrics
+
+    with metrics.timer("parse"):
+        soup = BeautifulSoup(html, "html.parser")
+    metrics.count("products", stage="write")
+    metrics.sleep(2, "between_collections")      # time.sleep that is accounted for
+    metrics.export("chubbies_scraper")           # metrics/chubbies_scraper.{prom,json}
+"""
+
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+METRICS_DIR = os.environ.get(
+    "METRICS_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "metrics"),
+)
+
+PREFIX = "alaiy"
+
+# Upper bounds in seconds; spans a cached lookup up to a full browser page load
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Estimate a quantile by linear interpolation inside its bucket"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+class Registry:
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    def count(self, name, value=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+            self.started = time.time()
+
+    def prometheus_text(self):
+        lines = []
+        with self._lock:
+            for name in sorted({name for name, _ in self.counters}):
+                lines.append(f"# TYPE {PREFIX}_{name}_total counter")
+                for (counter, labels), value in sorted(self.counters.items()):
+                    if counter == name:
+                        lines.append(f"{PREFIX}_{name}_total{_label_text(labels)} {_number(value)}")
+            for name in sorted({name for name, _ in self.histograms}):
+                metric = f"{PREFIX}_{name}_seconds"
+                lines.append(f"# TYPE {metric} histogram")
+                for (histogram_name, labels), histogram in sorted(self.histograms.items(), key=lambda item: item[0]):
+                    if histogram_name != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets + ("+Inf",), histogram.counts):
+                        cumulative += count
+                        lines.append(f"{metric}_bucket{_label_text(labels + (('le', str(bound)),))} {cumulative}")
+                    lines.append(f"{metric}_sum{_label_text(labels)} {_number(histogram.sum)}")
+                    lines.append(f"{metric}_count{_label_text(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        with self._lock:
+            counters = [
+                dict(labels, name=name, value=_number(value))
+                for (name, labels), value in sorted(self.counters.items())
+            ]
+            timings = [
+                dict(
+                    labels, name=name, count=histogram.count,
+                    total_seconds=round(histogram.sum, 4),
+                    mean_ms=round(histogram.sum / histogram.count * 1000, 2) if histogram.count else None,
+                    **{f"p{int(q * 100)}_ms": _ms(histogram.quantile(q)) for q in (0.5, 0.95, 0.99)},
+                )
+                for (name, labels), histogram in sorted(self.histograms.items(), key=lambda item: item[0])
+            ]
+        return {
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+            "wall_seconds": round(time.time() - self.started, 3),
+            "counters": counters,
+            "timings": timings,
+        }
+
+def _label_key(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items() if value is not None))
+
+def _label_text(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _number(value):
+    return round(value, 6) if isinstance(value, float) else value
+
+def _ms(seconds):
+    return round(seconds * 1000, 2) if seconds is not None else None
+
+_registry = Registry()
+
+def get_registry():
+    return _registry
+
+def host_of(url):
+    return urlparse(url).netloc or None
+
+def count(name, value=1, **labels):
+    _registry.count(name, value, **labels)
+
+def observe(name, seconds, **labels):
+    _registry.observe(name, seconds, **labels)
+
+@contextmanager
+def timer(stage, host=None):
+    """Time a block into the stage histogram; an exception also counts as an error"""
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        _registry.count("errors", stage=stage, host=host)
+        raise
+    finally:
+        _registry.observe("stage", time.perf_counter() - started, stage=stage, host=host)
+
+def record_response(url, response, seconds, stage="fetch"):
+    """Count one HTTP exchange: request, status class, bytes (when known) and latency"""
+    host = host_of(url)
+    _registry.count("requests", stage=stage, host=host, status=f"{response.status_code // 100}xx")
+    _registry.observe("http_request", seconds, host=host)
+    length = response.headers.get("Content-Length")
+    if length is not None and length.isdigit():
+        _registry.count("bytes", int(length), stage=stage, host=host)
+    if response.status_code >= 400:
+        _registry.count("errors", stage=stage, host=host)
+
+def sleep(seconds, reason):
+    """time.sleep that is recorded as politeness time"""
+    started = time.perf_counter()
+    time.sleep(seconds)
+    _registry.count("polite_sleep_seconds", time.perf_counter() - started, reason=reason)
+
+def export(name, directory=METRICS_DIR):
+    """
+    Write <directory>/<name>.prom and <name>.json for this run.
+
+    Returns:
+        dict: The JSON summary
+    """
+    os.makedirs(directory, exist_ok=True)
+    summary = dict(_registry.summary(), run=name)
+    for extension, content in (
+        (".prom", _registry.prometheus_text()),
+        (".json", json.dumps(summary, indent=2)),
+    ):
+        path = os.path.join(directory, name + extension)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    print(f"📈 Metrics written to {os.path.join(directory, name)}.prom/.json")
+    return summary
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Pipelined dataset ingestion for every brand in brands.py.
+
+Runs the steps that used to be separate scripts (scraper.py, then the image
+downloader) as one pipeline of stages connected by bounded queues:
+
+    discover  -> listing pages to product stubs (brand.discover)
+    describe  -> product page to metadata record (brand.describe)
+    download  -> image into images/downloaded_images
+    write     -> images/metadata.jsonl, exported to metadata.json at the end
+
+Each stage has its own worker count, so images start downloading while later
+listing pages are still being discovered, and a full queue makes the stage
+feeding it wait instead of piling records up in memory. Records keep the
+order the old scripts produced (target order, then page order), and so do
+the numbered image filenames.
+
+    python pipeline.py                       # all brands, one process each
+    python pipeline.py chubbies --download-workers 16
+"""
+
+import argparse
+import importlib
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+
+import brands
+import metrics
+import ratelimit
+from image_download import download_file
+from metadata_store import MetadataStore, OrderedWriter, export_json
+
+DEFAULT_QUEUE_SIZE = 64
+
+STAGES = ("discover", "describe", "download", "write")
+
+# Queue sentinel telling a worker its stage is finished
+STOP = object()
+
+def load_brand(name):
+    """Import the brand.py adapter from the brand's folder"""
+    folder = brands.brand_dir(name)
+    if folder not in sys.path:
+        sys.path.insert(0, folder)
+    return importlib.import_module("brand")
+
+class StageStats:
+    """Per-stage counters: items handled, failures and seconds spent working"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {stage: {"items": 0, "failed": 0, "busy": 0.0} for stage in STAGES}
+
+    def record(self, stage, started, failed=False):
+        busy = time.perf_counter() - started
+        with self._lock:
+            self.counts[stage]["items"] += 1
+            self.counts[stage]["busy"] += busy
+            if failed:
+                self.counts[stage]["failed"] += 1
+        metrics.observe("pipeline_stage", busy, stage=stage)
+        if failed:
+            metrics.count("errors", stage=f"pipeline_{stage}")
+
+class Sequencer:
+    """
+    Stand-in store for OrderedWriter: numbers records in discovery order and
+    hands them to the download stage.
+    """
+
+    def __init__(self, download_queue):
+        self.download_queue = download_queue
+        self.count = 0
+
+    def append(self, record):
+        self.count += 1
+        self.download_queue.put((self.count, record))
+
+def run_workers(count, target, *args):
+    threads = [threading.Thread(target=target, args=args, daemon=True) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+def stop_stage(threads, next_queue, next_workers):
+    """Wait for a stage's workers, then tell every worker of the next stage to finish"""
+    for thread in threads:
+        thread.join()
+    for _ in range(next_workers):
+        next_queue.put(STOP)
+
+def run_brand(name, workers=None, queue_size=DEFAULT_QUEUE_SIZE, limits=None):
+    """
+    Run the whole pipeline for one brand.
+
+    Args:
+        name (str): Key in brands.BRANDS
+        workers (dict): Per-stage worker counts overriding the brand's defaults
+        queue_size (int): Capacity of each queue between stages
+        limits (dict): ratelimit.configure() arguments (rate, burst, max_retries)
+
+    Returns:
+        dict: Per-stage stats plus record and elapsed-time totals
+    """
+    config = brands.BRANDS[name]
+    workers = dict(config["workers"], **{k: v for k, v in (workers or {}).items() if v})
+    brand = load_brand(name)
+    # Each brand process has its own limiter; brands don't share hosts
+    ratelimit.configure(**(limits or {}))
+
+    json_path = brands.metadata_path(name)
+    save_dir = brands.downloads_dir(name)
+    os.makedirs(save_dir, exist_ok=True)
+
+    targets = config["targets"]
+    target_queue = queue.Queue()
+    describe_queue = queue.Queue(maxsize=queue_size)
+    download_queue = queue.Queue(maxsize=queue_size)
+    write_queue = queue.Queue(maxsize=queue_size)
+
+    for group, target in enumerate(targets):
+        target_queue.put((group, target))
+    for _ in range(workers["discover"]):
+        target_queue.put(STOP)
+
+    stats = StageStats()
+    store = MetadataStore(os.path.splitext(json_path)[0] + ".jsonl")
+    writer = OrderedWriter(Sequencer(download_queue), len(targets))
+
+    def discover_worker():
+        while True:
+            item = target_queue.get()
+            if item is STOP:
+                return
+            group, target = item
+            started = time.perf_counter()
+            try:
+                stubs = brand.discover(target)
+            except Exception as e:
+                print(f"❌ [{name}] Discovery failed for {target['url']}: {e}")
+                stubs = []
+                stats.record("discover", started, failed=True)
+            else:
+                stats.record("discover", started)
+            print(f"🔍 [{name}] {len(stubs)} products from {target['url']}")
+            writer.set_group_size(group, len(stubs))
+            for index, stub in enumerate(stubs):
+                describe_queue.put((group, index, stub))
+
+    def describe_worker():
+        while True:
+            item = describe_queue.get()
+            if item is STOP:
+                return
+            group, index, stub = item
+            started = time.perf_counter()
+            try:
+                record = brand.describe(stub)
+            except Exception as e:
+                print(f"❌ [{name}] Description failed for {stub['url']}: {e}")
+                record = dict(stub, description=None)
+                stats.record("describe", started, failed=True)
+            else:
+                stats.record("describe", started)
+            writer.put(group, index, record)
+
+    def download_worker():
+        while True:
+            item = download_queue.get()
+            if item is STOP:
+                return
+            index, record = item
+            if not record.get("url") or not record.get("image"):
+                # Still written, and still numbered, like the standalone downloaders do
+                print(f"Skipping item {index} due to missing data.")
+                write_queue.put(item)
+                continue
+            filename = brand.image_filename(index, record)
+            started = time.perf_counter()
+            try:
+                status, written = download_file(record["image"], os.path.join(save_dir, filename))
+            except Exception as e:
+                print(f"❌ [{name}] Failed to download {filename}: {e}")
+                stats.record("download", started, failed=True)
+            else:
+                stats.record("download", started)
+                if status != "skipped":
+                    print(f"✅ [{name}] Saved: {filename} ({written / 1024:.0f} KiB)")
+            write_queue.put(item)
+
+    def write_worker():
+        # Downloads finish out of order; hold records until their turn comes
+        pending = {}
+        next_index = 1
+        while True:
+            item = write_queue.get()
+            if item is STOP:
+                return
+            index, record = item
+            pending[index] = record
+            while next_index in pending:
+                started = time.perf_counter()
+                store.append(pending.pop(next_index))
+                stats.record("write", started)
+                next_index += 1
+
+    print(f"🚀 [{name}] Pipeline: {len(targets)} targets, workers {workers}, queue size {queue_size}")
+    started = time.perf_counter()
+    try:
+        discoverers = run_workers(workers["discover"], discover_worker)
+        describers = run_workers(workers["describe"], describe_worker)
+        downloaders = run_workers(workers["download"], download_worker)
+        write_thread = run_workers(1, write_worker)
+
+        stop_stage(discoverers, describe_queue, workers["describe"])
+        # Once every description is in, OrderedWriter has passed every record on
+        stop_stage(describers, download_queue, workers["download"])
+        stop_stage(downloaders, write_queue, 1)
+        write_thread[0].join()
+    finally:
+        store.close()
+        brand.close()
+
+    count = export_json(store.path, json_path, indent=config["json_indent"])
+    elapsed = time.perf_counter() - started
+    metrics.export(f"pipeline_{name}")
+
+    print(f"\n📊 [{name}] {count} records in {elapsed:.1f}s → {json_path}")
+    for stage in STAGES:
+        counts = stats.counts[stage]
+        print(f"  {stage:<9} {counts['items']:>5} items  {counts['failed']:>3} failed  "
+              f"{counts['busy']:>8.1f}s busy across {1 if stage == 'write' else workers[stage]} workers")
+    return dict(stages=stats.counts, records=count, seconds=round(elapsed, 3))
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("brands", nargs="*", help=f"Brands to ingest: {', '.join(brands.BRANDS)} (default: all)")
+    for stage in ("discover", "describe", "download"):
+        parser.add_argument(f"--{stage}-workers", type=int, default=None,
+                            help=f"Override the brand's {stage} worker count")
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE,
+                        help="Capacity of each queue between stages")
+    ratelimit.add_arguments(parser)
+    args = parser.parse_args()
+    unknown = [name for name in args.brands if name not in brands.BRANDS]
+    if unknown:
+        parser.error(f"unknown brand(s): {', '.join(unknown)}")
+    return args
+
+def main():
+    args = parse_args()
+    names = args.brands or list(brands.BRANDS)
+    workers = {
+        "discover": args.discover_workers,
+        "describe": args.describe_workers,
+        "download": args.download_workers,
+    }
+
+    limits = {"rate": args.rate, "burst": args.burst, "max_retries": args.max_retries}
+
+    if len(names) == 1:
+        run_brand(names[0], workers, args.queue_size, limits)
+        return
+
+    # Brand folders reuse module names (scraper, scrape_description, ...), so
+    # every brand gets its own interpreter
+    context = multiprocessing.get_context("spawn")
+    processes = [context.Process(target=run_brand, args=(name, workers, args.queue_size, limits), name=name) for name in names]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+        if process.exitcode:
+            print(f"❌ {process.name} pipeline exited with code {process.exitcode}")
+
+if __name__ == "__main__":
+    main()
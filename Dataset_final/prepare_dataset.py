@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Turn a brand's downloaded_images into a training-ready LoRA dataset.
+
+For every downloaded image this writes, into images/training:
+    <name>.jpg   resized so it is no larger than resolution x resolution pixels
+                 in area (what the trainer would otherwise resize to on every
+                 epoch and while caching latents), re-encoded as RGB JPEG
+    <name>.txt   caption: "<trigger word>, <scraped description>"
+
+The trigger word comes first so keep_tokens = 1 in dataset.toml pins it.
+Images are matched to metadata.json through the 1-based index at the start
+of their filename. Near-duplicate images (see dedupe.py) are left out, one
+representative per cluster. Work is spread over a process pool, and a
+manifest in the output folder records what each output was built from, so
+re-runs only process new or changed images.
+
+    python prepare_dataset.py                    # all brands
+    python prepare_dataset.py chubbies --resolution 768 --force
+    python prepare_dataset.py anf --keep-duplicates
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+try:
+    from PIL import Image
+except ImportError:  # Only needed by the workers; main() reports it
+    Image = None
+
+import brands
+import dedupe
+
+DEFAULT_RESOLUTION = 512
+DEFAULT_QUALITY = 95
+DEFAULT_WORKERS = os.cpu_count() or 1
+
+MANIFEST_NAME = "manifest.json"
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+
+NO_DESCRIPTION = "No product description found"
+
+def build_caption(trigger_word, description):
+    """Trigger word plus the description flattened onto one line"""
+    description = " ".join((description or "").split())
+    if not description or description == NO_DESCRIPTION:
+        return trigger_word
+    return f"{trigger_word}, {description}"
+
+def target_size(width, height, resolution):
+    """Scale (width, height) down to at most resolution**2 pixels, keeping the aspect ratio"""
+    scale = min(1.0, (resolution * resolution / (width * height)) ** 0.5)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+def source_index(filename):
+    """1-based metadata position from a '<n>-<slug>.<ext>' filename, or None"""
+    match = re.match(r"(\d+)-", filename)
+    return int(match.group(1)) if match else None
+
+def prepare_image(source_path, output_path, caption, resolution, quality):
+    """
+    Resize and re-encode one image and write its caption (runs in a worker process).
+
+    Returns:
+        tuple: (output width, output height)
+    """
+    with Image.open(source_path) as image:
+        size = target_size(image.width, image.height, resolution)
+        # JPEG sources can be decoded at a reduced scale, skipping most of the work
+        image.draft("RGB", size)
+        image = image.convert("RGB")
+        if image.size != size:
+            image = image.resize(size, Image.LANCZOS, reducing_gap=3.0)
+
+        tmp_path = output_path + ".tmp"
+        image.save(tmp_path, "JPEG", quality=quality, optimize=True)
+        os.replace(tmp_path, output_path)
+
+    with open(os.path.splitext(output_path)[0] + ".txt", "w", encoding="utf-8") as f:
+        f.write(caption + "\n")
+    return size
+
+def load_manifest(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def save_manifest(path, manifest):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def plan_jobs(source_dir, output_dir, metadata, trigger_word, resolution, quality, manifest, force=False, exclude=()):
+    """
+    Work out which outputs are missing or stale. Source filenames in exclude
+    are left out of the training set.
+
+    Returns:
+        tuple: (jobs, entries) where jobs are (source, output, caption) and
+            entries maps every current output name to its manifest entry
+    """
+    jobs = []
+    entries = {}
+    for entry in sorted(os.scandir(source_dir), key=lambda e: e.name):
+        name, ext = os.path.splitext(entry.name)
+        if not entry.is_file() or ext.lower() not in IMAGE_EXTENSIONS or entry.name in exclude:
+            continue
+        index = source_index(entry.name)
+        if index is None or not 1 <= index <= len(metadata):
+            print(f"⚠️ No metadata for {entry.name}; skipping")
+            continue
+
+        caption = build_caption(trigger_word, metadata[index - 1].get("description"))
+        stat = entry.stat()
+        output_name = name + ".jpg"
+        record = {
+            "source": entry.name,
+            "source_size": stat.st_size,
+            "source_mtime_ns": stat.st_mtime_ns,
+            "caption": caption,
+            "resolution": resolution,
+            "quality": quality,
+        }
+        entries[output_name] = record
+
+        output_path = os.path.join(output_dir, output_name)
+        up_to_date = (
+            manifest.get(output_name) == record
+            and os.path.exists(output_path)
+            and os.path.exists(os.path.join(output_dir, name + ".txt"))
+        )
+        if force or not up_to_date:
+            jobs.append((entry.path, output_path, caption))
+    return jobs, entries
+
+def remove_stale(output_dir, manifest, entries):
+    """Delete outputs whose source image is gone or now excluded"""
+    removed = 0
+    for output_name in set(manifest) - set(entries):
+        for path in (output_name, os.path.splitext(output_name)[0] + ".txt"):
+            try:
+                os.remove(os.path.join(output_dir, path))
+            except FileNotFoundError:
+                pass
+        removed += 1
+    return removed
+
+def prepare_brand(name, resolution=DEFAULT_RESOLUTION, quality=DEFAULT_QUALITY, workers=DEFAULT_WORKERS,
+                  force=False, dedupe_threshold=dedupe.DEFAULT_THRESHOLD):
+    """
+    Bring images/training for one brand up to date.
+
+    Args:
+        dedupe_threshold (int): Hash distance for near-duplicates; None keeps every image
+
+    Returns:
+        dict: Counts of prepared, unchanged, removed, duplicate and failed images plus elapsed seconds
+    """
+    source_dir = brands.downloads_dir(name)
+    output_dir = brands.training_dir(name)
+    os.makedirs(output_dir, exist_ok=True)
+
+    with open(brands.metadata_path(name), "r", encoding="utf-8") as f:
+        metadata = json.load(f)
+
+    duplicates = {}
+    if dedupe_threshold is not None:
+        duplicates = dedupe.brand_duplicates(name, dedupe_threshold)
+        for path, kept_path in sorted(duplicates.items()):
+            print(f"🧬 Skipping {os.path.basename(path)}: near-duplicate of {os.path.basename(kept_path)}")
+
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    manifest = load_manifest(manifest_path)
+    jobs, entries = plan_jobs(source_dir, output_dir, metadata, brands.BRANDS[name]["trigger_word"],
+                              resolution, quality, manifest, force,
+                              exclude={os.path.basename(path) for path in duplicates})
+    removed = remove_stale(output_dir, manifest, entries)
+
+    print(f"🧵 [{name}] {len(jobs)} to prepare, {len(entries) - len(jobs)} unchanged, "
+          f"{len(duplicates)} duplicates, {removed} removed")
+    summary = {"prepared": 0, "unchanged": len(entries) - len(jobs), "removed": removed,
+               "duplicates": len(duplicates), "failed": 0}
+    started = time.perf_counter()
+
+    # Failed images stay out of the manifest so the next run retries them
+    pending = {os.path.basename(output_path) for _, output_path, _ in jobs}
+    kept = {output_name: entry for output_name, entry in entries.items() if output_name not in pending}
+
+    if jobs:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(prepare_image, source, output, caption, resolution, quality): output
+                for source, output, caption in jobs
+            }
+            for future in as_completed(futures):
+                output_name = os.path.basename(futures[future])
+                try:
+                    width, height = future.result()
+                except Exception as e:
+                    summary["failed"] += 1
+                    print(f"❌ Failed to prepare {output_name}: {e}")
+                    continue
+                summary["prepared"] += 1
+                kept[output_name] = entries[output_name]
+                print(f"✅ Prepared: {output_name} ({width}x{height})")
+
+    save_manifest(manifest_path, kept)
+    summary["seconds"] = round(time.perf_counter() - started, 3)
+    print(f"📊 [{name}] {summary['prepared']} prepared, {summary['unchanged']} unchanged, "
+          f"{summary['failed']} failed in {summary['seconds']}s → {output_dir}")
+    return summary
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("brands", nargs="*", help=f"Brands to prepare: {', '.join(brands.BRANDS)} (default: all)")
+    parser.add_argument("--resolution", type=int, default=DEFAULT_RESOLUTION,
+                        help="Training resolution from dataset.toml; outputs fit in resolution^2 pixels")
+    parser.add_argument("--quality", type=int, default=DEFAULT_QUALITY, help="JPEG quality of the outputs")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Worker processes")
+    parser.add_argument("--force", action="store_true", help="Rebuild every output, ignoring the manifest")
+    parser.add_argument("--dedupe-threshold", type=int, default=dedupe.DEFAULT_THRESHOLD,
+                        help="Maximum differing perceptual-hash bits for two images to count as duplicates")
+    parser.add_argument("--keep-duplicates", action="store_true", help="Don't drop near-duplicate images")
+    args = parser.parse_args()
+    unknown = [name for name in args.brands if name not in brands.BRANDS]
+    if unknown:
+        parser.error(f"unknown brand(s): {', '.join(unknown)}")
+    return args
+
+def main():
+    args = parse_args()
+    if Image is None:
+        raise SystemExit("❌ Pillow is required for dataset preparation: pip install Pillow")
+    if dedupe.np is None and not args.keep_duplicates:
+        raise SystemExit("❌ NumPy is required for duplicate detection: pip install numpy (or use --keep-duplicates)")
+
+    threshold = None if args.keep_duplicates else args.dedupe_threshold
+    for name in args.brands or list(brands.BRANDS):
+        prepare_brand(name, args.resolution, args.quality, args.workers, args.force, threshold)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""
+Per-host token-bucket rate limiting with adaptive rates and retry backoff.
+
+Every request through http_client (and every Selenium page load) takes a
+token from its host's bucket first, so politeness is a rate per host instead
+of fixed sleeps. Buckets adapt: a 429 or 5xx halves the host's rate, and a
+run of successes raises it again step by step, up to max_rate. Retryable
+failures are retried with jittered exponential backoff, or after the
+server's Retry-After when it sends one; a Retry-After also pauses every
+other request to that host.
+
+Usage:
+    import ratelimit
+
+    ratelimit.acquire(url)                       # before a request not made through http_client
+    ratelimit.configure(rate=2, burst=4)         # e.g. from --rate / --burst
+"""
+
+import email.utils
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+import metrics
+
+# Requests per second and burst size per host unless overridden in HOST_LIMITS
+DEFAULT_RATE = 4.0
+DEFAULT_BURST = 8
+
+# Image CDNs are built for fan-out; the storefronts get the default
+HOST_LIMITS = {
+    "cdn.shopify.com": (20.0, 40),
+    "img.abercrombie.com": (20.0, 40),
+}
+
+# Adaptive range: a bucket may climb to rate * MAX_RATE_FACTOR and drop to MIN_RATE
+MAX_RATE_FACTOR = 4.0
+MIN_RATE = 0.2
+DECREASE_FACTOR = 0.5
+INCREASE_AFTER = 20     # consecutive successes before the rate is raised
+INCREASE_STEP = 0.5     # requests per second added each time
+
+# Retries
+MAX_RETRIES = 4
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+MAX_RETRY_AFTER = 120.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class TokenBucket:
+    def __init__(self, rate, burst, max_rate=None):
+        self.rate = rate
+        self.burst = burst
+        self.max_rate = max_rate or rate * MAX_RATE_FACTOR
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.successes = 0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self):
+        """Take a token and return how long the caller must wait before using it"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            # Tokens may go negative: each waiter reserves its own slot in the queue
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            return max(wait, self.paused_until - now)
+
+    def pause(self, seconds):
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def penalize(self):
+        """Multiplicative decrease after a 429/5xx"""
+        with self._lock:
+            self.rate = max(MIN_RATE, self.rate * DECREASE_FACTOR)
+            self.successes = 0
+
+    def reward(self):
+        """Additive increase after INCREASE_AFTER consecutive successes"""
+        with self._lock:
+            self.successes += 1
+            if self.successes >= INCREASE_AFTER and self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + INCREASE_STEP)
+                self.successes = 0
+
+class RateLimiter:
+    def __init__(self, rate=None, burst=None, host_limits=None, max_retries=MAX_RETRIES, share=1.0):
+        self.rate = rate
+        self.burst = burst
+        # Fraction of each host's budget this process may use, when several processes crawl one brand
+        self.share = share
+        self.host_limits = dict(HOST_LIMITS if host_limits is None else host_limits)
+        self.max_retries = max_retries
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, url):
+        host = urlparse(url).netloc
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            with self._lock:
+                bucket = self._buckets.get(host)
+                if bucket is None:
+                    # An explicit --rate/--burst applies to every host
+                    rate, burst = self.host_limits.get(host, (DEFAULT_RATE, DEFAULT_BURST))
+                    rate, burst = self.rate or rate, self.burst or burst
+                    bucket = self._buckets[host] = TokenBucket(rate * self.share, max(1, round(burst * self.share)))
+        return bucket
+
+    def acquire(self, url):
+        """Block until url's host may be sent another request"""
+        wait = self.bucket(url).reserve()
+        if wait > 0:
+            metrics.sleep(wait, "rate_limit")
+
+    def rates(self):
+        with self._lock:
+            return {host: round(bucket.rate, 2) for host, bucket in self._buckets.items()}
+
+def retry_after_seconds(response):
+    """Seconds from a Retry-After header (delta-seconds or HTTP-date), or None"""
+    value = response.headers.get("Retry-After") if response is not None else None
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = email.utils.parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER)
+
+def backoff_seconds(attempt):
+    """Full-jitter exponential backoff for the given retry (0-based)"""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+def call(url, send, retry_exceptions=()):
+    """
+    Run send() for url under the host's rate limit, retrying retryable failures.
+
+    Args:
+        send (callable): Performs one attempt and returns a requests.Response
+        retry_exceptions (tuple): Exception types treated as retryable
+
+    Returns:
+        requests.Response: The first non-retryable response, or the last one
+        once retries are exhausted (the last exception is re-raised instead
+        when no attempt produced a response)
+    """
+    limiter = get_limiter()
+    bucket = limiter.bucket(url)
+    host = urlparse(url).netloc
+    for attempt in range(limiter.max_retries + 1):
+        limiter.acquire(url)
+        try:
+            response = send()
+        except retry_exceptions:
+            if attempt == limiter.max_retries:
+                raise
+            bucket.penalize()
+            delay = backoff_seconds(attempt)
+        else:
+            if response.status_code not in RETRY_STATUSES:
+                bucket.reward()
+                return response
+            bucket.penalize()
+            if attempt == limiter.max_retries:
+                return response
+            retry_after = retry_after_seconds(response)
+            if retry_after is not None:
+                bucket.pause(retry_after)
+                delay = retry_after
+            else:
+                delay = backoff_seconds(attempt)
+            response.close()
+
+        metrics.count("retries", host=host)
+        print(f"🔁 Retrying {url} in {delay:.1f}s (attempt {attempt + 2}/{limiter.max_retries + 1})")
+        metrics.sleep(delay, "backoff")
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+def get_limiter():
+    """Return the process-wide limiter, creating it on first use"""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = RateLimiter()
+    return _limiter
+
+def configure(rate=None, burst=None, max_retries=MAX_RETRIES, host_limits=None, share=1.0):
+    """Replace the shared limiter; rate/burst given here apply to every host"""
+    global _limiter
+    with _limiter_lock:
+        _limiter = RateLimiter(rate, burst, host_limits, max_retries, share)
+    return _limiter
+
+def acquire(url):
+    get_limiter().acquire(url)
+
+def add_arguments(parser):
+    """--rate / --burst / --max-retries for a script's argparse parser"""
+    parser.add_argument("--rate", type=float, default=None,
+                        help=f"Starting requests per second per host (default: {DEFAULT_RATE}, more for image CDNs)")
+    parser.add_argument("--burst", type=int, default=None, help=f"Token bucket size per host (default: {DEFAULT_BURST})")
+    parser.add_argument("--max-retries", type=int, default=MAX_RETRIES,
+                        help="Retries for 429/5xx responses and connection errors")
+
+def configure_from_args(args):
+    return configure(args.rate, args.burst, args.max_retries)
@@ -0,0 +1,133 @@
+"""
+Self-tuning extraction plans for scraped pages.
+
+A scraper that tries several selectors (or lookup strategies) in a fixed
+order pays for every failed attempt on every page, and on every card of a
+page. A plan remembers, per site and page template, which strategy last
+worked and tries it first; the others are only probed, in their original
+order, when the winner yields nothing. Winners are saved to PLAN_PATH so the
+next run starts with them. Every lookup is counted as a hit (winner
+worked), a re-probe (another strategy had to be found), a failure, or a
+probe when the key had no winner yet, so a falling hit rate shows when a
+site's markup, e.g. its hashed CSS-module class names, has changed.
+
+Usage:
+    import selector_plan
+
+    plan = selector_plan.get_plan()
+    cards, selector = plan.run(selector_plan.plan_key(url, "cards"), [
+        (selector, lambda selector=selector: soup.select(selector)) for selector in selectors
+    ])
+    plan.save()
+    print(plan.report())
+"""
+
+import json
+import os
+import threading
+import time
+from urllib.parse import urlparse
+
+import metrics
+
+PLAN_PATH = os.environ.get(
+    "SELECTOR_PLAN_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "selector_plans.json"),
+)
+
+# Below this hit rate the report warns that the page markup probably changed
+LOW_HIT_RATE = 0.8
+
+def plan_key(url, step):
+    """host/template:step, the template being the first path segment (collections, products, ...)"""
+    parsed = urlparse(url)
+    template = parsed.path.strip("/").split("/", 1)[0]
+    return f"{parsed.netloc}/{template}:{step}"
+
+class SelectorPlan:
+    def __init__(self, path=PLAN_PATH):
+        self.path = path
+        self.winners = {}
+        self.stats = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self.winners = {key: plan["strategy"] for key, plan in json.load(f).items()}
+        except (FileNotFoundError, json.JSONDecodeError, KeyError, AttributeError):
+            pass
+
+    def run(self, key, strategies):
+        """
+        Try (name, callable) strategies, the key's winner first.
+
+        Returns:
+            tuple: (first non-empty result, its strategy name), or (last result, None)
+            when every strategy came up empty
+        """
+        winner = self.winners.get(key)
+        ordered = sorted(strategies, key=lambda strategy: strategy[0] != winner) if winner else strategies
+
+        result = None
+        for name, strategy in ordered:
+            result = strategy()
+            if result:
+                self._record(key, "hit" if name == winner else "reprobe" if winner else "probe", name)
+                return result, name
+        self._record(key, "failure")
+        return result, None
+
+    def _record(self, key, outcome, name=None):
+        with self._lock:
+            counts = self.stats.setdefault(key, {"hit": 0, "reprobe": 0, "failure": 0, "probe": 0})
+            counts[outcome] += 1
+            if name is not None and self.winners.get(key) != name:
+                self.winners[key] = name
+                self._dirty = True
+        metrics.count("selector_plan", plan=key, outcome=outcome)
+
+    def hit_rate(self, key):
+        """Share of lookups the winner answered, once the key had one"""
+        counts = self.stats.get(key)
+        tried = counts["hit"] + counts["reprobe"] + counts["failure"] if counts else 0
+        return counts["hit"] / tried if tried else None
+
+    def save(self):
+        """Write the winners atomically if any changed this run"""
+        with self._lock:
+            if not self._dirty:
+                return
+            plans = {key: {"strategy": name, "updated": time.strftime("%Y-%m-%dT%H:%M:%S")}
+                     for key, name in sorted(self.winners.items())}
+            self._dirty = False
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(plans, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def report(self):
+        lines = []
+        with self._lock:
+            stats = {key: dict(counts) for key, counts in self.stats.items()}
+        for key, counts in sorted(stats.items()):
+            rate = self.hit_rate(key)
+            if rate is None:
+                lines.append(f"🆕 {key}: learned plan {self.winners.get(key)} ({counts['failure']} failed)")
+                continue
+            flag = "⚠️" if rate < LOW_HIT_RATE else "🎯"
+            lines.append(f"{flag} {key}: {rate:.0%} hit rate over {sum(counts.values())} lookups "
+                         f"({counts['reprobe']} re-probed, {counts['failure']} failed), "
+                         f"plan: {self.winners.get(key)}")
+        return "\n".join(lines)
+
+_plan = None
+_plan_lock = threading.Lock()
+
+def get_plan():
+    """Return the process-wide plan, loading it on first use"""
+    global _plan
+    if _plan is None:
+        with _plan_lock:
+            if _plan is None:
+                _plan = SelectorPlan()
+    return _plan
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Sync a brand's images to the FluxGym volume, transferring only what changed.
+
+The local tree (images/downloaded_images by default, or images/training
+from prepare_dataset.py) is hashed and compared against a manifest kept
+next to the remote copy (datasets/<lora>/.sync_manifest.json on the
+fluxgym-output volume). New and changed files are uploaded in parallel
+batches, files that disappeared locally are deleted remotely, and the
+manifest is written last, so an interrupted sync only repeats work. Local
+hashes are remembered by size and mtime in images/.sync_hashes_<source>.json,
+so unchanged files are not re-read.
+
+The Modal volume is one backend. A local directory is the other, standing
+in for the volume root, so a sync can be tried without Modal.
+
+    python sync_dataset.py                                   # all brands to the fluxgym-output volume
+    python sync_dataset.py chubbies --source training
+    python sync_dataset.py anf --dest /tmp/fluxgym-output --dry-run
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+try:
+    import modal
+except ImportError:  # Only needed for the volume backend; local directories work without it
+    modal = None
+
+import brands
+
+VOLUME_NAME = "fluxgym-output"
+# Where datasets live on the volume; FluxGymApp links them into /root/fluxgym/datasets and
+# output_catalog.py leaves this folder out of its runs (NON_RUN_DIRS)
+REMOTE_ROOT = "datasets"
+MANIFEST_NAME = ".sync_manifest.json"
+# prepare_dataset.py's build manifest in images/training stays local
+SKIP_NAMES = ("manifest.json",)
+
+DEFAULT_WORKERS = 8
+DEFAULT_BATCH_SIZE = 32
+
+SOURCES = {"downloaded": brands.downloads_dir, "training": brands.training_dir}
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def hash_tree(root, hashes_path, workers=DEFAULT_WORKERS):
+    """
+    {relative path: {"size", "sha256"}} for every file under root (dotfiles and manifests excluded).
+    Files whose size and mtime match the previous run reuse its hash.
+    """
+    try:
+        with open(hashes_path, "r", encoding="utf-8") as f:
+            known = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        known = {}
+
+    stats = {}
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.name.startswith(".") or entry.name in SKIP_NAMES:
+                    continue
+                if entry.is_dir():
+                    stack.append(entry.path)
+                elif entry.is_file():
+                    stat = entry.stat()
+                    stats[os.path.relpath(entry.path, root).replace(os.sep, "/")] = (stat.st_size, stat.st_mtime)
+
+    tree = {}
+    to_hash = []
+    for path, (size, mtime) in stats.items():
+        previous = known.get(path)
+        if previous and previous["size"] == size and previous["mtime"] == mtime:
+            tree[path] = {"size": size, "sha256": previous["sha256"]}
+        else:
+            to_hash.append(path)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for path, digest in zip(to_hash, pool.map(lambda path: file_sha256(os.path.join(root, path)), to_hash)):
+            tree[path] = {"size": stats[path][0], "sha256": digest}
+
+    tmp_path = hashes_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({path: dict(tree[path], mtime=stats[path][1]) for path in tree}, f, sort_keys=True)
+    os.replace(tmp_path, hashes_path)
+    return tree
+
+def plan_sync(local, remote):
+    """
+    Returns:
+        tuple: (paths to upload, paths to delete), each sorted
+    """
+    uploads = sorted(path for path, entry in local.items() if remote.get(path, {}).get("sha256") != entry["sha256"])
+    deletes = sorted(set(remote) - set(local))
+    return uploads, deletes
+
+class LocalBackend:
+    """A directory standing in for the volume root"""
+
+    def __init__(self, root):
+        self.root = root
+
+    def read(self, path):
+        """Bytes of a remote file, or None if it doesn't exist"""
+        try:
+            with open(os.path.join(self.root, path), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def write(self, path, data):
+        target = os.path.join(self.root, path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target + ".tmp", "wb") as f:
+            f.write(data)
+        os.replace(target + ".tmp", target)
+
+    def upload_batch(self, files):
+        """Copy [(local path, remote path)]"""
+        for local_path, remote_path in files:
+            target = os.path.join(self.root, remote_path)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copyfile(local_path, target + ".tmp")
+            os.replace(target + ".tmp", target)
+
+    def delete(self, path):
+        try:
+            os.remove(os.path.join(self.root, path))
+        except FileNotFoundError:
+            pass
+
+class VolumeBackend:
+    """A Modal volume, written through the Modal client from this machine"""
+
+    def __init__(self, name=VOLUME_NAME):
+        if modal is None:
+            raise RuntimeError("modal is required to sync to a volume: pip install modal (or use --dest)")
+        self.volume = modal.Volume.from_name(name, create_if_missing=True)
+
+    def read(self, path):
+        try:
+            return b"".join(self.volume.read_file(path))
+        except FileNotFoundError:
+            return None
+
+    def write(self, path, data):
+        with self.volume.batch_upload(force=True) as batch:
+            batch.put_file(io.BytesIO(data), path)
+
+    def upload_batch(self, files):
+        with self.volume.batch_upload(force=True) as batch:
+            for local_path, remote_path in files:
+                batch.put_file(local_path, remote_path)
+
+    def delete(self, path):
+        try:
+            self.volume.remove_file(path)
+        except FileNotFoundError:
+            pass
+
+def sync_brand(name, backend, source="downloaded", workers=DEFAULT_WORKERS, batch_size=DEFAULT_BATCH_SIZE,
+               dry_run=False):
+    """
+    Make datasets/<lora> on the backend match the brand's local source folder.
+
+    Returns:
+        dict: Counts of uploaded, deleted, unchanged and failed files, bytes uploaded and elapsed seconds
+    """
+    local_dir = SOURCES[source](name)
+    remote_dir = f"{REMOTE_ROOT}/{brands.BRANDS[name]['lora']}"
+    started = time.perf_counter()
+
+    local = hash_tree(local_dir, os.path.join(brands.images_dir(name), f".sync_hashes_{source}.json"), workers)
+    raw = backend.read(f"{remote_dir}/{MANIFEST_NAME}")
+    remote = json.loads(raw)["files"] if raw else {}
+    uploads, deletes = plan_sync(local, remote)
+    summary = {"uploaded": 0, "deleted": 0, "unchanged": len(local) - len(uploads), "failed": 0,
+               "bytes": sum(local[path]["size"] for path in uploads)}
+    print(f"🔄 [{name}] {len(uploads)} to upload ({summary['bytes'] / 1024 ** 2:.1f} MiB), "
+          f"{len(deletes)} to delete, {summary['unchanged']} unchanged → {remote_dir}")
+    if dry_run:
+        return summary
+
+    # Entries only move to the new manifest once their upload or delete went through
+    pending = set(uploads)
+    synced = {path: entry for path, entry in remote.items() if path in local and path not in pending}
+    batches = [uploads[start:start + batch_size] for start in range(0, len(uploads), batch_size)]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(backend.upload_batch,
+                        [(os.path.join(local_dir, path), f"{remote_dir}/{path}") for path in batch]): batch
+            for batch in batches
+        }
+        for future in as_completed(futures):
+            batch = futures[future]
+            try:
+                future.result()
+            except Exception as e:
+                summary["failed"] += len(batch)
+                print(f"❌ [{name}] Failed to upload {len(batch)} file(s) starting at {batch[0]}: {e}")
+                continue
+            summary["uploaded"] += len(batch)
+            for path in batch:
+                synced[path] = local[path]
+
+        for path, future in [(path, pool.submit(backend.delete, f"{remote_dir}/{path}")) for path in deletes]:
+            try:
+                future.result()
+                summary["deleted"] += 1
+            except Exception as e:
+                synced[path] = remote[path]
+                summary["failed"] += 1
+                print(f"❌ [{name}] Failed to delete {path}: {e}")
+
+    backend.write(f"{remote_dir}/{MANIFEST_NAME}",
+                  json.dumps({"source": source, "synced_at": time.time(), "files": synced}, sort_keys=True).encode("utf-8"))
+    summary["seconds"] = round(time.perf_counter() - started, 3)
+    print(f"📊 [{name}] {summary['uploaded']} uploaded, {summary['deleted']} deleted, "
+          f"{summary['unchanged']} unchanged, {summary['failed']} failed in {summary['seconds']}s")
+    return summary
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("brands", nargs="*", help=f"Brands to sync: {', '.join(brands.BRANDS)} (default: all)")
+    parser.add_argument("--source", choices=sorted(SOURCES), default="downloaded",
+                        help="images/downloaded_images, or images/training from prepare_dataset.py (images + captions)")
+    parser.add_argument("--volume", default=VOLUME_NAME, help="Modal volume to sync to")
+    parser.add_argument("--dest", default=None, help="Local directory standing in for the volume root (no Modal)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Parallel hash and upload workers")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Files per upload batch")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would be transferred")
+    args = parser.parse_args()
+    unknown = [name for name in args.brands if name not in brands.BRANDS]
+    if unknown:
+        parser.error(f"unknown brand(s): {', '.join(unknown)}")
+    return args
+
+def main():
+    args = parse_args()
+    if args.dest:
+        backend = LocalBackend(args.dest)
+    else:
+        try:
+            backend = VolumeBackend(args.volume)
+        except RuntimeError as e:
+            raise SystemExit(f"❌ {e}")
+    for name in args.brands or list(brands.BRANDS):
+        if not os.path.isdir(SOURCES[args.source](name)):
+            print(f"⚠️ [{name}] Nothing to sync: {SOURCES[args.source](name)} doesn't exist")
+            continue
+        sync_brand(name, backend, args.source, args.workers, args.batch_size, args.dry_run)
+
+if __name__ == "__main__":
+    main()
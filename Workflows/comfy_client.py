@@ -0,0 +1,437 @@
+#!/usr/bin/env python3
+"""
+Batch generation against a ComfyUI server using the workflows in this folder.
+
+Each job is a workflow with its prompt (node 6), sampler seed / steps /
+denoise (node 3), LoRA name / strength (node 15) and reference image
+(node 23) patched in. Jobs are submitted to ComfyUI's /prompt queue with at
+most --max-in-flight queued at a time. Completion is tracked by polling
+/queue and then /history for the prompts that left it, and output images are
+downloaded in parallel while later jobs are still generating. --batch-size
+merges that many jobs into one prompt that shares the loader and encoder
+nodes (see workflow_compiler.py). Jobs whose graph was generated before are
+served from the result cache without reaching the server (result_cache.py).
+
+    python comfy_client.py fluxdev_chunkiesstyle --prompts ../chubbiesstylelora/sample_prompts.txt --variants 4
+    python comfy_client.py fluxdev_chunkiesstyle_with_ref_img --jobs jobs.jsonl --server http://gpu-box:8188
+    python comfy_client.py fluxdev_abercrombiestyle --prompts prompts.txt --standin   # no GPU: local stand-in server
+
+A jobs file has one JSON object per line with any of: id, text, seed, steps,
+denoise, lora_name, strength_model, image. A local image (or the name of one in
+"Latent Images") is resized to the workflow's reference size and uploaded
+once under a content-hashed name (see reference_images.py).
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from reference_images import ReferenceCache
+from result_cache import DEFAULT_MAX_BYTES, ResultCache
+from workflow_compiler import compile_batches
+from workflow_graph import IMAGE_NODE, PATCHES, load_workflow, output_nodes, patch_graph
+
+DEFAULT_SERVER = "http://127.0.0.1:8188"
+DEFAULT_MAX_IN_FLIGHT = 4
+DEFAULT_DOWNLOAD_WORKERS = 8
+POLL_INTERVAL = 0.5
+# Give up on a prompt that hasn't finished this long after it was queued
+JOB_TIMEOUT = 1800
+# Give up on the batch after this many polls in a row fail (server down or unreachable)
+MAX_POLL_ERRORS = 20
+OUTPUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "batch_outputs")
+
+class ComfyError(Exception):
+    """ComfyUI rejected a prompt or reported an execution error"""
+
+class ComfyClient:
+    """Thin client for the ComfyUI HTTP API (/prompt, /queue, /history, /view, /upload/image)"""
+
+    def __init__(self, server=DEFAULT_SERVER, pool_size=DEFAULT_DOWNLOAD_WORKERS + 2, timeout=30):
+        self.server = server.rstrip("/")
+        self.timeout = timeout
+        self.client_id = uuid.uuid4().hex
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def submit(self, graph):
+        """Queue a graph and return its prompt_id"""
+        response = self.session.post(f"{self.server}/prompt", json={"prompt": graph, "client_id": self.client_id},
+                                     timeout=self.timeout)
+        if response.status_code == 400:
+            body = response.json()
+            error = body.get("error")
+            message = error.get("message") if isinstance(error, dict) else error
+            raise ComfyError(f"{message or 'invalid prompt'}: {json.dumps(body.get('node_errors', {}))}")
+        response.raise_for_status()
+        return response.json()["prompt_id"]
+
+    def queued_ids(self):
+        """prompt_ids still running or waiting in the queue"""
+        response = self.session.get(f"{self.server}/queue", timeout=self.timeout)
+        response.raise_for_status()
+        queue = response.json()
+        return {item[1] for key in ("queue_running", "queue_pending") for item in queue.get(key, [])}
+
+    def history(self, prompt_id):
+        """The prompt's history entry, or None while it has none"""
+        response = self.session.get(f"{self.server}/history/{prompt_id}", timeout=self.timeout)
+        response.raise_for_status()
+        return response.json().get(prompt_id)
+
+    def download(self, image, path):
+        """Save one output image ({filename, subfolder, type}) to path atomically"""
+        params = {"filename": image["filename"], "subfolder": image.get("subfolder", ""), "type": image.get("type", "output")}
+        tmp_path = path + ".part"
+        with self.session.get(f"{self.server}/view", params=params, stream=True, timeout=self.timeout) as response:
+            response.raise_for_status()
+            with open(tmp_path, "wb") as f:
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    f.write(chunk)
+        os.replace(tmp_path, path)
+        return os.path.getsize(path)
+
+    def upload_image(self, path, name=None):
+        """Upload a reference image to ComfyUI's input folder and return the name LoadImage should use"""
+        with open(path, "rb") as f:
+            response = self.session.post(
+                f"{self.server}/upload/image",
+                files={"image": (name or os.path.basename(path), f)},
+                data={"overwrite": "true", "type": "input"},
+                timeout=self.timeout,
+            )
+        response.raise_for_status()
+        body = response.json()
+        return f"{body['subfolder']}/{body['name']}" if body.get("subfolder") else body["name"]
+
+    def has_input(self, name):
+        """Whether the server's input folder already holds a file called name"""
+        response = self.session.head(f"{self.server}/view", params={"filename": name, "type": "input"},
+                                     timeout=self.timeout)
+        return response.status_code == 200
+
+def upload_reference_images(client, workflow, jobs):
+    """Replace local reference images in jobs with prepared, uploaded names (see reference_images.py)"""
+    references = ReferenceCache(client, workflow)
+    loader = workflow.get(IMAGE_NODE, {})
+    # The workflow's own reference (e.g. "plain shorts.jpg") is one of the Latent Images
+    default = loader.get("inputs", {}).get("image") if loader.get("class_type") == "LoadImage" else None
+    for job in jobs:
+        image = job.get("image") or default
+        if image:
+            job["image"] = references.server_name(image)
+    if references.names:
+        stats = references.stats
+        print(f"🖼️ References: {len(references.names)} distinct, {stats['uploaded']} uploaded "
+              f"({stats['bytes_uploaded'] / 1024:.0f} KiB), {stats['already_on_server']} already on the server")
+
+def build_graph(workflow, job):
+    inputs = {name: job.get(name) for name in PATCHES if name != "filename_prefix"}
+    # A prefix per job keeps outputs of concurrent jobs apart on the server
+    return patch_graph(workflow, filename_prefix=f"batch/{job['id']}", **inputs)
+
+def job_outputs(entry, node_ids):
+    """Output images of a finished history entry for the given SaveImage nodes, in order"""
+    outputs = entry.get("outputs", {})
+    return [image for node_id in node_ids for image in outputs.get(node_id, {}).get("images", [])]
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))]
+
+def run_batch(client, workflow, jobs, out_dir=OUTPUT_DIR, max_in_flight=DEFAULT_MAX_IN_FLIGHT,
+              download_workers=DEFAULT_DOWNLOAD_WORKERS, poll_interval=POLL_INTERVAL, job_timeout=JOB_TIMEOUT,
+              batch_size=1, cache=None, max_poll_errors=MAX_POLL_ERRORS):
+    """
+    Generate every job, keeping at most max_in_flight prompts queued on the server.
+    With batch_size > 1, that many jobs are merged into one prompt (workflow_compiler).
+    With a ResultCache, jobs it already holds are copied from it and only misses are queued.
+    A prompt that hasn't finished job_timeout seconds after it was queued times out, and after
+    max_poll_errors failed polls in a row every remaining job fails.
+
+    Returns:
+        list: One result per job (id, prompt_id, status, seconds, files, error), in job order
+    """
+    os.makedirs(out_dir, exist_ok=True)
+
+    results = [None] * len(jobs)
+    downloads = []
+
+    def finish(index, **result):
+        results[index] = dict({"id": jobs[index]["id"], "files": [], "error": None}, **result)
+
+    # Until references are uploaded, LoadImage holds the local file; cache keys use its content hash
+    graphs = []
+    for index, job in enumerate(jobs):
+        try:
+            graphs.append((index, build_graph(workflow, job)))
+        except ValueError as e:
+            print(f"❌ {job['id']}: not queued: {e}")
+            finish(index, prompt_id=None, status="rejected", seconds=0.0, error=str(e))
+
+    keys = {}
+    repeats = []  # (job index, earlier job with the same key, whose images it reuses)
+    if cache is not None:
+        misses = []
+        first_with_key = {}
+        for index, graph in graphs:
+            key = cache.key(graph)
+            if key is None:
+                misses.append((index, graph))
+                continue
+            keys[index] = key
+            if key in first_with_key:
+                repeats.append((index, first_with_key[key]))
+                continue
+            files = cache.fetch(key, out_dir, jobs[index]["id"])
+            if files is None:
+                first_with_key[key] = index
+                misses.append((index, graph))
+            else:
+                finish(index, prompt_id=None, status="cached", seconds=0.0, files=files)
+                print(f"♻️ {jobs[index]['id']}: {len(files)} image(s) from the result cache")
+        graphs = misses
+
+    # Only jobs that will actually run need their reference images on the server
+    queued_jobs = [jobs[index] for index, _ in graphs]
+    if queued_jobs:
+        upload_reference_images(client, workflow, queued_jobs)
+        graphs = [(index, build_graph(workflow, jobs[index])) for index, _ in graphs]
+
+    # Each unit is one prompt: (graph, [(job index, its output node ids)])
+    if batch_size > 1:
+        units = [
+            (merged, [(graphs[position][0], node_ids) for position, node_ids in members])
+            for merged, members in compile_batches([graph for _, graph in graphs], batch_size)
+        ]
+    else:
+        units = [(graph, [(index, output_nodes(graph))]) for index, graph in graphs]
+
+    pending = deque(units)
+    in_flight = {}  # prompt_id -> (unit, queued_at)
+    poll_errors = 0
+
+    with ThreadPoolExecutor(max_workers=download_workers) as pool:
+        while pending or in_flight:
+            while pending and len(in_flight) < max_in_flight:
+                unit = pending.popleft()
+                graph, members = unit
+                try:
+                    prompt_id = client.submit(graph)
+                except (ComfyError, requests.RequestException) as e:
+                    for index, _ in members:
+                        print(f"❌ {jobs[index]['id']}: not queued: {e}")
+                        finish(index, prompt_id=None, status="rejected", seconds=0.0, error=str(e))
+                    continue
+                in_flight[prompt_id] = (unit, time.perf_counter())
+
+            time.sleep(poll_interval)
+            poll_error = None
+            try:
+                queued = client.queued_ids()
+            except requests.RequestException as e:
+                print(f"⚠️ Queue poll failed: {e}")
+                poll_error = e
+                queued = None
+
+            for prompt_id in [prompt_id for prompt_id in in_flight if queued is not None and prompt_id not in queued]:
+                (graph, members), queued_at = in_flight[prompt_id]
+                seconds = time.perf_counter() - queued_at
+                try:
+                    entry = client.history(prompt_id)
+                except requests.RequestException as e:
+                    print(f"⚠️ History poll failed for {prompt_id}: {e}")
+                    poll_error = e
+                    continue
+                if entry is None:
+                    # Left the queue but not in history yet, or lost (server restarted); timed out below
+                    continue
+
+                del in_flight[prompt_id]
+                status = entry.get("status", {})
+                if status.get("status_str") == "error":
+                    messages = [message for message in status.get("messages", []) if message[0] == "execution_error"]
+                    error = messages[0][1].get("exception_message", "execution error") if messages else "execution error"
+                    for index, _ in members:
+                        print(f"❌ {jobs[index]['id']}: {error}")
+                        finish(index, prompt_id=prompt_id, status="error", seconds=seconds, error=error)
+                    continue
+
+                for index, node_ids in members:
+                    images = job_outputs(entry, node_ids)
+                    files = []
+                    for n, image in enumerate(images):
+                        extension = os.path.splitext(image["filename"])[1] or ".png"
+                        path = os.path.join(out_dir, f"{jobs[index]['id']}_{n:02d}{extension}")
+                        files.append(path)
+                        downloads.append((index, path, pool.submit(client.download, image, path)))
+                    finish(index, prompt_id=prompt_id, status="done", seconds=seconds, files=files)
+                    print(f"✅ {jobs[index]['id']}: {len(images)} image(s) in {seconds:.1f}s")
+
+            # Applies whatever the poll returned: still queued, lost, or the server not answering
+            for prompt_id, ((_, members), queued_at) in list(in_flight.items()):
+                seconds = time.perf_counter() - queued_at
+                if seconds > job_timeout:
+                    del in_flight[prompt_id]
+                    for index, _ in members:
+                        print(f"❌ {jobs[index]['id']}: not finished after {seconds:.0f}s")
+                        finish(index, prompt_id=prompt_id, status="timeout", seconds=seconds,
+                               error=f"not finished after {job_timeout}s")
+
+            poll_errors = poll_errors + 1 if poll_error else 0
+            if poll_errors >= max_poll_errors:
+                error = f"server unreachable ({poll_errors} failed polls in a row): {poll_error}"
+                print(f"❌ Giving up on {len(in_flight) + len(pending)} remaining prompt(s): {error}")
+                for prompt_id, ((_, members), queued_at) in in_flight.items():
+                    for index, _ in members:
+                        finish(index, prompt_id=prompt_id, status="error",
+                               seconds=time.perf_counter() - queued_at, error=error)
+                for _, members in pending:
+                    for index, _ in members:
+                        finish(index, prompt_id=None, status="rejected", seconds=0.0, error=error)
+                in_flight.clear()
+                pending.clear()
+
+        for index, path, future in downloads:
+            try:
+                future.result()
+            except (requests.RequestException, OSError) as e:
+                print(f"❌ Failed to download {path}: {e}")
+                results[index]["files"].remove(path)
+                results[index]["error"] = f"download failed: {e}"
+
+    if cache is not None:
+        for index, key in keys.items():
+            if results[index] and results[index]["status"] == "done" and results[index]["files"] \
+                    and not results[index]["error"]:
+                cache.store(key, results[index]["files"])
+        for index, original in repeats:
+            source = results[original]
+            if source["status"] != "done" or source["error"]:
+                finish(index, prompt_id=source["prompt_id"], status=source["status"], seconds=0.0, error=source["error"])
+                continue
+            files = []
+            for n, path in enumerate(source["files"]):
+                target = os.path.join(out_dir, f"{jobs[index]['id']}_{n:02d}{os.path.splitext(path)[1]}")
+                shutil.copyfile(path, target)
+                files.append(target)
+            finish(index, prompt_id=source["prompt_id"], status="cached", seconds=0.0, files=files)
+
+    return results
+
+def load_jobs(args):
+    """Jobs from --jobs, or one per prompt line times --variants seeds"""
+    if args.jobs:
+        with open(args.jobs, "r", encoding="utf-8") as f:
+            jobs = [json.loads(line) for line in f if line.strip()]
+    else:
+        with open(args.prompts, "r", encoding="utf-8") as f:
+            prompts = [line.strip() for line in f if line.strip()]
+        base_seed = args.seed if args.seed is not None else random.randrange(2 ** 48)
+        jobs = [
+            {"text": prompt, "seed": base_seed + variant}
+            for prompt in prompts
+            for variant in range(args.variants)
+        ]
+
+    overrides = {"steps": args.steps, "denoise": args.denoise, "lora_name": args.lora,
+                 "strength_model": args.strength, "image": args.image}
+    for index, job in enumerate(jobs):
+        for name, value in overrides.items():
+            if value is not None:
+                job.setdefault(name, value)
+        job.setdefault("id", f"{index:04d}" + (f"_{job['seed']}" if job.get("seed") is not None else ""))
+    return jobs
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("workflow", help="Workflow name in this folder (e.g. fluxdev_chunkiesstyle) or a path")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--prompts", help="Text file with one prompt per line")
+    source.add_argument("--jobs", help="JSONL file with one job per line")
+    parser.add_argument("--variants", type=int, default=1, help="Seeds per prompt (consecutive from --seed)")
+    parser.add_argument("--seed", type=int, default=None, help="First seed (default: random)")
+    parser.add_argument("--steps", type=int, default=None)
+    parser.add_argument("--denoise", type=float, default=None)
+    parser.add_argument("--lora", default=None, help="LoRA file name for node 15")
+    parser.add_argument("--strength", type=float, default=None, help="LoRA strength_model for node 15")
+    parser.add_argument("--image", default=None, help="Reference image (local file or ComfyUI input name) for node 23")
+    parser.add_argument("--server", default=DEFAULT_SERVER, help="ComfyUI base URL")
+    parser.add_argument("--standin", action="store_true",
+                        help="Start a local stand-in ComfyUI server (comfy_standin.py) and run against it")
+    parser.add_argument("--max-in-flight", type=int, default=DEFAULT_MAX_IN_FLIGHT,
+                        help="Prompts queued on the server at once")
+    parser.add_argument("--batch-size", type=int, default=1,
+                        help="Jobs merged into one prompt, sharing loaders and encoders (workflow_compiler.py)")
+    parser.add_argument("--download-workers", type=int, default=DEFAULT_DOWNLOAD_WORKERS)
+    parser.add_argument("--out", default=OUTPUT_DIR, help="Where generated images are saved")
+    parser.add_argument("--no-cache", action="store_true", help="Generate every job even if its result is cached")
+    parser.add_argument("--cache-max-mb", type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024),
+                        help="Result cache size before least recently used results are evicted")
+    parser.add_argument("--models-dir", default=None,
+                        help="Local copy of the server's ComfyUI models folder; the result cache keys on file "
+                             "digests from it, and jobs whose models aren't there bypass the cache")
+    parser.add_argument("--cache-by-name", action="store_true",
+                        help="Key the result cache on model/LoRA names when there is no digest "
+                             "(stale images if a file is retrained under the same name)")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    workflow = load_workflow(args.workflow)
+    jobs = load_jobs(args)
+
+    server = None
+    if args.standin:
+        from comfy_standin import StandinServer
+        server = StandinServer().start()
+        args.server = server.url
+        print(f"🧪 Stand-in ComfyUI at {server.url}")
+
+    client = ComfyClient(args.server, pool_size=args.download_workers + 2)
+    cache = None if args.no_cache else ResultCache(max_bytes=args.cache_max_mb * 1024 * 1024,
+                                                   models_dir=args.models_dir, by_name=args.cache_by_name)
+    print(f"🚀 {len(jobs)} jobs on {args.server}, up to {args.max_in_flight} prompts in flight"
+          + (f", {args.batch_size} jobs per prompt" if args.batch_size > 1 else ""))
+    started = time.perf_counter()
+    try:
+        results = run_batch(client, workflow, jobs, args.out, args.max_in_flight, args.download_workers,
+                            batch_size=args.batch_size, cache=cache)
+    finally:
+        if server is not None:
+            server.shutdown()
+    elapsed = time.perf_counter() - started
+
+    results_path = os.path.join(args.out, "results.json")
+    with open(results_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    os.replace(results_path + ".tmp", results_path)
+
+    done = [result for result in results if result["status"] in ("done", "cached")]
+    latencies = sorted(result["seconds"] for result in done if result["status"] == "done")
+    files = sum(len(result["files"]) for result in results)
+    print(f"\n📊 {len(done)}/{len(jobs)} jobs done, {files} images in {elapsed:.1f}s "
+          f"({len(done) / elapsed * 60:.1f} jobs/min)")
+    if latencies:
+        print(f"⏱️ Queue-to-done p50 {percentile(latencies, 50):.1f}s, p95 {percentile(latencies, 95):.1f}s")
+    if cache is not None:
+        stats = cache.stats()
+        print(f"♻️ Result cache: {stats['hit']} hit(s), {stats['miss']} miss(es) ({stats['hit_rate']:.0%}), "
+              f"{stats['uncached']} without digests, "
+              f"{stats['entries']} results in {stats['bytes'] / 1024 ** 2:.1f} MiB, {stats['evicted']} evicted")
+    print(f"📝 Results written to {results_path}")
+
+if __name__ == "__main__":
+    main()
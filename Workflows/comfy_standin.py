@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for a ComfyUI server, for load-testing comfy_client.py without a GPU.
+
+Implements the parts of the ComfyUI HTTP API the client uses (POST /prompt,
+GET /queue, GET /history/<id>, GET|HEAD /view, POST /upload/image) with ComfyUI's
+response shapes. Prompts are validated the way ComfyUI rejects them (unknown
+links, missing LoadImage files), queued, and "executed" by --gpu-workers
+threads that sleep --prompt-overhead per prompt plus --step-time per step of
+every sampler in it, then save one flat PNG per SaveImage batch item,
+coloured by the seed. --error-rate makes a share of prompts fail during
+execution.
+
+    python comfy_standin.py --port 8188 --step-time 0.05
+    python comfy_client.py fluxdev_chunkiesstyle --prompts prompts.txt --server http://127.0.0.1:8188
+"""
+
+import argparse
+import json
+import os
+import queue
+import random
+import struct
+import sys
+import threading
+import time
+import uuid
+import zlib
+from email.parser import BytesParser
+from email.policy import default as default_policy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+WORKFLOWS_DIR = os.path.dirname(os.path.abspath(__file__))
+# Reference images the workflows point at out of the box
+INPUT_DIR = os.path.join(WORKFLOWS_DIR, "Latent Images")
+
+DEFAULT_PORT = 8188
+DEFAULT_STEP_TIME = 0.05
+# Per-prompt cost outside the samplers: validation, cache checks, model (re)loads
+DEFAULT_PROMPT_OVERHEAD = 0.1
+DEFAULT_SIZE = 512
+
+def png_bytes(width, height, color):
+    """A flat-colour RGB PNG, built without an imaging library"""
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+    row = b"\x00" + bytes(color) * width
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(row * height, 1))
+        + chunk(b"IEND", b"")
+    )
+
+def validate(graph, inputs):
+    """ComfyUI-style node_errors for a prompt (empty when it would be accepted)"""
+    errors = {}
+    for node_id, node in graph.items():
+        problems = []
+        if not isinstance(node, dict) or "class_type" not in node:
+            errors[node_id] = {"errors": [{"type": "invalid_node", "message": "Node has no class_type"}]}
+            continue
+        for name, value in node.get("inputs", {}).items():
+            if isinstance(value, list) and len(value) == 2 and str(value[0]) not in graph:
+                problems.append({"type": "invalid_link", "message": f"Input '{name}' links to missing node {value[0]}"})
+        if node["class_type"] == "LoadImage" and node["inputs"].get("image") not in inputs:
+            problems.append({"type": "custom_validation_failed",
+                             "message": f"Invalid image file: {node['inputs'].get('image')}"})
+        if problems:
+            errors[node_id] = {"errors": problems, "class_type": node["class_type"]}
+    return errors
+
+class StandinServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port=0, gpu_workers=1, step_time=DEFAULT_STEP_TIME, error_rate=0.0, seed=0,
+                 prompt_overhead=DEFAULT_PROMPT_OVERHEAD):
+        super().__init__(("127.0.0.1", port), StandinHandler)
+        self.url = f"http://127.0.0.1:{self.server_address[1]}"
+        self.step_time = step_time
+        self.prompt_overhead = prompt_overhead
+        self.error_rate = error_rate
+        self.gpu_workers = gpu_workers
+        self.inputs = {}
+        if os.path.isdir(INPUT_DIR):
+            self.inputs = {name: None for name in os.listdir(INPUT_DIR)}  # served from disk on demand
+        self.files = {}          # (type, subfolder, filename) -> bytes
+        self.history = {}        # prompt_id -> history entry
+        self.pending = []        # queue entries, in order
+        self.running = {}        # prompt_id -> queue entry
+        self.counters = {"prompts": 0, "rejected": 0, "executed": 0, "failed": 0, "max_queue_depth": 0}
+        self._work = queue.Queue()
+        self._lock = threading.Lock()
+        self._number = 0
+        self._save_counter = 0
+        self._random = random.Random(seed)
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        for _ in range(self.gpu_workers):
+            threading.Thread(target=self._execute_loop, daemon=True).start()
+        return self
+
+    def enqueue(self, graph, client_id):
+        with self._lock:
+            prompt_id = str(uuid.uuid4())
+            number = self._number
+            self._number += 1
+            entry = [number, prompt_id, graph, {"client_id": client_id}, sorted(
+                node_id for node_id, node in graph.items() if node["class_type"] == "SaveImage")]
+            self.pending.append(entry)
+            self.counters["prompts"] += 1
+            self.counters["max_queue_depth"] = max(self.counters["max_queue_depth"],
+                                                  len(self.pending) + len(self.running))
+        self._work.put(prompt_id)
+        return prompt_id, number
+
+    def queue_snapshot(self):
+        with self._lock:
+            return {"queue_running": list(self.running.values()), "queue_pending": list(self.pending)}
+
+    def _execute_loop(self):
+        while True:
+            prompt_id = self._work.get()
+            with self._lock:
+                entry = next(item for item in self.pending if item[1] == prompt_id)
+                self.pending.remove(entry)
+                self.running[prompt_id] = entry
+                fail = self._random.random() < self.error_rate
+            graph = entry[2]
+            samplers = [node["inputs"] for node in graph.values() if node["class_type"] == "KSampler"]
+            time.sleep(self.prompt_overhead + self.step_time * sum(sampler.get("steps", 20) for sampler in samplers))
+
+            started = int(time.time() * 1000)
+            if fail:
+                result = {
+                    "outputs": {},
+                    "status": {"status_str": "error", "completed": False, "messages": [
+                        ["execution_start", {"prompt_id": prompt_id, "timestamp": started}],
+                        ["execution_error", {"prompt_id": prompt_id, "node_id": "3", "node_type": "KSampler",
+                                             "exception_message": "Injected stand-in failure",
+                                             "exception_type": "RuntimeError"}],
+                    ]},
+                }
+            else:
+                result = {"outputs": self._save_outputs(graph), "status": {
+                    "status_str": "success", "completed": True, "messages": [
+                        ["execution_start", {"prompt_id": prompt_id, "timestamp": started}],
+                        ["execution_success", {"prompt_id": prompt_id, "timestamp": int(time.time() * 1000)}],
+                    ]}}
+            with self._lock:
+                del self.running[prompt_id]
+                self.history[prompt_id] = dict(result, prompt=entry, meta={})
+                self.counters["failed" if fail else "executed"] += 1
+
+    def _image_size(self, graph):
+        for node in graph.values():
+            if node["class_type"] in ("EmptyLatentImage", "ImageScale"):
+                return node["inputs"].get("width", DEFAULT_SIZE), node["inputs"].get("height", DEFAULT_SIZE), \
+                    node["inputs"].get("batch_size", 1)
+        return DEFAULT_SIZE, DEFAULT_SIZE, 1
+
+    def _seed_for(self, graph, node_id):
+        """Seed of the first sampler upstream of a node"""
+        node = graph[node_id]
+        if node["class_type"] == "KSampler":
+            return node["inputs"].get("seed", 0)
+        for value in node["inputs"].values():
+            if isinstance(value, list) and len(value) == 2 and str(value[0]) in graph:
+                seed = self._seed_for(graph, str(value[0]))
+                if seed is not None:
+                    return seed
+        return None
+
+    def _save_outputs(self, graph):
+        width, height, batch_size = self._image_size(graph)
+        outputs = {}
+        for node_id, node in graph.items():
+            if node["class_type"] != "SaveImage":
+                continue
+            body = png_bytes(width, height, random.Random(self._seed_for(graph, node_id) or 0).randbytes(3))
+            subfolder, _, prefix = node["inputs"].get("filename_prefix", "ComfyUI").rpartition("/")
+            images = []
+            for _ in range(batch_size):
+                with self._lock:
+                    self._save_counter += 1
+                    filename = f"{prefix}_{self._save_counter:05d}_.png"
+                    self.files[("output", subfolder, filename)] = body
+                images.append({"filename": filename, "subfolder": subfolder, "type": "output"})
+            outputs[node_id] = {"images": images}
+        return outputs
+
+    def read_file(self, kind, subfolder, filename):
+        with self._lock:
+            body = self.files.get((kind, subfolder, filename))
+        if body is None and kind == "input" and not subfolder and filename in self.inputs:
+            with open(os.path.join(INPUT_DIR, filename), "rb") as f:
+                body = f.read()
+        return body
+
+    def handle_error(self, request, client_address):
+        # Clients close keep-alive connections when they exit
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+class StandinHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def send_json(self, body, status=200):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(data)
+
+    def read_body(self):
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/queue":
+            return self.send_json(self.server.queue_snapshot())
+        if url.path.startswith("/history/"):
+            prompt_id = url.path[len("/history/"):]
+            with self.server._lock:
+                entry = self.server.history.get(prompt_id)
+            return self.send_json({prompt_id: entry} if entry else {})
+        if url.path == "/view":
+            params = {key: values[0] for key, values in parse_qs(url.query).items()}
+            body = self.server.read_file(params.get("type", "output"), params.get("subfolder", ""), params.get("filename", ""))
+            if body is None:
+                return self.send_json({"error": "not found"}, 404)
+            self.send_response(200)
+            self.send_header("Content-Type", "image/png")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if self.command != "HEAD":
+                self.wfile.write(body)
+            return
+        self.send_json({"error": "not found"}, 404)
+
+    do_HEAD = do_GET
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path == "/prompt":
+            try:
+                payload = json.loads(self.read_body())
+                graph = payload["prompt"]
+            except (ValueError, KeyError, TypeError):
+                return self.send_json({"error": {"type": "invalid_prompt", "message": "Invalid prompt"},
+                                       "node_errors": {}}, 400)
+            node_errors = validate(graph, self.server.inputs)
+            if node_errors:
+                with self.server._lock:
+                    self.server.counters["rejected"] += 1
+                return self.send_json({"error": {"type": "prompt_outputs_failed_validation",
+                                                 "message": "Prompt outputs failed validation"},
+                                       "node_errors": node_errors}, 400)
+            prompt_id, number = self.server.enqueue(graph, payload.get("client_id"))
+            return self.send_json({"prompt_id": prompt_id, "number": number, "node_errors": {}})
+        if url.path == "/upload/image":
+            message = BytesParser(policy=default_policy).parsebytes(
+                f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode("utf-8") + self.read_body())
+            fields = {}
+            upload = None
+            for part in message.iter_parts():
+                if part.get_filename():
+                    upload = (part.get_filename(), part.get_payload(decode=True))
+                else:
+                    fields[part.get_param("name", header="content-disposition")] = part.get_content().strip()
+            if upload is None:
+                return self.send_json({"error": "no image"}, 400)
+            name, body = upload
+            subfolder = fields.get("subfolder", "")
+            with self.server._lock:
+                self.server.files[("input", subfolder, name)] = body
+                self.server.inputs[f"{subfolder}/{name}" if subfolder else name] = None
+            return self.send_json({"name": name, "subfolder": subfolder, "type": "input"})
+        self.send_json({"error": "not found"}, 404)
+
+    def log_message(self, format, *args):
+        pass
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--gpu-workers", type=int, default=1, help="Prompts executed at once")
+    parser.add_argument("--step-time", type=float, default=DEFAULT_STEP_TIME, help="Seconds per sampler step")
+    parser.add_argument("--prompt-overhead", type=float, default=DEFAULT_PROMPT_OVERHEAD,
+                        help="Seconds per prompt on top of sampling")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of prompts that fail while executing")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for error injection")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    server = StandinServer(args.port, args.gpu_workers, args.step_time, args.error_rate, args.seed,
+                           args.prompt_overhead).start()
+    print(f"🧪 Stand-in ComfyUI listening on {server.url} ({args.gpu_workers} worker(s), {args.step_time}s/step)")
+    try:
+        while True:
+            time.sleep(10)
+            print(f"📊 {server.counters}")
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Reference images for the *_with_ref_img workflows, prepared once and uploaded once.
+
+Those workflows load a garment photo (LoadImage, node 23) and scale it to
+the latent size on the server (ImageScale, node 26) before VAEEncode. Here
+the scaling happens locally instead, once per distinct image: the photo is
+resized the way its ImageScale node would, encoded as a JPEG and stored
+under a name derived from the source's content hash and the target size,
+in CACHE_DIR. A session uploads each prepared image at most once, and not
+at all when the server already has a file with that name, since the name
+can only ever refer to that content. The job's LoadImage input is then
+rewritten to the cached name.
+
+Usage:
+    references = ReferenceCache(client, workflow)
+    job["image"] = references.server_name("Latent Images/grey top.jpg")
+"""
+
+import hashlib
+import os
+import threading
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # references are then uploaded as they are
+    Image = None
+
+from workflow_graph import IMAGE_NODE, WORKFLOWS_DIR
+
+CACHE_DIR = os.path.join(WORKFLOWS_DIR, ".ref_cache")
+# Reference photos that ship with the repository; bare names are looked up here
+LATENT_IMAGES_DIR = os.path.join(WORKFLOWS_DIR, "Latent Images")
+
+JPEG_QUALITY = 95
+
+RESAMPLING = {
+    "nearest-exact": "NEAREST",
+    "bilinear": "BILINEAR",
+    "area": "BOX",
+    "bicubic": "BICUBIC",
+    "lanczos": "LANCZOS",
+}
+
+def reference_size(graph, node_id=IMAGE_NODE):
+    """
+    (width, height, upscale_method, crop) of the ImageScale fed by the LoadImage
+    node, or None when the image is used at its own size.
+    """
+    for node in graph.values():
+        if node["class_type"] == "ImageScale" and node["inputs"].get("image") == [node_id, 0]:
+            inputs = node["inputs"]
+            return inputs["width"], inputs["height"], inputs.get("upscale_method", "lanczos"), inputs.get("crop", "disabled")
+    return None
+
+def local_reference(image):
+    """Path of a local reference image for a job's image value, or None for server-side names"""
+    if not image:
+        return None
+    for path in (image, os.path.join(LATENT_IMAGES_DIR, image)):
+        if os.path.isfile(path):
+            return os.path.abspath(path)
+    return None
+
+def file_hash(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def prepare_reference(path, size, cache_dir=CACHE_DIR):
+    """
+    Resize path like ImageScale would and cache it by content hash.
+
+    Returns:
+        str: The prepared file (the source itself when no resizing applies)
+    """
+    if size is None or Image is None:
+        return path
+    width, height, method, crop = size
+    digest = file_hash(path)
+    prepared = os.path.join(cache_dir, f"ref_{digest[:20]}_{width}x{height}_{method}_{crop}.jpg")
+    if os.path.exists(prepared):
+        return prepared
+
+    os.makedirs(cache_dir, exist_ok=True)
+    resample = getattr(Image.Resampling, RESAMPLING.get(method, "LANCZOS"))
+    with Image.open(path) as image:
+        image = ImageOps.exif_transpose(image).convert("RGB")
+        if crop == "center":
+            image = ImageOps.fit(image, (width, height), method=resample)
+        else:
+            image = image.resize((width, height), resample)
+        tmp_path = prepared + ".tmp"
+        image.save(tmp_path, "JPEG", quality=JPEG_QUALITY, subsampling=0)
+    os.replace(tmp_path, prepared)
+    return prepared
+
+class ReferenceCache:
+    """Maps local reference images to names on one ComfyUI server, uploading each once"""
+
+    def __init__(self, client, workflow, cache_dir=CACHE_DIR):
+        self.client = client
+        self.size = reference_size(workflow)
+        self.cache_dir = cache_dir
+        self.names = {}  # source path -> server name
+        self.stats = {"prepared": 0, "uploaded": 0, "already_on_server": 0, "bytes_uploaded": 0}
+        self._lock = threading.Lock()
+
+    def server_name(self, image):
+        """The LoadImage value for a job's image: cached name for local files, unchanged otherwise"""
+        path = local_reference(image)
+        if path is None:
+            return image
+        with self._lock:
+            if path in self.names:
+                return self.names[path]
+
+            prepared = prepare_reference(path, self.size, self.cache_dir)
+            if prepared != path:
+                self.stats["prepared"] += 1
+                name = os.path.basename(prepared)
+            else:
+                # Unprepared uploads still get a content-addressed name
+                name = f"ref_{file_hash(path)[:20]}{os.path.splitext(path)[1].lower()}"
+
+            if self.client.has_input(name):
+                self.stats["already_on_server"] += 1
+            else:
+                self.client.upload_image(prepared, name)
+                self.stats["uploaded"] += 1
+                self.stats["bytes_uploaded"] += os.path.getsize(prepared)
+                print(f"📤 Uploaded {image} as {name} ({os.path.getsize(prepared) / 1024:.0f} KiB)")
+            self.names[path] = name
+            return name
@@ -0,0 +1,256 @@
+"""
+Cache of generated images keyed by everything that determines them.
+
+A Flux dev prompt with a fixed seed is deterministic: the same graph on the
+same model files yields the same image, so rerunning a prompt / seed / LoRA
+strength combination only needs the GPU once. graph_key() hashes the
+id-independent structure upstream of a job's SaveImage nodes (prompt,
+sampler settings, seed, loaders, LoRA strength, reference image) with
+cosmetic inputs such as filename_prefix left out. Model and LoRA file
+names are replaced by digests of the files in a local models folder, so a
+retrained LoRA under the same name is a different key, and local reference
+images by digests of their contents, so a hit needs no upload. A job whose
+model or reference has no digest bypasses the cache, unless by_name=True
+opts into keying on names (a retrained LoRA then returns stale images).
+
+Stored images live under CACHE_DIR, indexed in a small SQLite database;
+the least recently used results are evicted once they pass max_bytes.
+
+Usage:
+    cache = ResultCache(models_dir="/path/to/ComfyUI/models")
+    key = cache.key(graph)                      # None: not cacheable
+    files = cache.fetch(key, out_dir, job_id)   # None on a miss
+    cache.store(key, files)                     # after generating
+    print(cache.stats())
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+
+from reference_images import file_hash, local_reference
+from workflow_compiler import subgraph_signature
+from workflow_graph import WORKFLOWS_DIR, output_nodes
+
+CACHE_DIR = os.environ.get("RESULT_CACHE_DIR", os.path.join(WORKFLOWS_DIR, ".result_cache"))
+
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024 * 1024
+
+# Inputs that don't change the image
+COSMETIC_INPUTS = {"SaveImage": ("filename_prefix",), "PreviewImage": ()}
+# Inputs naming a file in the ComfyUI models folder
+MODEL_INPUTS = ("ckpt_name", "unet_name", "vae_name", "clip_name", "clip_name1", "clip_name2", "lora_name")
+# Inputs naming a file in the ComfyUI input folder
+IMAGE_INPUTS = {"LoadImage": "image"}
+
+def graph_key(graph, node_ids=None, model_digests=None):
+    """
+    Hash of what the given output nodes (default: all SaveImage nodes) compute.
+
+    Args:
+        model_digests: Optional {model or image file name: digest}; names without one are hashed as names
+    """
+    model_digests = model_digests or {}
+    normalized = {}
+    for node_id, node in graph.items():
+        skip = COSMETIC_INPUTS.get(node["class_type"], ())
+        inputs = {}
+        for name, value in node["inputs"].items():
+            if name in skip:
+                continue
+            if (name in MODEL_INPUTS or IMAGE_INPUTS.get(node["class_type"]) == name) and value in model_digests:
+                value = {"sha256": model_digests[value]}
+            inputs[name] = value
+        normalized[node_id] = dict(node, inputs=inputs)
+    memo = {}
+    signature = [subgraph_signature(normalized, node_id, memo) for node_id in (node_ids or output_nodes(graph))]
+    return hashlib.sha256(json.dumps(signature, sort_keys=True).encode("utf-8")).hexdigest()
+
+class ResultCache:
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, models_dir=None, by_name=False):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.models_dir = models_dir
+        self.by_name = by_name
+        self.counters = {"hit": 0, "miss": 0, "uncached": 0, "stored": 0, "evicted": 0}
+        self._model_paths = None
+        self._digests = {}
+        self._undigested = set()
+        self._lock = threading.Lock()
+        if by_name:
+            print("⚠️ Result cache keyed by model/LoRA names: a file retrained under the same name "
+                  "returns stale images")
+
+        os.makedirs(os.path.join(cache_dir, "images"), exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(cache_dir, "index.sqlite3"), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                files TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                stored_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        # Model files are large; a digest is reused until the file's size or mtime changes
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS model_digests (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime REAL NOT NULL,
+                digest TEXT NOT NULL
+            )
+        """)
+        self._db.commit()
+
+    def model_digest(self, name):
+        """sha256 of a model file in models_dir (searched recursively), or None if it isn't there"""
+        if not self.models_dir:
+            return None
+        if self._model_paths is None:
+            self._model_paths = {}
+            for root, _, files in os.walk(self.models_dir):
+                for filename in files:
+                    path = os.path.join(root, filename)
+                    self._model_paths.setdefault(filename, path)
+                    self._model_paths.setdefault(os.path.relpath(path, self.models_dir).replace(os.sep, "/"), path)
+        path = self._model_paths.get(name) or self._model_paths.get(os.path.basename(name))
+        if path is None:
+            return None
+        if path in self._digests:
+            return self._digests[path]
+
+        stat = os.stat(path)
+        with self._lock:
+            row = self._db.execute("SELECT size, mtime, digest FROM model_digests WHERE path = ?", (path,)).fetchone()
+        if row and row[0] == stat.st_size and row[1] == stat.st_mtime:
+            digest = row[2]
+        else:
+            print(f"🔑 Hashing {name} ({stat.st_size / 1024 ** 3:.1f} GiB)...")
+            sha = hashlib.sha256()
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(8 * 1024 * 1024), b""):
+                    sha.update(chunk)
+            digest = sha.hexdigest()
+            with self._lock:
+                self._db.execute("INSERT OR REPLACE INTO model_digests VALUES (?, ?, ?, ?)",
+                                 (path, stat.st_size, stat.st_mtime, digest))
+                self._db.commit()
+        self._digests[path] = digest
+        return digest
+
+    def image_digest(self, image):
+        """sha256 of a local reference image (reference_images.local_reference), or None"""
+        path = local_reference(image)
+        if path is None:
+            return None
+        if path not in self._digests:
+            self._digests[path] = file_hash(path)
+        return self._digests[path]
+
+    def key(self, graph, node_ids=None):
+        """
+        Cache key of graph, or None when a model or reference image has no digest
+        (and the cache isn't keyed by name); such jobs are neither looked up nor stored.
+        """
+        digests = {}
+        missing = []
+        for node in graph.values():
+            image_input = IMAGE_INPUTS.get(node["class_type"])
+            for name in MODEL_INPUTS + ((image_input,) if image_input else ()):
+                value = node["inputs"].get(name)
+                if not isinstance(value, str) or value in digests:
+                    continue
+                digest = self.image_digest(value) if name == image_input else self.model_digest(value)
+                if digest:
+                    digests[value] = digest
+                else:
+                    missing.append(value)
+        if missing and not self.by_name:
+            self.counters["uncached"] += 1
+            new = sorted(set(missing) - self._undigested)
+            if new:
+                self._undigested.update(new)
+                print(f"⚠️ No digest for {', '.join(new)} (see --models-dir); jobs using them bypass the result cache")
+            return None
+        return graph_key(graph, node_ids, digests)
+
+    def _image_path(self, key, n, extension):
+        return os.path.join(self.cache_dir, "images", f"{key}_{n:02d}{extension}")
+
+    def fetch(self, key, out_dir, job_id):
+        """
+        Copy a stored result into out_dir as <job_id>_<n><ext>.
+
+        Returns:
+            list: The copied files, or None on a miss
+        """
+        with self._lock:
+            row = self._db.execute("SELECT files FROM results WHERE key = ?", (key,)).fetchone()
+        stored = json.loads(row[0]) if row else None
+        if not stored or not all(os.path.exists(path) for path in stored):
+            self.counters["miss"] += 1
+            return None
+
+        files = []
+        for n, path in enumerate(stored):
+            target = os.path.join(out_dir, f"{job_id}_{n:02d}{os.path.splitext(path)[1]}")
+            shutil.copyfile(path, target + ".tmp")
+            os.replace(target + ".tmp", target)
+            files.append(target)
+        with self._lock:
+            self._db.execute("UPDATE results SET last_access = ?, hits = hits + 1 WHERE key = ?", (time.time(), key))
+            self._db.commit()
+        self.counters["hit"] += 1
+        return files
+
+    def store(self, key, files):
+        """Keep copies of a job's generated images under key"""
+        stored = []
+        for n, path in enumerate(files):
+            target = self._image_path(key, n, os.path.splitext(path)[1] or ".png")
+            shutil.copyfile(path, target + ".tmp")
+            os.replace(target + ".tmp", target)
+            stored.append(target)
+        size = sum(os.path.getsize(path) for path in stored)
+        now = time.time()
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, 0)",
+                             (key, json.dumps(stored), size, now, now))
+            self._db.commit()
+        self.counters["stored"] += 1
+        self.evict()
+
+    def evict(self):
+        """Drop least recently used results until the stored total fits in max_bytes"""
+        with self._lock:
+            total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            rows = self._db.execute("SELECT key, files, size FROM results ORDER BY last_access").fetchall()
+            for key, files, size in rows:
+                if total <= self.max_bytes:
+                    break
+                self._db.execute("DELETE FROM results WHERE key = ?", (key,))
+                for path in json.loads(files):
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+                total -= size
+                self.counters["evicted"] += 1
+            self._db.commit()
+
+    def stats(self):
+        lookups = self.counters["hit"] + self.counters["miss"]
+        with self._lock:
+            entries, size, hits = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(hits), 0) FROM results").fetchone()
+        return dict(self.counters, entries=entries, bytes=size, lifetime_hits=hits,
+                    hit_rate=round(self.counters["hit"] / lookups, 3) if lookups else 0.0)
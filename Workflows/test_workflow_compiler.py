@@ -0,0 +1,113 @@
+"""
+Offline tests for workflow_compiler.py, driven by the workflow templates in this folder.
+
+    python -m pytest -q Workflows
+"""
+
+import glob
+import os
+
+import pytest
+
+from workflow_compiler import compile_batches, merge_graphs, verify_merge
+from workflow_graph import WORKFLOWS_DIR, load_workflow, patch_graph
+
+TEMPLATES = sorted(os.path.splitext(os.path.basename(path))[0]
+                   for path in glob.glob(os.path.join(WORKFLOWS_DIR, "*fluxdev*.json")))
+LOADERS = ("CheckpointLoaderSimple", "DualCLIPLoader", "VAELoader", "LoraLoaderModelOnly",
+           "EmptyLatentImage", "LoadImage", "ImageScale", "VAEEncode")
+PER_VARIANT = ("KSampler", "VAEDecode", "SaveImage")
+
+def variants(name, count, vary_prompt=True):
+    workflow = load_workflow(name)
+    return [
+        patch_graph(workflow, text=f"chubbies_style, variant {index}" if vary_prompt else None,
+                    seed=1000 + index, filename_prefix=f"batch/{index:04d}")
+        for index in range(count)
+    ]
+
+def class_counts(graph):
+    counts = {}
+    for node in graph.values():
+        counts[node["class_type"]] = counts.get(node["class_type"], 0) + 1
+    return counts
+
+def test_templates_found():
+    assert "fluxdev_chunkiesstyle" in TEMPLATES and "fluxdev_abercrombiestyle_with_ref_img" in TEMPLATES
+
+@pytest.mark.parametrize("name", TEMPLATES)
+def test_loaders_and_encoders_are_shared(name):
+    graphs = variants(name, 4)
+    merged, _ = merge_graphs(graphs)
+    counts = class_counts(merged)
+    for class_type in LOADERS:
+        if class_type in class_counts(graphs[0]):
+            assert counts[class_type] == 1, class_type
+    # One shared negative prompt plus one positive prompt per variant
+    assert counts["CLIPTextEncode"] == 1 + len(graphs)
+
+@pytest.mark.parametrize("name", TEMPLATES)
+def test_per_variant_nodes_fan_out(name):
+    graphs = variants(name, 4)
+    merged, outputs = merge_graphs(graphs)
+    counts = class_counts(merged)
+    for class_type in PER_VARIANT:
+        assert counts[class_type] == len(graphs), class_type
+
+    assert [len(node_ids) for node_ids in outputs] == [1] * len(graphs)
+    assert len({node_ids[0] for node_ids in outputs}) == len(graphs)
+    for index, (save_id,) in enumerate(outputs):
+        save = merged[save_id]
+        assert save["inputs"]["filename_prefix"] == f"batch/{index:04d}"
+        decode = merged[save["inputs"]["images"][0]]
+        sampler = merged[decode["inputs"]["samples"][0]]
+        assert sampler["inputs"]["seed"] == 1000 + index
+        assert merged[sampler["inputs"]["positive"][0]]["inputs"]["text"] == f"chubbies_style, variant {index}"
+
+def test_same_prompt_shares_text_encoder():
+    graphs = variants("fluxdev_chunkiesstyle", 3, vary_prompt=False)
+    counts = class_counts(merge_graphs(graphs)[0])
+    assert counts["CLIPTextEncode"] == 2
+    assert counts["KSampler"] == 3
+
+def test_identical_variants_keep_their_outputs():
+    graph = load_workflow("basic_fluxdev")
+    merged, outputs = merge_graphs([graph, graph])
+    assert class_counts(merged)["SaveImage"] == 2
+    assert class_counts(merged)["KSampler"] == 1
+    assert outputs[0] != outputs[1]
+
+@pytest.mark.parametrize("name", TEMPLATES)
+def test_verify_merge_accepts_merged_graph(name):
+    graphs = variants(name, 5)
+    merged, outputs = merge_graphs(graphs)
+    verify_merge(graphs, merged, outputs)
+
+def test_verify_merge_rejects_changed_variant():
+    graphs = variants("fluxdev_chunkiesstyle", 3)
+    merged, outputs = merge_graphs(graphs)
+    sampler_id = merged[merged[outputs[1][0]]["inputs"]["images"][0]]["inputs"]["samples"][0]
+    merged[sampler_id]["inputs"]["seed"] += 1
+    with pytest.raises(ValueError, match="Variant 1"):
+        verify_merge(graphs, merged, outputs)
+
+def test_verify_merge_rejects_lost_output():
+    graphs = variants("fluxdev_chunkiesstyle", 2)
+    merged, outputs = merge_graphs(graphs)
+    with pytest.raises(ValueError, match="outputs became"):
+        verify_merge(graphs, merged, [outputs[0], []])
+
+@pytest.mark.parametrize("count, batch_size, sizes", [
+    (10, 4, [4, 4, 2]),
+    (8, 8, [8]),
+    (3, 16, [3]),
+    (3, 1, [1, 1, 1]),
+    (2, 0, [1, 1]),
+])
+def test_compile_batches_sizes(count, batch_size, sizes):
+    graphs = variants("fluxdev_abercrombiestyle", count)
+    batches = compile_batches(graphs, batch_size)
+    assert [len(members) for _, members in batches] == sizes
+    assert [index for _, members in batches for index, _ in members] == list(range(count))
+    for merged, members in batches:
+        verify_merge([graphs[index] for index, _ in members], merged, [node_ids for _, node_ids in members])
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Merge many patched copies of one workflow into fewer, larger ComfyUI graphs.
+
+N variants of a workflow (different prompts, seeds, LoRA strengths) share
+most of their graph: the checkpoint, CLIP and VAE loaders, the LoRA loader,
+the negative prompt encoder, the empty latent. Submitted one by one, each
+copy is queued, validated and cached separately on the server. merge_graphs()
+gives every node a structural key (class_type, literal inputs, and the keys
+of the nodes it links to), so identical sub-graphs collapse into one node
+and only the parts that really differ per variant (prompt encoder, sampler,
+decoder, SaveImage) are fanned out. Output nodes are never merged, so every
+variant keeps its own images.
+
+    python workflow_compiler.py fluxdev_chunkiesstyle --variants 16 --batch-size 8 --out merged/
+"""
+
+import argparse
+import json
+import os
+
+from workflow_graph import load_workflow, patch_graph
+
+# Nodes whose results a client collects; one per variant even when identical
+OUTPUT_CLASSES = ("SaveImage", "PreviewImage")
+
+def is_link(graph, value):
+    """ComfyUI links are [node_id, output_index] pairs"""
+    return (isinstance(value, list) and len(value) == 2 and isinstance(value[1], int)
+            and str(value[0]) in graph)
+
+def merge_graphs(graphs):
+    """
+    Merge API-format graphs into one, sharing structurally identical nodes.
+
+    Returns:
+        tuple: (merged graph, [output node ids in the merged graph, per input graph])
+    """
+    merged = {}
+    by_key = {}
+    outputs = []
+
+    for index, graph in enumerate(graphs):
+        memo = {}
+
+        def add(node_id):
+            if node_id in memo:
+                return memo[node_id]
+            node = graph[node_id]
+            inputs = {
+                name: [add(str(value[0])), value[1]] if is_link(graph, value) else value
+                for name, value in node["inputs"].items()
+            }
+            # Linked inputs already point at merged ids, which stand for whole sub-graphs
+            key = json.dumps([node["class_type"], inputs], sort_keys=True)
+            if node["class_type"] in OUTPUT_CLASSES:
+                key += f"#{index}:{node_id}"
+            merged_id = by_key.get(key)
+            if merged_id is None:
+                merged_id = by_key[key] = str(len(merged) + 1)
+                merged[merged_id] = dict(node, inputs=inputs)
+            memo[node_id] = merged_id
+            return merged_id
+
+        for node_id in graph:
+            add(node_id)
+        outputs.append([memo[node_id] for node_id, node in graph.items() if node["class_type"] in OUTPUT_CLASSES])
+
+    return merged, outputs
+
+def subgraph_signature(graph, node_id, memo=None):
+    """Nested description of a node and everything upstream of it, independent of node ids"""
+    memo = {} if memo is None else memo
+    if node_id not in memo:
+        node = graph[node_id]
+        memo[node_id] = [node["class_type"], {
+            name: ["@", subgraph_signature(graph, str(value[0]), memo), value[1]] if is_link(graph, value) else value
+            for name, value in sorted(node["inputs"].items())
+        }]
+    return memo[node_id]
+
+def verify_merge(graphs, merged, outputs):
+    """
+    Check that every original output node computes the same thing in the merged graph.
+
+    Raises:
+        ValueError: On the first output whose upstream graph changed
+    """
+    merged_memo = {}
+    for index, graph in enumerate(graphs):
+        originals = [node_id for node_id, node in graph.items() if node["class_type"] in OUTPUT_CLASSES]
+        if len(originals) != len(outputs[index]):
+            raise ValueError(f"Variant {index}: {len(originals)} outputs became {len(outputs[index])}")
+        memo = {}
+        for original, merged_id in zip(originals, outputs[index]):
+            if subgraph_signature(graph, original, memo) != subgraph_signature(merged, merged_id, merged_memo):
+                raise ValueError(f"Variant {index}: output node {original} differs after merging (as {merged_id})")
+
+def compile_batches(graphs, batch_size):
+    """
+    Merge graphs batch_size at a time.
+
+    Returns:
+        list: (merged graph, [(index into graphs, output node ids)]) per batch
+    """
+    batches = []
+    for start in range(0, len(graphs), max(1, batch_size)):
+        chunk = graphs[start:start + max(1, batch_size)]
+        merged, outputs = merge_graphs(chunk)
+        batches.append((merged, [(start + offset, node_ids) for offset, node_ids in enumerate(outputs)]))
+    return batches
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("workflow", help="Workflow name in this folder (e.g. fluxdev_chunkiesstyle) or a path")
+    parser.add_argument("--prompts", help="Text file with one prompt per line (default: the workflow's own prompt)")
+    parser.add_argument("--variants", type=int, default=4, help="Seeds per prompt")
+    parser.add_argument("--seed", type=int, default=0, help="First seed")
+    parser.add_argument("--batch-size", type=int, default=8, help="Variants per merged graph")
+    parser.add_argument("--out", default=None, help="Directory to write merged graphs to (API format)")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    workflow = load_workflow(args.workflow)
+    prompts = [None]
+    if args.prompts:
+        with open(args.prompts, "r", encoding="utf-8") as f:
+            prompts = [line.strip() for line in f if line.strip()]
+
+    graphs = [
+        patch_graph(workflow, text=prompt, seed=args.seed + variant, filename_prefix=f"batch/{index:04d}")
+        for index, (prompt, variant) in enumerate((prompt, variant) for prompt in prompts for variant in range(args.variants))
+    ]
+    batches = compile_batches(graphs, args.batch_size)
+
+    if args.out:
+        os.makedirs(args.out, exist_ok=True)
+    total = 0
+    for number, (merged, members) in enumerate(batches):
+        verify_merge([graphs[index] for index, _ in members], merged, [node_ids for _, node_ids in members])
+        total += len(merged)
+        print(f"🧩 Graph {number}: {len(members)} variants, {len(merged)} nodes "
+              f"(unmerged {sum(len(graphs[index]) for index, _ in members)})")
+        if args.out:
+            path = os.path.join(args.out, f"merged_{number:03d}.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(merged, f, indent=2)
+    print(f"📊 {len(graphs)} variants: {sum(len(graph) for graph in graphs)} nodes → {total} in {len(batches)} graph(s)")
+
+if __name__ == "__main__":
+    main()
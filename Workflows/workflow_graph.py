@@ -0,0 +1,77 @@
+"""
+Load the ComfyUI API-format workflows in this folder and patch their inputs.
+
+Every workflow here is the same Flux dev graph, so the nodes a batch run
+changes have the same ids in all of them:
+
+    3   KSampler             seed, steps, denoise
+    6   CLIPTextEncode       text (the positive prompt)
+    9   SaveImage            filename_prefix
+    15  LoraLoaderModelOnly  lora_name, strength_model   (style workflows)
+    23  LoadImage            image                       (*_with_ref_img workflows)
+
+Usage:
+    graph = load_workflow("fluxdev_chunkiesstyle")
+    graph = patch_graph(graph, text="chubbies_style ...", seed=42, strength_model=0.8)
+"""
+
+import copy
+import json
+import os
+
+WORKFLOWS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+SAMPLER_NODE = "3"
+PROMPT_NODE = "6"
+SAVE_NODE = "9"
+LORA_NODE = "15"
+IMAGE_NODE = "23"
+
+# Patchable input -> (node id, class_type it must have)
+PATCHES = {
+    "text": (PROMPT_NODE, "CLIPTextEncode"),
+    "seed": (SAMPLER_NODE, "KSampler"),
+    "steps": (SAMPLER_NODE, "KSampler"),
+    "denoise": (SAMPLER_NODE, "KSampler"),
+    "filename_prefix": (SAVE_NODE, "SaveImage"),
+    "lora_name": (LORA_NODE, "LoraLoaderModelOnly"),
+    "strength_model": (LORA_NODE, "LoraLoaderModelOnly"),
+    "image": (IMAGE_NODE, "LoadImage"),
+}
+
+def workflow_path(name):
+    """fluxdev_chunkiesstyle -> Workflows/fluxdev_chunkiesstyle.json; paths are used as given"""
+    if os.path.exists(name):
+        return name
+    return os.path.join(WORKFLOWS_DIR, name if name.endswith(".json") else f"{name}.json")
+
+def load_workflow(name):
+    with open(workflow_path(name), "r", encoding="utf-8") as f:
+        graph = json.load(f)
+    if not isinstance(graph, dict) or not all("class_type" in node for node in graph.values()):
+        raise ValueError(f"{name} is not an API-format workflow (export it with 'Save (API Format)')")
+    return graph
+
+def patch_graph(graph, **inputs):
+    """
+    Copy of graph with the given PATCHES inputs replaced; None values are left alone.
+
+    Raises:
+        ValueError: If an input is unknown or the workflow lacks its node
+    """
+    patched = copy.deepcopy(graph)
+    for name, value in inputs.items():
+        if value is None:
+            continue
+        if name not in PATCHES:
+            raise ValueError(f"Unknown workflow input '{name}' (known: {', '.join(PATCHES)})")
+        node_id, class_type = PATCHES[name]
+        node = patched.get(node_id)
+        if node is None or node["class_type"] != class_type:
+            raise ValueError(f"Workflow has no {class_type} node {node_id} to set '{name}' on")
+        node["inputs"][name] = value
+    return patched
+
+def output_nodes(graph):
+    """Ids of the SaveImage nodes, whose images a finished prompt returns"""
+    return [node_id for node_id, node in graph.items() if node["class_type"] == "SaveImage"]
@@ -6,12 +6,16 @@ import os
 import modal
 from modal import (App, Image, web_server, Secret, Volume)
 
+from output_catalog import OutputCatalog
+import safetensors_index
+
 cuda_version = "12.4.0"
 flavor = "devel"
 operating_sys = "ubuntu22.04"
 tag = f"{cuda_version}-{flavor}-{operating_sys}"
 
 GRADIO_PORT = 7860
+OUTPUTS_DIR = "/root/fluxgym/outputs"
 
 volume = Volume.from_name("fluxgym-output", create_if_missing=True)
 
@@ -23,6 +27,7 @@ image = (
     .run_commands("cd /root/fluxgym && git clone -b sd3 https://github.com/kohya-ss/sd-scripts.git /root/fluxgym/sd-scripts")
     .run_commands("cd /root/fluxgym/sd-scripts && pip install -r requirements.txt")
     .run_commands("rm -rf /root/fluxgym/outputs")
+    .add_local_python_source("output_catalog", "safetensors_index")
 )
 
 app = App(
@@ -41,9 +46,36 @@ app = App(
 )
 
 class FluxGymApp:
+    def link_synced_datasets(self):
+        """Expose datasets synced onto the volume (Dataset_final/sync_dataset.py) where dataset.toml expects them"""
+        try:
+            # Synced from another machine, so this container only sees them after a reload
+            volume.reload()
+        except Exception as e:
+            # Modal refuses to reload while files on the volume are open, e.g. during a training run
+            print(f"⚠️ Couldn't reload the volume ({e}); linking the datasets already visible")
+        synced = f"{OUTPUTS_DIR}/datasets"
+        if not os.path.isdir(synced):
+            return []
+        os.makedirs("/root/fluxgym/datasets", exist_ok=True)
+        linked = []
+        for name in sorted(os.listdir(synced)):
+            link = f"/root/fluxgym/datasets/{name}"
+            if not os.path.lexists(link):
+                os.symlink(f"{synced}/{name}", link)
+                print(f"🔗 Linked synced dataset {name}")
+                linked.append(name)
+        return linked
+
+    @modal.method()
+    def link_datasets(self):
+        """Pick up datasets synced while the app is running; returns the newly linked names"""
+        return self.link_synced_datasets()
+
     def run_gradio(self):
         os.chdir("/root/fluxgym")
         print("Changed directory to /root/fluxgym")
+        self.link_synced_datasets()
         os.environ["HF_TOKEN"] = os.environ.get("HUGGINGFACE_SECRET", "")
         os.environ["GRADIO_SERVER_NAME"] = "0.0.0.0"
         os.environ["GRADIO_SERVER_PORT"] = str(GRADIO_PORT)
@@ -56,28 +88,41 @@ class FluxGymApp:
         print("Starting FluxGym application...")
         self.run_gradio()
 
+    def refresh_catalog(self):
+        """Catalog of the outputs volume, updated from what changed since the last call"""
+        # No volume.reload(): it fails while training has files open, and this container sees its own writes
+        catalog = OutputCatalog(OUTPUTS_DIR)
+        counts = catalog.refresh()
+        if counts["added"] or counts["changed"] or counts["removed"]:
+            volume.commit()
+        print(f"📁 Catalog: {len(catalog.files)} files, {counts['dirs_listed']} dirs listed, "
+              f"{counts['dirs_reused']} unchanged, +{counts['added']} ~{counts['changed']} -{counts['removed']}")
+        return catalog
+
     @modal.method()
     def list_outputs(self):
-        os.chdir("/root/fluxgym/outputs")
-        print("📁 Listing files in /root/fluxgym/outputs:")
-        print(os.listdir("."))
+        """Per-run summary of the outputs volume (files and bytes by kind, checkpoints)"""
+        return self.refresh_catalog().runs()
+
+    @modal.method()
+    def inspect_output(self, output_name: str, kind: str = None, pattern: str = None,
+                       offset: int = 0, limit: int = 100, sort: str = "path"):
+        """One page of a run's files, optionally filtered by kind (see output_catalog.KINDS) and glob"""
+        page = self.refresh_catalog().query(output_name, kind, pattern, offset, limit, sort)
+        if page["total"] == 0:
+            print(f"Output {output_name} has no matching files")
+        return page
 
     @modal.method()
-    def inspect_output(self, output_name: str):
-        output_path = f"/root/fluxgym/outputs/{output_name}"
-        if os.path.exists(output_path):
-            print(f"📁 Contents of {output_name}:")
-            for root, dirs, files in os.walk(output_path):
-                level = root.replace(output_path, '').count(os.sep)
-                indent = ' ' * 2 * level
-                print(f"{indent}{os.path.basename(root)}/")
-                subindent = ' ' * 2 * (level + 1)
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    file_size = os.path.getsize(file_path)
-                    print(f"{subindent}{file} ({file_size} bytes)")
-        else:
+    def inspect_checkpoints(self, output_name: str, tensors: str = None, checksum: bool = False):
+        """Header index of a run's checkpoints (tensors, dtypes, training metadata) without loading them"""
+        output_path = f"{OUTPUTS_DIR}/{output_name}"
+        if not os.path.isdir(output_path):
             print(f"Output {output_name} not found")
+            return []
+        results = safetensors_index.inspect(output_path, tensors, checksum)
+        print(f"📦 {len(results)} checkpoint(s) in {output_name}")
+        return results
 
 if __name__ == "__main__":
     app.serve()
\ No newline at end of file
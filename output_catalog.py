@@ -0,0 +1,236 @@
+"""
+Catalog of the FluxGym outputs folder (the fluxgym-output volume).
+
+Each training run writes into outputs/<name>: a .safetensors checkpoint
+every few epochs, sample images under sample/, the cached latents and text
+encoder outputs (*.npz) from --cache_latents_to_disk and
+--cache_text_encoder_outputs_to_disk, plus its dataset.toml, train.sh and
+prompts. Top-level folders that aren't runs (NON_RUN_DIRS, e.g. the
+datasets synced by Dataset_final/sync_dataset.py) are catalogued without a
+run. OutputCatalog keeps a manifest of every file (size, mtime, kind,
+run) in MANIFEST_NAME at the root. It is refreshed incrementally: a
+directory whose mtime hasn't changed since the last scan isn't listed
+again, only its known files are stat'ed (sd-scripts grows checkpoints and
+samples in place, which leaves the directory mtime alone), and a changed
+one is re-listed with os.scandir. Either way a file's entry is only
+rebuilt when its size or mtime differs. Queries filter
+by run, kind and glob and are paginated, and they return plain dicts that
+serialize to JSON.
+
+    python output_catalog.py /root/fluxgym/outputs --runs
+    python output_catalog.py outputs --run chubbiesstylelora --kind checkpoint --limit 20
+"""
+
+import argparse
+import fnmatch
+import json
+import os
+import time
+
+MANIFEST_NAME = ".catalog.json"
+MANIFEST_VERSION = 2
+
+# Top-level folders on the volume that hold no training run
+NON_RUN_DIRS = ("datasets",)
+
+CHECKPOINT_EXTENSIONS = (".safetensors", ".sft", ".ckpt", ".pt")
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp")
+CONFIG_EXTENSIONS = (".toml", ".txt", ".sh", ".json", ".yaml", ".yml")
+
+KINDS = ("checkpoint", "sample", "image", "latent_cache", "text_encoder_cache", "config", "other")
+
+def file_kind(path):
+    """One of KINDS for a path relative to the outputs folder"""
+    name = os.path.basename(path).lower()
+    extension = os.path.splitext(name)[1]
+    if extension in CHECKPOINT_EXTENSIONS:
+        return "checkpoint"
+    if extension == ".npz":
+        # sd-scripts: <image>_<w>x<h>_flux.npz for latents, <image>_flux_te.npz for text encoders
+        return "text_encoder_cache" if name.endswith("_te.npz") else "latent_cache"
+    if extension in IMAGE_EXTENSIONS:
+        return "sample" if "sample" in path.replace(os.sep, "/").split("/")[:-1] else "image"
+    if extension in CONFIG_EXTENSIONS:
+        return "config"
+    return "other"
+
+def file_run(path):
+    """Run a path relative to the outputs folder belongs to, or "" for top-level files and NON_RUN_DIRS"""
+    if "/" not in path:
+        return ""
+    top = path.split("/", 1)[0]
+    return "" if top in NON_RUN_DIRS else top
+
+class OutputCatalog:
+    def __init__(self, root, manifest_path=None):
+        self.root = os.path.abspath(root)
+        self.manifest_path = manifest_path or os.path.join(self.root, MANIFEST_NAME)
+        self.dirs = {}   # relative dir -> {"mtime", "subdirs"}
+        self.files = {}  # relative path -> {"size", "mtime", "kind", "run"}
+        self.scanned_at = None
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        if manifest.get("version") == MANIFEST_VERSION:
+            self.dirs = manifest["dirs"]
+            self.files = manifest["files"]
+            self.scanned_at = manifest.get("scanned_at")
+
+    def save(self):
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "scanned_at": self.scanned_at,
+                       "dirs": self.dirs, "files": self.files}, f, separators=(",", ":"))
+        os.replace(tmp_path, self.manifest_path)
+
+    def refresh(self, full=False):
+        """
+        Bring the manifest up to date with the folder and save it.
+
+        Args:
+            full: Re-list every directory, even ones whose mtime hasn't changed
+
+        Returns:
+            dict: What the scan did (dirs_listed, dirs_reused, files_stat, added, changed, removed)
+        """
+        counts = dict.fromkeys(("dirs_listed", "dirs_reused", "files_stat", "added", "changed", "removed"), 0)
+        dirs = {}
+        files = {}
+        manifest_name = os.path.relpath(self.manifest_path, self.root)
+        stack = [""]
+        while stack:
+            relative = stack.pop()
+            path = os.path.join(self.root, relative)
+            try:
+                mtime = os.stat(path).st_mtime
+            except FileNotFoundError:
+                continue
+            known = self.dirs.get(relative)
+            if known and known["mtime"] == mtime and not full:
+                # Nothing was added, removed or renamed here since the last scan, but files may have grown
+                counts["dirs_reused"] += 1
+                prefix = relative + "/" if relative else ""
+                names = []
+                for name in known["files"]:
+                    try:
+                        stat = os.stat(os.path.join(path, name), follow_symlinks=False)
+                    except FileNotFoundError:
+                        continue
+                    counts["files_stat"] += 1
+                    names.append(name)
+                    self._update(prefix + name, stat, files, counts)
+                dirs[relative] = dict(known, files=names)
+                stack.extend(known["subdirs"])
+                continue
+
+            counts["dirs_listed"] += 1
+            subdirs = []
+            names = []
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    entry_path = f"{relative}/{entry.name}" if relative else entry.name
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry_path)
+                        continue
+                    if entry_path in (manifest_name, manifest_name + ".tmp"):
+                        continue
+                    stat = entry.stat(follow_symlinks=False)
+                    counts["files_stat"] += 1
+                    names.append(entry.name)
+                    self._update(entry_path, stat, files, counts)
+            dirs[relative] = {"mtime": mtime, "subdirs": subdirs, "files": names}
+            stack.extend(subdirs)
+
+        counts["removed"] = len(set(self.files) - set(files))
+        self.dirs = dirs
+        self.files = files
+        self.scanned_at = time.time()
+        self.save()
+        return counts
+
+    def _update(self, path, stat, files, counts):
+        """Carry a file's entry into files, rebuilt if its size or mtime changed"""
+        previous = self.files.get(path)
+        if previous and previous["size"] == stat.st_size and previous["mtime"] == stat.st_mtime:
+            files[path] = previous
+            return
+        counts["changed" if previous else "added"] += 1
+        files[path] = {"size": stat.st_size, "mtime": stat.st_mtime, "kind": file_kind(path), "run": file_run(path)}
+
+    def query(self, run=None, kind=None, pattern=None, offset=0, limit=100, sort="path"):
+        """
+        Files matching every given filter, one page at a time.
+
+        Args:
+            pattern: Glob matched against the path relative to the root or the file name
+            sort: "path", "size" or "mtime" (size and mtime sort largest / newest first)
+
+        Returns:
+            dict: total, offset, limit, next_offset (None on the last page) and items
+        """
+        if kind is not None and kind not in KINDS:
+            raise ValueError(f"Unknown kind '{kind}' (known: {', '.join(KINDS)})")
+        matches = [
+            dict(entry, path=path) for path, entry in self.files.items()
+            if (run is None or entry["run"] == run)
+            and (kind is None or entry["kind"] == kind)
+            and (pattern is None or fnmatch.fnmatch(path, pattern) or fnmatch.fnmatch(os.path.basename(path), pattern))
+        ]
+        if sort == "path":
+            matches.sort(key=lambda item: item["path"])
+        else:
+            matches.sort(key=lambda item: (-item[sort], item["path"]))
+        page = matches[offset:offset + limit]
+        return {"total": len(matches), "offset": offset, "limit": limit,
+                "next_offset": offset + limit if offset + limit < len(matches) else None, "items": page}
+
+    def runs(self):
+        """Per-run summary: file and byte counts by kind, checkpoints, last modification"""
+        summary = {}
+        for path, entry in self.files.items():
+            if not entry["run"]:
+                continue
+            run = summary.setdefault(entry["run"], {"run": entry["run"], "files": 0, "bytes": 0, "kinds": {},
+                                                    "checkpoints": [], "last_modified": 0})
+            run["files"] += 1
+            run["bytes"] += entry["size"]
+            run["kinds"][entry["kind"]] = run["kinds"].get(entry["kind"], 0) + 1
+            run["last_modified"] = max(run["last_modified"], entry["mtime"])
+            if entry["kind"] == "checkpoint":
+                run["checkpoints"].append(path)
+        for run in summary.values():
+            run["checkpoints"].sort()
+        return sorted(summary.values(), key=lambda run: run["run"])
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("root", help="Outputs folder (e.g. /root/fluxgym/outputs)")
+    parser.add_argument("--runs", action="store_true", help="Print the per-run summary instead of files")
+    parser.add_argument("--run", default=None)
+    parser.add_argument("--kind", choices=KINDS, default=None)
+    parser.add_argument("--glob", default=None, help="e.g. '*-000006.safetensors'")
+    parser.add_argument("--sort", choices=("path", "size", "mtime"), default="path")
+    parser.add_argument("--offset", type=int, default=0)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--full", action="store_true", help="Re-list unchanged directories too")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    catalog = OutputCatalog(args.root)
+    started = time.perf_counter()
+    counts = catalog.refresh(full=args.full)
+    counts["seconds"] = round(time.perf_counter() - started, 4)
+    if args.runs:
+        result = {"scan": counts, "runs": catalog.runs()}
+    else:
+        result = dict(catalog.query(args.run, args.kind, args.glob, args.offset, args.limit, args.sort), scan=counts)
+    print(json.dumps(result, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+"""
+Inspect .safetensors checkpoints without loading them.
+
+A safetensors file starts with an 8-byte little-endian header length,
+followed by that many bytes of JSON that describe every tensor (dtype,
+shape, byte range in the data section) and an optional __metadata__ map.
+sd-scripts stores its training settings there (ss_epoch, ss_steps,
+ss_network_dim, ...). Indexing a checkpoint therefore reads only its
+header. Checksums stream the file in fixed-size chunks, and per-tensor
+statistics read only the selected tensors' bytes through mmap, chunk by
+chunk, so memory stays constant however large the file is.
+
+    python safetensors_index.py /root/fluxgym/outputs/chubbiesstylelora
+    python safetensors_index.py run-000006.safetensors --tensors 'lora_unet_double_blocks_0_*' --checksum
+"""
+
+import argparse
+import fnmatch
+import hashlib
+import json
+import mmap
+import os
+import struct
+import time
+
+try:
+    import numpy as np
+except ImportError:  # headers and checksums still work, tensor statistics don't
+    np = None
+
+CHUNK_SIZE = 8 * 1024 * 1024
+# A header larger than this is a corrupt or foreign file, not a checkpoint
+MAX_HEADER_BYTES = 100 * 1024 * 1024
+
+DTYPE_SIZES = {
+    "BOOL": 1, "U8": 1, "I8": 1, "F8_E4M3": 1, "F8_E5M2": 1,
+    "I16": 2, "U16": 2, "F16": 2, "BF16": 2,
+    "I32": 4, "U32": 4, "F32": 4,
+    "I64": 8, "U64": 8, "F64": 8,
+}
+NUMPY_DTYPES = {
+    "BOOL": "bool", "U8": "uint8", "I8": "int8", "I16": "int16", "U16": "uint16", "F16": "<f2",
+    "I32": "<i4", "U32": "<u4", "F32": "<f4", "I64": "<i8", "U64": "<u8", "F64": "<f8",
+}
+
+# sd-scripts metadata worth showing when comparing checkpoints of a run
+SUMMARY_METADATA = ("ss_output_name", "ss_epoch", "ss_steps", "ss_network_dim", "ss_network_alpha",
+                    "ss_learning_rate", "ss_training_finished_at", "sshs_model_hash")
+
+def read_header(path):
+    """
+    Parse a safetensors header.
+
+    Returns:
+        tuple: (tensors {name: {dtype, shape, data_offsets}}, metadata dict, offset of the data section)
+
+    Raises:
+        ValueError: If path isn't a safetensors file, or is truncated (e.g. still being written)
+    """
+    with open(path, "rb") as f:
+        file_size = os.fstat(f.fileno()).st_size
+        prefix = f.read(8)
+        if len(prefix) < 8:
+            raise ValueError(f"{path}: too short for a safetensors file")
+        (length,) = struct.unpack("<Q", prefix)
+        if length > MAX_HEADER_BYTES:
+            raise ValueError(f"{path}: header length {length} is not plausible")
+        raw = f.read(length)
+    if len(raw) < length:
+        raise ValueError(f"{path}: header is truncated")
+    try:
+        header = json.loads(raw)
+    except ValueError as e:
+        raise ValueError(f"{path}: header is not JSON ({e})") from e
+    if not isinstance(header, dict):
+        raise ValueError(f"{path}: header is not a JSON object")
+    metadata = header.pop("__metadata__", None) or {}
+    if not isinstance(metadata, dict):
+        raise ValueError(f"{path}: __metadata__ is not a JSON object")
+
+    data_size = file_size - 8 - length
+    for name, info in header.items():
+        if not (isinstance(info, dict) and isinstance(info.get("dtype"), str) and isinstance(info.get("shape"), list)
+                and isinstance(info.get("data_offsets"), list) and len(info["data_offsets"]) == 2
+                and all(isinstance(value, int) for value in info["shape"] + info["data_offsets"])):
+            raise ValueError(f"{path}: tensor {name} lacks a valid dtype, shape or data_offsets")
+        start, end = info["data_offsets"]
+        if not 0 <= start <= end <= data_size:
+            raise ValueError(f"{path}: tensor {name} runs past the end of the file (truncated?)")
+        if (end - start) % DTYPE_SIZES.get(info["dtype"], 1):
+            raise ValueError(f"{path}: tensor {name} is not a whole number of {info['dtype']} values")
+    return header, metadata, 8 + length
+
+def index_checkpoint(path):
+    """Summary of one checkpoint from its header: tensors, parameters, dtypes and training metadata"""
+    tensors, metadata, data_offset = read_header(path)
+    dtypes = {}
+    parameters = 0
+    for info in tensors.values():
+        count = 1
+        for dim in info["shape"]:
+            count *= dim
+        parameters += count
+        dtypes[info["dtype"]] = dtypes.get(info["dtype"], 0) + 1
+    return {
+        "file": os.path.basename(path),
+        "bytes": os.path.getsize(path),
+        "header_bytes": data_offset,
+        "tensors": len(tensors),
+        "parameters": parameters,
+        "dtypes": dtypes,
+        "metadata": {key: metadata[key] for key in SUMMARY_METADATA if key in metadata},
+    }
+
+def list_tensors(path, pattern=None):
+    """[(name, dtype, shape, nbytes)] in file order, optionally only names matching a glob"""
+    tensors, _, _ = read_header(path)
+    rows = [
+        (name, info["dtype"], info["shape"], info["data_offsets"][1] - info["data_offsets"][0])
+        for name, info in sorted(tensors.items(), key=lambda item: item[1]["data_offsets"][0])
+    ]
+    return [row for row in rows if pattern is None or fnmatch.fnmatch(row[0], pattern)]
+
+def file_checksum(path, chunk_size=CHUNK_SIZE):
+    """sha256 of the whole file, streamed"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def tensor_stats(path, names, chunk_size=CHUNK_SIZE):
+    """
+    Streaming statistics for the named tensors: sha256 of their bytes, and
+    min / max / mean / std / L2 norm / NaN count where numpy can decode the dtype.
+
+    Returns:
+        dict: name -> stats
+    """
+    tensors, _, data_offset = read_header(path)
+    missing = [name for name in names if name not in tensors]
+    if missing:
+        raise ValueError(f"{path}: no tensor(s) {', '.join(missing)}")
+
+    results = {}
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        for name in names:
+            info = tensors[name]
+            start, end = (data_offset + offset for offset in info["data_offsets"])
+            item_size = DTYPE_SIZES.get(info["dtype"], 1)
+            step = max(item_size, chunk_size - chunk_size % item_size)
+            digest = hashlib.sha256()
+            decodable = np is not None and (info["dtype"] in NUMPY_DTYPES or info["dtype"] == "BF16")
+            count = nans = 0
+            total = total_sq = 0.0
+            low = high = None
+            for position in range(start, end, step):
+                chunk = mapped[position:min(position + step, end)]
+                digest.update(chunk)
+                if not decodable:
+                    continue
+                if info["dtype"] == "BF16":
+                    # bfloat16 is the top half of a float32
+                    values = (np.frombuffer(chunk, dtype="<u2").astype(np.uint32) << 16).view(np.float32)
+                else:
+                    values = np.frombuffer(chunk, dtype=NUMPY_DTYPES[info["dtype"]])
+                values = values.astype(np.float64)
+                finite = values[~np.isnan(values)]
+                nans += values.size - finite.size
+                count += finite.size
+                if finite.size:
+                    total += float(finite.sum())
+                    total_sq += float(np.dot(finite, finite))
+                    low = float(finite.min()) if low is None else min(low, float(finite.min()))
+                    high = float(finite.max()) if high is None else max(high, float(finite.max()))
+
+            stats = {"dtype": info["dtype"], "shape": info["shape"], "sha256": digest.hexdigest()}
+            if decodable and count:
+                mean = total / count
+                stats.update(min=low, max=high, mean=mean, std=max(0.0, total_sq / count - mean * mean) ** 0.5,
+                             l2=total_sq ** 0.5, nans=nans)
+            results[name] = stats
+    return results
+
+def checkpoint_paths(path):
+    """The .safetensors files in a run folder in name order (epochs sort by their zero-padded suffix), or [path]"""
+    if os.path.isdir(path):
+        with os.scandir(path) as entries:
+            return sorted(entry.path for entry in entries if entry.is_file() and entry.name.endswith(".safetensors"))
+    return [path]
+
+def inspect(path, tensors=None, checksum=False):
+    """
+    Index every checkpoint under path (a run folder or one file).
+
+    Args:
+        tensors: Glob of tensor names to compute statistics for
+        checksum: Also compute each file's sha256 (reads the whole file)
+
+    Returns:
+        list: index_checkpoint() dicts, with "stats", "sha256" and "seconds" where requested
+              ({file, error} for files that can't be read as safetensors)
+    """
+    results = []
+    for checkpoint in checkpoint_paths(path):
+        started = time.perf_counter()
+        try:
+            summary = index_checkpoint(checkpoint)
+            if tensors:
+                names = [name for name, _, _, _ in list_tensors(checkpoint, tensors)]
+                summary["stats"] = tensor_stats(checkpoint, names)
+            if checksum:
+                summary["sha256"] = file_checksum(checkpoint)
+        except (ValueError, OSError, KeyError, TypeError) as e:
+            results.append({"file": os.path.basename(checkpoint), "error": str(e)})
+            continue
+        summary["seconds"] = round(time.perf_counter() - started, 4)
+        results.append(summary)
+    return results
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="A .safetensors file or a run folder of them")
+    parser.add_argument("--list", action="store_true", help="List tensor names, dtypes and shapes")
+    parser.add_argument("--tensors", default=None, help="Glob of tensor names to compute statistics for")
+    parser.add_argument("--checksum", action="store_true", help="sha256 of each whole file")
+    parser.add_argument("--json", action="store_true", help="Print JSON instead of a summary")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    if args.list:
+        for checkpoint in checkpoint_paths(args.path):
+            print(f"📦 {os.path.basename(checkpoint)}")
+            for name, dtype, shape, nbytes in list_tensors(checkpoint, args.tensors):
+                print(f"  {name}  {dtype}  {shape}  {nbytes} bytes")
+        return
+
+    results = inspect(args.path, args.tensors, args.checksum)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for summary in results:
+        if "error" in summary:
+            print(f"❌ {summary['file']}: {summary['error']}")
+            continue
+        metadata = summary["metadata"]
+        print(f"📦 {summary['file']}: {summary['tensors']} tensors, {summary['parameters']:,} parameters, "
+              f"{summary['bytes'] / 1024 ** 2:.1f} MiB, {summary['dtypes']}"
+              + (f", epoch {metadata['ss_epoch']}" if "ss_epoch" in metadata else "")
+              + (f", step {metadata['ss_steps']}" if "ss_steps" in metadata else "")
+              + f" ({summary['seconds'] * 1000:.1f} ms)")
+        if "sha256" in summary:
+            print(f"  sha256 {summary['sha256']}")
+        for name, stats in summary.get("stats", {}).items():
+            if "mean" in stats:
+                print(f"  {name}: mean {stats['mean']:.4g}, std {stats['std']:.4g}, "
+                      f"min {stats['min']:.4g}, max {stats['max']:.4g}, l2 {stats['l2']:.4g}, nans {stats['nans']}")
+            else:
+                print(f"  {name}: {stats['dtype']} {stats['shape']}, sha256 {stats['sha256'][:16]}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Offline tests for output_catalog.py on a throwaway outputs folder.
+
+    python -m pytest -q test_output_catalog.py
+"""
+
+import os
+
+from output_catalog import OutputCatalog
+
+def write(root, path, data):
+    target = os.path.join(root, path)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with open(target, "wb") as f:
+        f.write(data)
+
+def test_unchanged_tree_is_not_relisted(tmp_path):
+    write(tmp_path, "run1/run1-000003.safetensors", b"x" * 10)
+    write(tmp_path, "run1/sample/run1_e000003_00.png", b"png")
+    catalog = OutputCatalog(tmp_path)
+    assert catalog.refresh()["added"] == 2
+
+    # Only the root is re-listed: saving the manifest there changed its mtime
+    counts = OutputCatalog(tmp_path).refresh()
+    assert counts["dirs_reused"] == 2
+    assert (counts["added"], counts["changed"], counts["removed"]) == (0, 0, 0)
+
+def test_file_grown_in_place_is_updated(tmp_path):
+    write(tmp_path, "run1/run1-000003.safetensors", b"x" * 10)
+    OutputCatalog(tmp_path).refresh()
+    directory = os.path.join(tmp_path, "run1")
+    directory_mtime = os.stat(directory).st_mtime
+
+    # sd-scripts appends to a checkpoint it is still writing; the directory mtime stays put
+    with open(os.path.join(directory, "run1-000003.safetensors"), "ab") as f:
+        f.write(b"x" * 1000)
+    os.utime(directory, (directory_mtime, directory_mtime))
+
+    catalog = OutputCatalog(tmp_path)
+    counts = catalog.refresh()
+    assert counts["dirs_reused"] == 1
+    assert counts["changed"] == 1
+    assert catalog.files["run1/run1-000003.safetensors"]["size"] == 1010
+
+def test_datasets_folder_is_not_a_run(tmp_path):
+    write(tmp_path, "datasets/chubbiesstylelora/0001.jpg", b"jpg")
+    write(tmp_path, "run1/run1.safetensors", b"x")
+    catalog = OutputCatalog(tmp_path)
+    catalog.refresh()
+    assert [run["run"] for run in catalog.runs()] == ["run1"]
+    assert catalog.query(kind="image")["items"][0]["run"] == ""